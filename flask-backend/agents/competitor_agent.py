@@ -2,6 +2,9 @@ from typing import Dict, Any, List
 import asyncio
 from agents.scraper_agent import ScraperAgent
 from utils.claude_client import ClaudeClient
+from utils.competitor_index import CompetitorIndex
+from utils.competitor_store import CompetitorStore, competitor_domain, content_fingerprint
+from config.config import Config
 from urllib.parse import urlparse
 
 class CompetitorAgent:
@@ -12,11 +15,14 @@ class CompetitorAgent:
     def __init__(self):
         self.scraper = ScraperAgent()
         self.claude = ClaudeClient()
+        self.store = CompetitorStore()
         
-    async def analyze_competitor(self, competitor: Dict[str, Any]) -> Dict[str, Any]:
+    async def analyze_competitor(self, competitor: Dict[str, Any], location: str = None,
+                                 known: Dict[str, Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        Comprehensive competitor analysis
+        Comprehensive competitor analysis (known: stored records by domain, see preseed)
         """
+        known = known if known is not None else {}
         print(f"[Competitor Agent] Analyzing: {competitor.get('name', competitor.get('url'))}")
         
         analysis = {
@@ -46,11 +52,33 @@ class CompetitorAgent:
         # Scrape competitor website if URL available
         if analysis['url']:
             try:
-                site_data = await self.scraper.scrape_competitor_site(analysis['url'])
+                domain = competitor_domain(analysis['url'])
+                record = known.get(domain) or await self.store.get(domain) or {'domain': domain}
+                record['name'] = analysis['name'] or record.get('name', '')
+                
+                # Reuse the stored scrape while fresh, otherwise re-scrape
+                if self.store.is_fresh(record, 'scrape', Config.COMPETITOR_SCRAPE_MAX_AGE):
+                    site_data = record['scrape']['data']
+                else:
+                    site_data = await self.scraper.scrape_competitor_site(analysis['url'])
+                    self.store.update_section(record, 'scrape', site_data)
                 analysis['seo_data'] = site_data
                 
-                # Use Claude to analyze the content
-                claude_analysis = await self.claude.analyze_competitor_content(site_data)
+                # Use Claude to analyze the content, unless the stored insights
+                # were derived from identical content or are still fresh
+                fingerprint = content_fingerprint(site_data)
+                insights = record.get('insights') or {}
+                if insights and insights.get('fingerprint') == fingerprint:
+                    claude_analysis = insights['data']
+                    self.store.update_section(record, 'insights', claude_analysis, fingerprint=fingerprint)
+                elif not insights.get('fingerprint') and \
+                        self.store.is_fresh(record, 'insights', Config.COMPETITOR_INSIGHTS_MAX_AGE):
+                    claude_analysis = insights['data']
+                else:
+                    claude_analysis = await self.claude.analyze_competitor_content(site_data)
+                    # An all-empty result is the client's error fallback, don't keep it
+                    if any(claude_analysis.values()):
+                        self.store.update_section(record, 'insights', claude_analysis, fingerprint=fingerprint)
                 
                 analysis['keywords'] = claude_analysis.get('keywords', [])
                 analysis['content_strategy'] = {
@@ -62,6 +90,13 @@ class CompetitorAgent:
                 # Identify strengths and weaknesses
                 analysis['strengths'] = self._identify_strengths(site_data, claude_analysis)
                 analysis['weaknesses'] = self._identify_weaknesses(site_data, claude_analysis)
+                self.store.update_section(record, 'assessment', {
+                    'strengths': analysis['strengths'],
+                    'weaknesses': analysis['weaknesses']
+                })
+                
+                await self.store.put(record, location)
+                known[domain] = record
                 
             except Exception as e:
                 print(f"[Competitor Agent] Error analyzing {analysis['url']}: {str(e)}")
@@ -69,6 +104,17 @@ class CompetitorAgent:
         
         return analysis
     
+    async def preseed(self, location: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Load stored competitors for a location, by domain. Pass the result to
+        analyze_competitor so one analysis reuses them without another store
+        round trip; nothing is kept on the (shared) agent.
+        """
+        records = await self.store.find_by_location(location)
+        if records:
+            print(f"[Competitor Agent] Pre-seeded {len(records)} known competitors for {location}")
+        return {record['domain']: record for record in records}
+    
     async def analyze_competitor_keywords(self, competitors: List[Dict[str, Any]], location: str) -> Dict[str, Any]:
         """
         Analyze keywords across all competitors
@@ -109,21 +155,17 @@ class CompetitorAgent:
         
         return keyword_analysis
     
-    async def find_content_gaps(self, competitors: List[Dict[str, Any]], our_keywords: List[str]) -> List[Dict[str, Any]]:
+    async def find_content_gaps(self, competitors: List[Dict[str, Any]], our_keywords: List[str],
+                                index: CompetitorIndex = None) -> List[Dict[str, Any]]:
         """
         Find content gaps across competitors
         """
         gaps = []
         
-        # Collect all topics covered by competitors
-        all_topics = set()
-        all_questions = set()
+        # Index all topics covered by competitors (reuse the analysis index if given)
+        index = index or CompetitorIndex.from_competitors(competitors)
         
         for comp in competitors:
-            # Add H2 topics
-            h2_tags = comp.get('seo_data', {}).get('h2_tags', [])
-            all_topics.update(h2_tags)
-            
             # Add content gaps identified by Claude
             content_gaps = comp.get('content_strategy', {}).get('content_gaps', [])
             gaps.extend([{'gap': gap, 'type': 'missing_content'} for gap in content_gaps])
@@ -142,8 +184,10 @@ class CompetitorAgent:
             'service area maps'
         ]
         
+        # Covered when a competitor H1 or H2 contains the gap as a phrase,
+        # ignoring case and punctuation ('Service Guarantees!' covers it)
         for gap in common_gaps:
-            if not any(gap.lower() in topic.lower() for topic in all_topics):
+            if not index.has_phrase(gap, fields=('h1', 'h2')):
                 gaps.append({
                     'gap': gap,
                     'type': 'industry_standard',
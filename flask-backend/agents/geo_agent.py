@@ -1,8 +1,9 @@
 from typing import Dict, Any, List, Tuple
 import asyncio
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
 import re
+from config.config import Config
+from utils import tracing, metrics
+import time
 
 class GeoAgent:
     """
@@ -10,7 +11,16 @@ class GeoAgent:
     """
     
     def __init__(self):
-        self.geolocator = Nominatim(user_agent="ranksavvy_geo_agent")
+        self._geolocator = None
+    
+    @property
+    def geolocator(self):
+        """Nominatim geocoder, created on first use"""
+        if self._geolocator is None:
+            from geopy.geocoders import Nominatim
+            self._geolocator = Nominatim(user_agent="ranksavvy_geo_agent", domain=Config.NOMINATIM_DOMAIN,
+                                         scheme=Config.NOMINATIM_SCHEME)
+        return self._geolocator
         
     async def analyze_location(self, location: str, radius: float = None) -> Dict[str, Any]:
         """
@@ -32,7 +42,7 @@ class GeoAgent:
         
         try:
             # Geocode the location
-            location_data = self.geolocator.geocode(location, addressdetails=True)
+            location_data = self._geocoder_call('geocode', self.geolocator.geocode, location, addressdetails=True)
             
             if location_data:
                 geo_data['coordinates'] = (location_data.latitude, location_data.longitude)
@@ -61,6 +71,19 @@ class GeoAgent:
             
         return geo_data
     
+    def _geocoder_call(self, operation: str, call, *args, **kwargs):
+        """One Nominatim call, traced and counted by outcome"""
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            with tracing.span(f"geocoder.{operation}"):
+                result = call(*args, **kwargs)
+            outcome = 'found' if result else 'empty'
+            return result
+        finally:
+            metrics.GEOCODER_REQUESTS.inc(operation=operation, outcome=outcome)
+            metrics.GEOCODER_DURATION.observe(time.perf_counter() - start, operation=operation)
+    
     async def _calculate_service_area(self, center: Tuple[float, float], radius: float) -> Dict[str, Any]:
         """
         Calculate service area bounds
@@ -89,6 +112,7 @@ class GeoAgent:
         """
         Find nearby cities within radius
         """
+        from geopy.distance import geodesic
         nearby_cities = []
         
         # Common nearby city patterns for Alabama (customize per state)
@@ -103,7 +127,7 @@ class GeoAgent:
         for lat_offset, lon_offset in search_offsets:
             try:
                 search_point = (lat + lat_offset, lon + lon_offset)
-                location = self.geolocator.reverse(search_point, exactly_one=True)
+                location = self._geocoder_call('reverse', self.geolocator.reverse, search_point, exactly_one=True)
                 
                 if location:
                     address = location.raw.get('address', {})
@@ -2,8 +2,21 @@ from typing import Dict, Any, List
 import asyncio
 from agents.scraper_agent import ScraperAgent
 from utils.claude_client import ClaudeClient
+from utils.scrape_scheduler import AdaptiveScrapeScheduler
+from utils.keyword_table import KeywordTable, INTENT_MULTIPLIERS, COMPETITION_MULTIPLIERS, TYPE_BONUSES
+from config.config import Config
 import re
 
+# Variant terms with a prior weight used to order scraping (higher first)
+EMERGENCY_TERMS = {
+    'emergency': 1.0, '24/7': 0.9, 'same day': 0.8, 'urgent': 0.7,
+    'after hours': 0.6, 'now': 0.5, 'today': 0.5, 'immediate': 0.4
+}
+INTENT_TERMS = {
+    'near me': 1.0, 'repair': 0.95, 'service': 0.9, 'cost': 0.85, 'price': 0.8,
+    'install': 0.75, 'replace': 0.7, 'best': 0.6, 'fix': 0.5, 'top': 0.4
+}
+
 class KeywordAgent:
     """
     Discovers and analyzes keywords using search data and AI
@@ -35,6 +48,23 @@ class KeywordAgent:
         autocomplete = await self.scraper.get_autocomplete_suggestions(service, location)
         keywords_data['autocomplete'] = autocomplete
         
+        # Expand the seed through autocomplete prefixes for long-tail terms
+        if Config.AUTOCOMPLETE_EXPANSION_ENABLED:
+            expansion = await self.scraper.expand_autocomplete(service, location)
+            seen = {kw.lower() for kw in autocomplete[:5]}
+            for entry in expansion['suggestions']:
+                if len(keywords_data['long_tail']) >= Config.LONG_TAIL_KEYWORD_LIMIT:
+                    break
+                if entry['suggestion'].lower() in seen:
+                    continue
+                keywords_data['long_tail'].append({
+                    'keyword': entry['suggestion'],
+                    'type': 'long_tail',
+                    'popularity_rank': entry['rank'],
+                    'source_prefix': entry['source'],
+                    'search_volume_score': 2 if entry['rank'] <= 3 else 1
+                })
+        
         # Get SERP data for main keyword
         main_serp = await self.scraper.scrape_serp(service, location)
         
@@ -44,10 +74,16 @@ class KeywordAgent:
         # Get related searches
         keywords_data['related_searches'] = main_serp.get('related_searches', [])
         
+        scheduler = AdaptiveScrapeScheduler(
+            self.scraper.batch_scrape_keywords,
+            budget=Config.KEYWORD_VARIANT_SCRAPE_BUDGET,
+            wave_size=Config.KEYWORD_VARIANT_WAVE_SIZE,
+            cached_lookup=self.scraper.cached_serp_queries
+        )
+        
         # Generate emergency/urgent variations
-        emergency_terms = ['emergency', '24/7', 'urgent', 'same day', 'now', 'today', 'immediate', 'after hours']
         emergency_keywords = []
-        for term in emergency_terms:
+        for term in EMERGENCY_TERMS:
             emergency_keywords.append({
                 'keyword': f"{term} {service} {location}",
                 'type': 'emergency',
@@ -59,25 +95,18 @@ class KeywordAgent:
                 'intent': 'urgent'
             })
         
-        # Batch check emergency keywords
-        emergency_results = await self.scraper.batch_scrape_keywords(
-            [kw['keyword'] for kw in emergency_keywords[:10]], 
+        # Check emergency keywords in priority order under the scrape budget
+        emergency_results = await scheduler.run(
+            self._variant_candidates(emergency_keywords, service, EMERGENCY_TERMS, prefix_weight=1.0, suffix_weight=0.8),
             location
         )
         
         # Filter emergency keywords by actual search presence
-        for i, result in enumerate(emergency_results):
-            if not result.get('error'):
-                volume_score = result['volume_indicators']['score']
-                if volume_score > 0:  # Has some search volume
-                    emergency_keywords[i]['search_volume_score'] = volume_score
-                    emergency_keywords[i]['competition'] = result['volume_indicators']['competition_level']
-                    keywords_data['emergency_keywords'].append(emergency_keywords[i])
+        keywords_data['emergency_keywords'] = self._filter_by_search_presence(emergency_keywords, emergency_results)
         
         # Generate high-intent commercial keywords
-        intent_terms = ['service', 'repair', 'install', 'fix', 'replace', 'cost', 'price', 'near me', 'best', 'top']
         intent_keywords = []
-        for term in intent_terms:
+        for term in INTENT_TERMS:
             intent_keywords.append({
                 'keyword': f"{service} {term} {location}",
                 'type': 'commercial',
@@ -89,20 +118,14 @@ class KeywordAgent:
                 'intent': 'high'
             })
         
-        # Batch check intent keywords
-        intent_results = await self.scraper.batch_scrape_keywords(
-            [kw['keyword'] for kw in intent_keywords[:10]], 
+        # Check intent keywords in priority order under the scrape budget
+        intent_results = await scheduler.run(
+            self._variant_candidates(intent_keywords, service, INTENT_TERMS, prefix_weight=0.8, suffix_weight=1.0),
             location
         )
         
         # Filter intent keywords by search presence
-        for i, result in enumerate(intent_results):
-            if not result.get('error'):
-                volume_score = result['volume_indicators']['score']
-                if volume_score > 0:
-                    intent_keywords[i]['search_volume_score'] = volume_score
-                    intent_keywords[i]['competition'] = result['volume_indicators']['competition_level']
-                    keywords_data['intent_keywords'].append(intent_keywords[i])
+        keywords_data['intent_keywords'] = self._filter_by_search_presence(intent_keywords, intent_results)
         
         # Use Claude to analyze patterns and suggest more keywords
         claude_keywords = await self._get_claude_keyword_suggestions(
@@ -129,6 +152,9 @@ class KeywordAgent:
                 'search_volume_score': 5 - i  # Higher rank = higher score
             })
         
+        # Add long-tail autocomplete expansions
+        all_keywords.extend(keywords_data['long_tail'])
+        
         # Add emergency and intent keywords
         all_keywords.extend(keywords_data['emergency_keywords'])
         all_keywords.extend(keywords_data['intent_keywords'])
@@ -138,10 +164,46 @@ class KeywordAgent:
         
         # Sort by search volume score
         all_keywords.sort(key=lambda x: x.get('search_volume_score', 0), reverse=True)
+        
+        # Value scores for the whole list in one columnar pass
+        for kw, value in zip(all_keywords, KeywordTable(all_keywords).value_scores().tolist()):
+            kw['value_score'] = value
         keywords_data['all_keywords'] = all_keywords
         
         return keywords_data
     
+    def _variant_candidates(self, variants: List[Dict[str, Any]], service: str, term_weights: Dict[str, float],
+                            prefix_weight: float, suffix_weight: float) -> List[Dict[str, Any]]:
+        """Build scheduler candidates from generated variants (one prefix/suffix pair per term)"""
+        terms = list(term_weights)
+        candidates = []
+        for i, variant in enumerate(variants):
+            term = terms[i // 2]
+            placement = 'prefix' if variant['keyword'].startswith(f"{term} {service}") else 'suffix'
+            weight = prefix_weight if placement == 'prefix' else suffix_weight
+            candidates.append({
+                'keyword': variant['keyword'],
+                'term': term,
+                'placement': placement,
+                'priority': term_weights[term] * weight
+            })
+        return candidates
+    
+    def _filter_by_search_presence(self, variants: List[Dict[str, Any]],
+                                   results: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep scraped variants that show search volume, in generation order"""
+        kept = []
+        for variant in variants:
+            result = results.get(variant['keyword'])
+            if not result or result.get('error'):
+                continue
+            volume_score = result['volume_indicators']['score']
+            if volume_score > 0:  # Has some search volume
+                variant['search_volume_score'] = volume_score
+                variant['competition'] = result['volume_indicators']['competition_level']
+                kept.append(variant)
+        return kept
+    
     async def _get_claude_keyword_suggestions(self, service: str, location: str, 
                                             autocomplete: List[str], questions: List[str]) -> List[Dict[str, Any]]:
         """Use Claude to analyze patterns and suggest keywords"""
@@ -180,10 +242,10 @@ class KeywordAgent:
             print(f"[Keyword Agent] Error getting Claude suggestions: {str(e)}")
             return []
     
-    async def find_related_services(self, base_service: str) -> List[str]:
+    async def find_related_services(self, base_service: str, limit: int = 5) -> List[str]:
         """Find related services that might be underserved"""
         prompt = f"""
-        For the service "{base_service}", list 5 closely related services that:
+        For the service "{base_service}", list {limit} closely related services that:
         1. The same type of business might offer
         2. Customers often need at the same time
         3. Are logical extensions of the main service
@@ -194,46 +256,40 @@ class KeywordAgent:
         """
         
         try:
-            related = await self.claude.analyze(prompt)
+            related = await self.claude.analyze(prompt, max_tokens=max(1000, limit * 20))
             services = []
+            seen = {base_service.lower()}
             
             for line in related.split('\n'):
-                line = line.strip()
-                if line and len(line) > 5:
+                # Models often number or bullet the list
+                line = re.sub(r'^\s*(?:\d+[.)]|[-*\u2022])\s*', '', line).strip()
+                if line and len(line) > 5 and line.lower() not in seen:
+                    seen.add(line.lower())
                     services.append(line)
             
-            return services[:5]
+            return services[:limit]
             
         except Exception as e:
             print(f"[Keyword Agent] Error finding related services: {str(e)}")
             return []
     
     def calculate_keyword_value(self, keyword_data: Dict[str, Any]) -> int:
-        """Calculate overall value score for a keyword"""
+        """
+        Calculate overall value score for a keyword
+        (one dict; discover_keywords scores the whole list with KeywordTable.value_scores)
+        """
         score = 0
         
         # Base score from search volume indicators
         score += keyword_data.get('search_volume_score', 0) * 10
         
         # Intent multipliers
-        if keyword_data.get('intent') == 'urgent':
-            score *= 1.5
-        elif keyword_data.get('intent') == 'commercial':
-            score *= 1.3
+        score *= INTENT_MULTIPLIERS.get(keyword_data.get('intent'), 1.0)
         
         # Competition adjustments
-        competition = keyword_data.get('competition', 'unknown')
-        if competition == 'low':
-            score *= 1.5
-        elif competition == 'medium':
-            score *= 1.2
-        elif competition == 'high':
-            score *= 0.8
+        score *= COMPETITION_MULTIPLIERS.get(keyword_data.get('competition', 'unknown'), 1.0)
         
         # Type bonuses
-        if keyword_data.get('type') == 'emergency':
-            score += 20
-        elif keyword_data.get('type') == 'autocomplete':
-            score += 15
+        score += TYPE_BONUSES.get(keyword_data.get('type'), 0)
         
         return int(score)
\ No newline at end of file
@@ -1,11 +1,19 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, AsyncIterator, Tuple
 import asyncio
+import random
+import time
 from agents.scraper_agent import ScraperAgent
 from agents.keyword_agent import KeywordAgent
 from agents.competitor_agent import CompetitorAgent
 from agents.geo_agent import GeoAgent
 from utils.cache_manager import CacheManager
-import json
+from utils.keyword_table import KeywordTable, MISSING
+from utils.competitor_index import CompetitorIndex
+from utils.analysis_export import new_analysis_id, is_analysis
+from utils.opportunity_scoring import score_service
+from utils import json_codec, tracing, metrics, profiler, scrape_governor, analysis_budget
+from config.config import Config
+import numpy as np
 
 class LeadAgent:
     """
@@ -20,23 +28,74 @@ class LeadAgent:
         self.geo_agent = GeoAgent()
         self.cache = CacheManager()
         
-    async def analyze_niche(self, query: str, location: str, options: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def analyze_niche(self, query: str, location: str, options: Dict[str, Any] = None,
+                            progress: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
         """
         Main orchestration method for niche analysis
+        progress, if given, is called with an event at each step and with the
+        surprise opportunities ranked so far as they are scored
+        options.trace attaches a per-step timing breakdown as results['timings']
+        options.profile (or PROFILE_SAMPLE_RATE) stores a stack-sampling profile
+        as profile:{analysis_id}, summarized in results['profile'] (with the
+        ID to fetch it by, unique to this run)
+        options.trace and options.profile always run the pipeline; a sampled
+        request answered from cache stores no profile
+        options.priority='background' queues the analysis' scrapes and Claude
+        calls behind other analyses (e.g. scheduled refreshes)
+        options.deadline_ms / max_scrapes / max_cost bound the run; sections
+        cut short are listed in results['incomplete_sections']
         """
-        # Default options
         options = options or {}
+        priority = 'background' if options.get('priority') == 'background' else 'analysis'
+        profile = bool(options.get('profile')) or random.random() < Config.PROFILE_SAMPLE_RATE
+        # A timed or profiled run must measure the pipeline, not a cache read
+        use_cache = not (options.get('trace') or options.get('profile'))
+        start = time.perf_counter()
+        outcome = 'error'
+        metrics.ANALYSES_IN_FLIGHT.inc()
+        try:
+            with scrape_governor.work_class(priority), \
+                    analysis_budget.active(analysis_budget.AnalysisBudget.from_options(options)), \
+                    profiler.sampling(enabled=profile) as sampler, \
+                    tracing.trace('analyze_niche', enabled=Config.TRACING_ENABLED or bool(options.get('trace')),
+                                  query=query, location=location) as current:
+                results, from_cache = await self._run_analysis(query, location, options, progress, use_cache)
+            outcome = 'error' if 'error' in results else 'ok'
+        finally:
+            metrics.ANALYSES_IN_FLIGHT.dec()
+            metrics.ANALYSIS_DURATION.observe(time.perf_counter() - start, outcome=outcome)
+        
+        # Timings and profiles describe this run only, so they're added after caching
+        if current is not None and options.get('trace'):
+            results = dict(results, timings=current.breakdown())
+        if sampler is not None and not from_cache:
+            # The analysis ID is per run, so each profile is kept under its own ID
+            run_id = results['analysis_id']
+            await self.cache.aset(f"profile:{run_id}", sampler.folded(), ttl=Config.PROFILE_TTL)
+            print(f"[Lead Agent] Stored profile for {run_id}: {sampler.samples} samples")
+            results = dict(results, profile=dict(sampler.summary(), analysis_id=run_id))
+        return results
+    
+    async def _run_analysis(self, query: str, location: str, options: Dict[str, Any],
+                            progress: Callable[[Dict[str, Any]], None] = None,
+                            use_cache: bool = True) -> Tuple[Dict[str, Any], bool]:
+        """Pipeline behind analyze_niche; returns (results, whether they came from cache)"""
         radius = options.get('radius', None)
         include_surprise = options.get('surprise_me', False)
         
+        def report(step: str, message: str, **data):
+            if progress is not None:
+                progress({'status': 'processing', 'step': step, 'message': message, **data})
+        
         # Check cache first
-        cache_key = f"niche_analysis:{query}:{location}:{radius}"
-        cached_result = self.cache.get(cache_key)
+        cache_key = self._cache_key(query, location, options)
+        cached_result = await self.cache.aget_json(cache_key) if use_cache else None
         if cached_result:
-            return json.loads(cached_result)
+            return cached_result, True
         
         # Initialize results
         results = {
+            'analysis_id': new_analysis_id(),
             'query': query,
             'location': location,
             'timestamp': asyncio.get_event_loop().time(),
@@ -47,75 +106,165 @@ class LeadAgent:
             'recommendations': {}
         }
         
+        # Under a budget each step gets the remaining time and scrapes, in
+        # order of value; steps that run out are listed as incomplete
+        budget = analysis_budget.current_budget()
+        incomplete = []
+        
+        async def run_step(section: str, step):
+            if budget is None:
+                return await step
+            complete, result = await budget.run(step)
+            if not complete:
+                print(f"[Lead Agent] Budget exhausted ({budget.reason}), {section} incomplete")
+                incomplete.append(section)
+            return result
+        
         try:
             # Step 1: Geographic Analysis
             print(f"[Lead Agent] Starting geographic analysis for {location}")
-            geo_data = await self.geo_agent.analyze_location(location, radius)
+            report('geographic', 'Analyzing location data...')
+            with tracing.span('geographic_analysis'):
+                geo_data = await run_step('geographic_data', self.geo_agent.analyze_location(location, radius))
+            geo_data = geo_data or {'primary_location': location}
             results['geographic_data'] = geo_data
             
             # Step 2: Initial keyword discovery
             print(f"[Lead Agent] Discovering keywords for {query} in {location}")
-            keywords = await self.keyword_agent.discover_keywords(query, location, geo_data)
+            report('keywords', 'Discovering keywords...')
+            with tracing.span('keyword_discovery') as step:
+                keywords = await run_step('keywords', self.keyword_agent.discover_keywords(query, location, geo_data))
+                keywords = keywords or {}
+                step.set('keywords', len(keywords.get('all_keywords', [])))
             results['keywords'] = keywords
             
             # Step 3: Competitor analysis (parallel for efficiency)
             print(f"[Lead Agent] Analyzing competitors")
-            competitor_tasks = []
-            
-            # Get local competitors from Google Maps
-            local_competitors = await self.scraper_agent.get_local_competitors(query, location)
-            
-            # Get organic competitors from SERP
-            serp_data = await self.scraper_agent.scrape_serp(query, location)
-            organic_competitors = serp_data.get('organic_results', [])[:5]
-            
-            # Analyze each competitor
-            for competitor in local_competitors[:5]:
-                task = self.competitor_agent.analyze_competitor(competitor)
-                competitor_tasks.append(task)
-                
-            for competitor in organic_competitors:
-                if competitor.get('url'):
-                    task = self.competitor_agent.analyze_competitor({'url': competitor['url'], 'name': competitor['title']})
-                    competitor_tasks.append(task)
-            
-            competitor_results = await asyncio.gather(*competitor_tasks, return_exceptions=True)
-            
-            # Filter out exceptions
-            valid_competitors = [r for r in competitor_results if not isinstance(r, Exception)]
-            results['competitors'] = {
-                'local': local_competitors,
-                'organic': organic_competitors,
-                'detailed_analysis': valid_competitors
-            }
+            report('competitors', 'Analyzing competitors...')
+            with tracing.span('competitor_analysis'):
+                competitors = await run_step('competitors', self._analyze_competitors(query, location))
+            results['competitors'] = competitors or {'local': [], 'organic': [], 'detailed_analysis': []}
             
             # Step 4: Find opportunities
             print(f"[Lead Agent] Identifying opportunities")
-            opportunities = await self._identify_opportunities(results)
+            report('opportunities', 'Identifying opportunities...')
+            with tracing.span('opportunities'):
+                competitor_index = CompetitorIndex.from_competitors(results['competitors']['detailed_analysis'])
+                opportunities = await self._identify_opportunities(results, competitor_index)
             results['opportunities'] = opportunities
             
             # Step 5: Generate recommendations
             print(f"[Lead Agent] Generating recommendations")
-            recommendations = await self._generate_recommendations(results)
+            report('recommendations', 'Generating recommendations...')
+            with tracing.span('recommendations'):
+                recommendations = await self._generate_recommendations(results)
             results['recommendations'] = recommendations
             
             # Step 6: Surprise me mode (optional)
             if include_surprise:
                 print(f"[Lead Agent] Finding surprise opportunities")
-                surprise_data = await self._find_surprise_opportunities(geo_data, query)
-                results['surprise_opportunities'] = surprise_data
+                report('surprise', 'Exploring related services...')
+                breadth = max(1, min(int(options.get('surprise_breadth') or Config.SURPRISE_BREADTH),
+                                     Config.SURPRISE_MAX_BREADTH))
+                # Ranked in place, so a budget cut keeps what was scored so far
+                ranked = []
+                with tracing.span('surprise_opportunities', breadth=breadth):
+                    await run_step('surprise_opportunities', self._find_surprise_opportunities(
+                        geo_data, query, breadth, ranked,
+                        lambda top: report('surprise', 'Scoring related services...', opportunities=top)))
+                results['surprise_opportunities'] = ranked[:Config.SURPRISE_RESULT_LIMIT]
             
-            # Cache the results
-            self.cache.set(cache_key, json.dumps(results), ttl=86400)  # 24 hour cache
+            if budget is not None:
+                results['incomplete_sections'] = incomplete
+                results['budget'] = budget.summary()
             
-            return results
+            # Cache the results; a partial result must not answer later
+            # unbudgeted requests, so it's only kept for export by its own ID
+            # and never replaces the full result other IDs point at
+            with tracing.span('store_results'):
+                if incomplete:
+                    cache_key = f"{cache_key}:partial:{results['analysis_id']}"
+                    ttl = Config.PARTIAL_ANALYSIS_TTL
+                else:
+                    ttl = 86400  # 24 hour cache
+                await self.cache.aset_json(cache_key, results, ttl=ttl)
+                # Export and result lookups go by analysis ID
+                await self.cache.aset(f"analysis_result:{results['analysis_id']}", cache_key, ttl=ttl)
+            
+            return results, False
             
         except Exception as e:
             print(f"[Lead Agent] Error during analysis: {str(e)}")
             results['error'] = str(e)
-            return results
+            return results, False
     
-    async def _identify_opportunities(self, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _analyze_competitors(self, query: str, location: str) -> Dict[str, Any]:
+        """Local (Maps) and organic (SERP) competitors, each analyzed in parallel"""
+        step = tracing.current_span()
+        competitor_tasks = []
+        
+        # Load known competitors for this market before analyzing
+        known = await self.competitor_agent.preseed(location)
+        
+        # Get local competitors from Google Maps
+        local_competitors = await self.scraper_agent.get_local_competitors(query, location)
+        
+        # Get organic competitors from SERP
+        serp_data = await self.scraper_agent.scrape_serp(query, location)
+        organic_competitors = serp_data.get('organic_results', [])[:5]
+        
+        # Analyze each competitor
+        for competitor in local_competitors[:5]:
+            task = self.competitor_agent.analyze_competitor(competitor, location, known)
+            competitor_tasks.append(task)
+            
+        for competitor in organic_competitors:
+            if competitor.get('url'):
+                task = self.competitor_agent.analyze_competitor(
+                    {'url': competitor['url'], 'name': competitor['title']}, location, known
+                )
+                competitor_tasks.append(task)
+        
+        competitor_results = await asyncio.gather(*competitor_tasks, return_exceptions=True)
+        
+        # Filter out exceptions
+        valid_competitors = [r for r in competitor_results if not isinstance(r, Exception)]
+        step.set('competitors', len(valid_competitors))
+        step.set('failures', len(competitor_results) - len(valid_competitors))
+        return {
+            'local': local_competitors,
+            'organic': organic_competitors,
+            'detailed_analysis': valid_competitors
+        }
+    
+    def _cache_key(self, query: str, location: str, options: Dict[str, Any] = None) -> str:
+        radius = (options or {}).get('radius', None)
+        return f"niche_analysis:{query}:{location}:{radius}"
+    
+    def get_cached_json(self, query: str, location: str, options: Dict[str, Any] = None) -> str:
+        """Serialized cached analysis for these inputs, or None (no analysis is run)"""
+        return self.cache.get(self._cache_key(query, location, options))
+    
+    def get_analysis_json(self, analysis_id: str) -> str:
+        """Serialized stored analysis by analysis ID, or None if unknown or expired"""
+        cache_key = self.cache.get(f"analysis_result:{analysis_id}")
+        if not cache_key:
+            return None
+        # The cache key holds the latest full run of those inputs
+        payload = self.cache.get(cache_key)
+        return payload if payload and is_analysis(payload, analysis_id) else None
+    
+    def get_profile(self, analysis_id: str) -> str:
+        """Folded-stack profile of a profiled analysis, or None"""
+        return self.cache.get(f"profile:{analysis_id}")
+    
+    def get_analysis(self, analysis_id: str) -> Dict[str, Any]:
+        """Stored analysis results by analysis ID, or None if unknown or expired"""
+        cached_result = self.get_analysis_json(analysis_id)
+        return json_codec.loads(cached_result) if cached_result else None
+    
+    async def _identify_opportunities(self, analysis_data: Dict[str, Any],
+                                      competitor_index: CompetitorIndex = None) -> Dict[str, Any]:
         """Identify gaps and opportunities from the analysis"""
         opportunities = {
             'keyword_gaps': [],
@@ -127,26 +276,28 @@ class LeadAgent:
         
         # Analyze keyword gaps
         all_keywords = analysis_data['keywords'].get('all_keywords', [])
-        competitor_keywords = set()
+        if competitor_index is None:
+            competitor_index = CompetitorIndex.from_competitors(
+                analysis_data['competitors'].get('detailed_analysis', [])
+            )
         
-        for comp in analysis_data['competitors'].get('detailed_analysis', []):
-            if comp and 'keywords' in comp:
-                competitor_keywords.update(comp['keywords'])
+        # Score and filter all keywords column-wise in one pass
+        table = KeywordTable(all_keywords)
         
         # Find keywords competitors are missing
-        for kw in all_keywords:
-            if kw['keyword'] not in competitor_keywords and kw.get('intent') == 'commercial':
-                opportunities['keyword_gaps'].append(kw)
+        covered = np.fromiter((competitor_index.covers_keyword(kw) for kw in table.keyword),
+                              dtype=bool, count=len(table))
+        gap_mask = ~covered & table.intent.eq('commercial')
+        opportunities['keyword_gaps'] = table.rows(np.flatnonzero(gap_mask))
         
         # Find emergency/urgent keywords with low competition
-        for kw in all_keywords:
-            if any(term in kw['keyword'].lower() for term in ['emergency', '24/7', 'urgent', 'now', 'today']):
-                if kw.get('competition', 'high') != 'high':
-                    opportunities['emergency_keywords'].append(kw)
+        emergency_mask = table.contains_any(['emergency', '24/7', 'urgent', 'now', 'today'])
+        # Keywords without a competition level count as high competition
+        emergency_mask &= ~table.competition.eq('high') & ~table.competition.eq(MISSING)
+        opportunities['emergency_keywords'] = table.rows(np.flatnonzero(emergency_mask))
         
         # Find low competition keywords
-        low_comp = [kw for kw in all_keywords if kw.get('competition') == 'low']
-        opportunities['low_competition'] = sorted(low_comp, key=lambda x: x.get('search_volume_score', 0), reverse=True)[:10]
+        opportunities['low_competition'] = table.top_k(table.competition.eq('low'), 10)
         
         return opportunities
     
@@ -188,22 +339,39 @@ class LeadAgent:
         
         return recommendations
     
-    async def _find_surprise_opportunities(self, geo_data: Dict[str, Any], base_query: str) -> List[Dict[str, Any]]:
-        """Find unexpected high-value opportunities"""
-        surprise_keywords = []
-        
-        # Related services that might be underserved
-        related_services = await self.keyword_agent.find_related_services(base_query)
-        
-        for service in related_services[:5]:
-            serp_data = await self.scraper_agent.scrape_serp(service, geo_data['primary_location'])
-            
-            # Low competition indicator: few ads, incomplete local pack
-            if len(serp_data.get('ads', [])) < 2 and len(serp_data.get('local_pack', [])) < 3:
-                surprise_keywords.append({
-                    'keyword': service,
-                    'opportunity_score': 9,
-                    'reason': 'Underserved market with low competition'
-                })
-        
-        return surprise_keywords
\ No newline at end of file
+    async def _find_surprise_opportunities(self, geo_data: Dict[str, Any], base_query: str, breadth: int = 5,
+                                           ranked: List[Dict[str, Any]] = None,
+                                           on_update: Callable[[List[Dict[str, Any]]], None] = None
+                                           ) -> List[Dict[str, Any]]:
+        """
+        Find unexpected high-value opportunities: up to `breadth` related
+        services, scraped in parallel batches and scored as each batch lands.
+        Qualifying services are kept best-first in `ranked` (and passed to
+        on_update after every batch).
+        """
+        ranked = [] if ranked is None else ranked
+        async for opportunity_batch in self._explore_related_services(geo_data['primary_location'], base_query, breadth):
+            qualifying = [o for o in opportunity_batch if o['opportunity_score'] >= Config.SURPRISE_MIN_SCORE]
+            if not qualifying:
+                continue
+            ranked.extend(qualifying)
+            ranked.sort(key=lambda o: o['opportunity_score'], reverse=True)
+            if on_update is not None:
+                on_update(ranked[:Config.SURPRISE_RESULT_LIMIT])
+        return ranked
+    
+    async def _explore_related_services(self, location: str, base_query: str,
+                                        breadth: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Scored related services, one list per scrape batch in completion order"""
+        related_services = await self.keyword_agent.find_related_services(base_query, breadth)
+        size = max(1, Config.SURPRISE_BATCH_SIZE)
+        # All batches start at once; the browser governor paces the actual scrapes
+        batches = [asyncio.ensure_future(self.scraper_agent.batch_scrape_keywords(related_services[i:i + size], location))
+                   for i in range(0, len(related_services), size)]
+        try:
+            for batch in asyncio.as_completed(batches):
+                yield [score_service(result['keyword'], result['serp_data'])
+                       for result in await batch if 'serp_data' in result]
+        finally:
+            for batch in batches:
+                batch.cancel()
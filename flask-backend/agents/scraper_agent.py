@@ -1,8 +1,11 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Set
 import asyncio
 from utils.brightdata_client import BrightDataClient
 from utils.cache_manager import CacheManager
-import json
+from utils.competitor_store import content_fingerprint
+from utils.autocomplete_expander import AutocompleteExpander
+from utils.serp_history import get_serp_history
+from config.config import Config
 
 class ScraperAgent:
     """
@@ -12,60 +15,147 @@ class ScraperAgent:
     def __init__(self):
         self.brightdata = BrightDataClient()
         self.cache = CacheManager()
+        self.serp_history = get_serp_history()
         
     async def scrape_serp(self, query: str, location: str = None) -> Dict[str, Any]:
         """Scrape Google SERP with all features"""
         cache_key = f"serp:{query}:{location}"
-        cached = self.cache.get(cache_key)
-        if cached:
-            return json.loads(cached)
+        cached = await self.cache.aget_json(cache_key)
+        if cached is not None:
+            return cached
         
+        results = await self._scrape_serp_uncached(query, location)
+        
+        await self.cache.aset_json(cache_key, results, ttl=86400)
+        return results
+    
+    async def _scrape_serp_uncached(self, query: str, location: str = None) -> Dict[str, Any]:
+        """Scrape a SERP and attach search volume indicators (no cache access)"""
         print(f"[Scraper Agent] Scraping SERP for: {query} in {location}")
         results = await self.brightdata.scrape_google_serp(query, location)
         
         # Analyze SERP features for search volume estimation
         results['search_volume_indicators'] = self._analyze_serp_features(results)
         
-        self.cache.set(cache_key, json.dumps(results), ttl=86400)
+        # Every fresh scrape goes into the rank history (cache hits are already there)
+        if self.serp_history is not None:
+            await self.serp_history.arecord(query, location, results)
         return results
     
+    async def cached_serp_queries(self, queries: List[str], location: str = None) -> Set[str]:
+        """Queries whose SERP is already cached (no scrape needed), in one round trip"""
+        keys = {f"serp:{query}:{location}": query for query in queries}
+        found = await self.cache.aexists_many(list(keys))
+        return {keys[key] for key, exists in found.items() if exists}
+    
     async def get_autocomplete_suggestions(self, query: str, location: str = None) -> List[str]:
         """Get Google autocomplete suggestions"""
         cache_key = f"autocomplete:{query}:{location}"
-        cached = self.cache.get(cache_key)
-        if cached:
-            return json.loads(cached)
+        cached = await self.cache.aget_json(cache_key)
+        if cached is not None:
+            return cached
         
         print(f"[Scraper Agent] Getting autocomplete for: {query}")
         suggestions = await self.brightdata.scrape_google_autocomplete(query, location)
         
-        self.cache.set(cache_key, json.dumps(suggestions), ttl=86400)
+        await self.cache.aset_json(cache_key, suggestions, ttl=86400)
         return suggestions
     
+    async def get_autocomplete_batch(self, queries: List[str], location: str = None) -> Dict[str, List[str]]:
+        """Get autocomplete suggestions for many queries, fetching only uncached ones (concurrently)"""
+        keys = {query: f"autocomplete:{query}:{location}" for query in queries}
+        cached = await self.cache.aget_many_json(list(keys.values()))
+        results = {query: cached[key] for query, key in keys.items() if key in cached}
+        misses = [query for query in queries if query not in results]
+        
+        if misses:
+            print(f"[Scraper Agent] Getting autocomplete for {len(misses)} prefixes")
+            fetched = await self.brightdata.scrape_google_autocomplete_batch(misses, location)
+            await self.cache.aset_many_json({keys[query]: suggestions for query, suggestions in fetched.items()},
+                                            ttl=86400)
+            results.update(fetched)
+        
+        return results
+    
+    async def expand_autocomplete(self, seed: str, location: str = None) -> Dict[str, Any]:
+        """
+        Recursive prefix expansion (seed + letters, question words + seed)
+        deduped into a suggestion trie that keeps each suggestion's best rank
+        """
+        expander = AutocompleteExpander(
+            self.get_autocomplete_batch,
+            max_depth=Config.AUTOCOMPLETE_EXPANSION_DEPTH,
+            budget=Config.AUTOCOMPLETE_EXPANSION_BUDGET
+        )
+        trie, stats = await expander.expand(seed, location)
+        print(f"[Scraper Agent] Expanded '{seed}' into {stats['suggestions']} suggestions "
+              f"from {stats['prefixes']} prefixes")
+        return {'suggestions': trie.ranked(), 'stats': stats}
+    
     async def get_local_competitors(self, query: str, location: str) -> List[Dict[str, Any]]:
         """Get local competitors from Google Maps"""
         cache_key = f"local_competitors:{query}:{location}"
-        cached = self.cache.get(cache_key)
-        if cached:
-            return json.loads(cached)
+        cached = await self.cache.aget_json(cache_key)
+        if cached is not None:
+            return cached
         
         print(f"[Scraper Agent] Getting local competitors for: {query} in {location}")
         competitors = await self.brightdata.scrape_google_maps(query, location)
         
-        self.cache.set(cache_key, json.dumps(competitors), ttl=86400)
+        await self.cache.aset_json(cache_key, competitors, ttl=86400)
         return competitors
     
     async def scrape_competitor_site(self, url: str) -> Dict[str, Any]:
-        """Scrape a competitor's website"""
+        """
+        Scrape a competitor's website, re-crawling incrementally.
+        
+        Once the cached copy expires, a conditional HEAD decides whether the
+        page changed; if not (or if the re-scraped content fingerprint is the
+        same) the stored copy is reused and its cache TTL doubles, up to
+        COMPETITOR_SITE_MAX_TTL. Sites found to send no validators are
+        re-scraped without the HEAD until their meta expires.
+        """
         cache_key = f"competitor_site:{url}"
-        cached = self.cache.get(cache_key)
-        if cached:
-            return json.loads(cached)
-        
-        print(f"[Scraper Agent] Scraping competitor site: {url}")
-        site_data = await self.brightdata.scrape_competitor_site(url)
+        cached = await self.cache.aget_json(cache_key)
+        if cached is not None:
+            return cached
+        
+        meta_key = f"competitor_site_meta:{url}"
+        meta = await self.cache.aget_json(meta_key) or {}
+        
+        validators = None
+        if meta.get('etag') or meta.get('last_modified'):
+            validators = await self.brightdata.check_site_validators(url, meta.get('etag'), meta.get('last_modified'))
+        
+        if validators and validators['not_modified'] and meta.get('data'):
+            print(f"[Scraper Agent] Competitor site not modified: {url}")
+            site_data = meta['data']
+            unchanged = True
+        else:
+            print(f"[Scraper Agent] Scraping competitor site: {url}")
+            site_data = await self.brightdata.scrape_competitor_site(url)
+            if validators is None and not meta.get('no_validators'):
+                validators = await self.brightdata.check_site_validators(url)
+            unchanged = meta.get('fingerprint') == content_fingerprint(site_data)
+        
+        if validators is not None:
+            no_validators = not (validators.get('etag') or validators.get('last_modified'))
+        else:
+            # A failed HEAD says nothing about the site, keep what we knew
+            no_validators = bool(meta.get('no_validators'))
+        
+        ttl = min(meta.get('ttl', Config.CACHE_TTL) * 2, Config.COMPETITOR_SITE_MAX_TTL) if unchanged else Config.CACHE_TTL
+        meta = {
+            'etag': (validators or {}).get('etag'),
+            'last_modified': (validators or {}).get('last_modified'),
+            'no_validators': no_validators,
+            'fingerprint': content_fingerprint(site_data),
+            'ttl': ttl,
+            'data': site_data
+        }
         
-        self.cache.set(cache_key, json.dumps(site_data), ttl=86400)
+        await self.cache.aset_json(cache_key, site_data, ttl=ttl)
+        await self.cache.aset_json(meta_key, meta, ttl=Config.COMPETITOR_STORE_TTL)
         return site_data
     
     def _analyze_serp_features(self, serp_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -124,26 +214,36 @@ class ScraperAgent:
         return indicators
     
     async def batch_scrape_keywords(self, keywords: List[str], location: str) -> List[Dict[str, Any]]:
-        """Batch scrape multiple keywords for efficiency"""
-        tasks = []
-        for keyword in keywords:
-            task = self.scrape_serp(keyword, location)
-            tasks.append(task)
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        """Batch scrape multiple keywords, checking the cache for all of them in one round trip"""
+        keys = [f"serp:{keyword}:{location}" for keyword in keywords]
+        cached = await self.cache.aget_many_json(keys)
+        
+        # Scrape only the misses (each distinct keyword once)
+        misses = list(dict.fromkeys(kw for kw, key in zip(keywords, keys) if key not in cached))
+        scraped = await asyncio.gather(
+            *(self._scrape_serp_uncached(keyword, location) for keyword in misses),
+            return_exceptions=True
+        )
+        scraped = dict(zip(misses, scraped))
+        
+        await self.cache.aset_many_json({
+            f"serp:{keyword}:{location}": result
+            for keyword, result in scraped.items() if not isinstance(result, Exception)
+        }, ttl=86400)
         
         # Process results
         processed_results = []
-        for i, result in enumerate(results):
+        for keyword, key in zip(keywords, keys):
+            result = cached[key] if key in cached else scraped[keyword]
             if isinstance(result, Exception):
-                print(f"[Scraper Agent] Error scraping {keywords[i]}: {str(result)}")
+                print(f"[Scraper Agent] Error scraping {keyword}: {str(result)}")
                 processed_results.append({
-                    'keyword': keywords[i],
+                    'keyword': keyword,
                     'error': str(result)
                 })
             else:
                 processed_results.append({
-                    'keyword': keywords[i],
+                    'keyword': keyword,
                     'serp_data': result,
                     'volume_indicators': result.get('search_volume_indicators', {})
                 })
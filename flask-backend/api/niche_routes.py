@@ -1,8 +1,17 @@
 from flask import Blueprint, request, jsonify, Response
 from agents.lead_agent import LeadAgent
+from config.config import Config
+from utils.cache_manager import close_loop_clients
+from utils.analysis_export import SECTIONS, FORMATS, BULK_FIELDS, PARQUET_AVAILABLE, \
+    iter_rows, iter_bulk_rows, stream_export
+from utils import json_codec
+from utils.http_payload import parse_fields, make_etag, coded_etag, etag_variants, negotiate_encoding, encode_payload
+from utils.scrape_governor import BROWSER_GOVERNOR, HTTP_GOVERNOR, CLAUDE_GOVERNOR, work_class
 import asyncio
 import json
 import logging
+import os
+import threading
 from typing import Dict, Any
 
 logger = logging.getLogger(__name__)
@@ -10,8 +19,40 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 niche_bp = Blueprint('niche', __name__)
 
-# Initialize lead agent
-lead_agent = LeadAgent()
+# The lead agent (and the agents and clients under it) is built on first
+# use, not at import, so workers start fast
+_lead_agent = None
+_lead_agent_lock = threading.Lock()
+
+def get_lead_agent() -> LeadAgent:
+    """Process-wide LeadAgent, created on first call"""
+    global _lead_agent
+    with _lead_agent_lock:
+        if _lead_agent is None:
+            _lead_agent = LeadAgent()
+        return _lead_agent
+
+def _payload_response(raw: str, fields):
+    """
+    Analysis response with a strong ETag per content coding, 304 when
+    If-None-Match names any coding of it, optional field selection and
+    gzip/brotli by Accept-Encoding
+    """
+    etag = make_etag(raw, fields)
+    matched = next((tag for tag in etag_variants(etag) if tag in request.if_none_match), None)
+    if matched is not None:
+        # The client's copy is still current, whichever coding it was sent in
+        response = Response(status=304)
+        response.set_etag(matched)
+    else:
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+        body, encoding = encode_payload(raw, fields, etag, encoding)
+        response = Response(body, mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(coded_etag(etag, encoding))
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @niche_bp.route('/analyze', methods=['POST'])
 def analyze_niche():
@@ -22,9 +63,13 @@ def analyze_niche():
         "location": "Pelham Alabama",
         "options": {
             "radius": 40,
-            "surprise_me": true
+            "surprise_me": true,
+            "trace": true,
+            "profile": true
         }
     }
+    Query params: fields=keywords,opportunities (top-level sections to return)
+    Repeat reads of a cached analysis honor If-None-Match with 304
     """
     try:
         data = request.get_json()
@@ -40,6 +85,14 @@ def analyze_niche():
         
         options = data.get('options', {})
         
+        # Cached analyses are answered without touching the event loop,
+        # unless the caller asked for this run's timings or profile
+        fields = parse_fields(request.args.get('fields'))
+        run_only = options.get('trace') or options.get('profile')
+        cached = None if run_only else get_lead_agent().get_cached_json(query, location, options)
+        if cached:
+            return _payload_response(cached, fields)
+        
         logger.info(f"Starting analysis for: {query} in {location}")
         
         # Run async analysis
@@ -48,15 +101,13 @@ def analyze_niche():
         
         try:
             results = loop.run_until_complete(
-                lead_agent.analyze_niche(query, location, options)
+                get_lead_agent().analyze_niche(query, location, options)
             )
             
-            return jsonify({
-                'success': True,
-                'data': results
-            })
+            return _payload_response(json_codec.dumps(results), fields)
             
         finally:
+            loop.run_until_complete(close_loop_clients())
             loop.close()
             
     except Exception as e:
@@ -66,6 +117,29 @@ def analyze_niche():
             'error': str(e)
         }), 500
 
+@niche_bp.route('/analysis/<analysis_id>', methods=['GET'])
+def get_analysis(analysis_id):
+    """
+    Stored analysis by ID, for dashboards polling a finished analysis
+    Query params: fields=keywords,opportunities
+    """
+    cached = get_lead_agent().get_analysis_json(analysis_id)
+    if not cached:
+        return jsonify({'error': 'Analysis not found'}), 404
+    return _payload_response(cached, parse_fields(request.args.get('fields')))
+
+@niche_bp.route('/profile/<analysis_id>', methods=['GET'])
+def get_profile(analysis_id):
+    """
+    Stack-sampling profile of a profiled analysis as folded stacks
+    (flamegraph.pl, inferno, speedscope)
+    """
+    folded = get_lead_agent().get_profile(analysis_id)
+    if not folded:
+        return jsonify({'error': 'Profile not found'}), 404
+    return Response(folded, mimetype='text/plain',
+                    headers={'Content-Disposition': f'inline; filename="{analysis_id}.folded"'})
+
 @niche_bp.route('/analyze/stream', methods=['POST'])
 def analyze_niche_stream():
     """
@@ -87,32 +161,41 @@ def analyze_niche_stream():
             """Generator for SSE streaming"""
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
+            analysis = None
             
             try:
                 # Send initial message
                 yield f"data: {json.dumps({'status': 'started', 'message': 'Analysis started'})}\n\n"
                 
-                # Geographic analysis
-                yield f"data: {json.dumps({'status': 'processing', 'step': 'geographic', 'message': 'Analyzing location data...'})}\n\n"
-                
-                # Keyword discovery
-                yield f"data: {json.dumps({'status': 'processing', 'step': 'keywords', 'message': 'Discovering keywords...'})}\n\n"
-                
-                # Competitor analysis
-                yield f"data: {json.dumps({'status': 'processing', 'step': 'competitors', 'message': 'Analyzing competitors...'})}\n\n"
-                
-                # Run actual analysis
-                results = loop.run_until_complete(
-                    lead_agent.analyze_niche(query, location, data.get('options', {}))
+                # Run the analysis on this thread's loop, relaying its progress
+                # events (steps, surprise opportunities as they're ranked) in between
+                events = asyncio.Queue()
+                analysis = loop.create_task(
+                    get_lead_agent().analyze_niche(query, location, data.get('options', {}), progress=events.put_nowait)
                 )
+                while True:
+                    next_event = loop.create_task(events.get())
+                    loop.run_until_complete(asyncio.wait({analysis, next_event}, return_when=asyncio.FIRST_COMPLETED))
+                    if not next_event.done():
+                        next_event.cancel()
+                        break
+                    yield f"data: {json_codec.dumps(next_event.result())}\n\n"
+                while not events.empty():
+                    yield f"data: {json_codec.dumps(events.get_nowait())}\n\n"
+                results = analysis.result()
                 
                 # Send final results
-                yield f"data: {json.dumps({'status': 'completed', 'results': results})}\n\n"
+                yield f"data: {json_codec.dumps({'status': 'completed', 'results': results})}\n\n"
                 
             except Exception as e:
                 yield f"data: {json.dumps({'status': 'error', 'error': str(e)})}\n\n"
                 
             finally:
+                if analysis is not None and not analysis.done():
+                    # Client went away mid-analysis
+                    analysis.cancel()
+                    loop.run_until_complete(asyncio.gather(analysis, return_exceptions=True))
+                loop.run_until_complete(close_loop_clients())
                 loop.close()
         
         return Response(
@@ -148,10 +231,12 @@ def get_autocomplete():
         asyncio.set_event_loop(loop)
         
         try:
-            scraper = lead_agent.scraper_agent
-            suggestions = loop.run_until_complete(
-                scraper.get_autocomplete_suggestions(query, location)
-            )
+            scraper = get_lead_agent().scraper_agent
+            # Dashboard lookups go ahead of analyses in the scrape queues
+            with work_class('interactive'):
+                suggestions = loop.run_until_complete(
+                    scraper.get_autocomplete_suggestions(query, location)
+                )
             
             return jsonify({
                 'success': True,
@@ -159,6 +244,7 @@ def get_autocomplete():
             })
             
         finally:
+            loop.run_until_complete(close_loop_clients())
             loop.close()
             
     except Exception as e:
@@ -185,10 +271,12 @@ def get_local_competitors():
         asyncio.set_event_loop(loop)
         
         try:
-            scraper = lead_agent.scraper_agent
-            competitors = loop.run_until_complete(
-                scraper.get_local_competitors(query, location)
-            )
+            scraper = get_lead_agent().scraper_agent
+            # Dashboard lookups go ahead of analyses in the scrape queues
+            with work_class('interactive'):
+                competitors = loop.run_until_complete(
+                    scraper.get_local_competitors(query, location)
+                )
             
             return jsonify({
                 'success': True,
@@ -196,6 +284,7 @@ def get_local_competitors():
             })
             
         finally:
+            loop.run_until_complete(close_loop_clients())
             loop.close()
             
     except Exception as e:
@@ -205,6 +294,71 @@ def get_local_competitors():
             'error': str(e)
         }), 500
 
+@niche_bp.route('/stats/scraping', methods=['GET'])
+def get_scraping_stats():
+    """
+    Browser session counts, latency and transferred bytes by scrape type
+    (for the worker process that answers; /metrics covers all workers)
+    """
+    return jsonify({
+        'success': True,
+        'worker': os.getpid(),
+        'resource_blocking': Config.SCRAPE_BLOCK_RESOURCES,
+        'stats': get_lead_agent().scraper_agent.brightdata.get_stats(),
+        'queues': {governor.name: governor.snapshot()
+                   for governor in (BROWSER_GOVERNOR, HTTP_GOVERNOR, CLAUDE_GOVERNOR)}
+    })
+
+@niche_bp.route('/serp-history', methods=['GET'])
+def get_serp_history():
+    """
+    Stored SERP rankings, no scraping
+    Query params: domain=example.com (position history of a domain), or
+    keyword=...&location=... (snapshots of one SERP); optional since=YYYY-MM-DD
+    and kind=organic|ad|local
+    """
+    store = get_lead_agent().scraper_agent.serp_history
+    if store is None:
+        return jsonify({'error': 'SERP history is disabled'}), 404
+    
+    domain = request.args.get('domain')
+    keyword = request.args.get('keyword')
+    location = request.args.get('location')
+    since = request.args.get('since')
+    kind = request.args.get('kind', 'organic')
+    
+    if domain:
+        history = store.domain_history(domain, keyword, location, since, kind)
+    elif keyword and location:
+        history = store.keyword_history(keyword, location, since, kind)
+    else:
+        return jsonify({'error': 'domain, or keyword and location, are required'}), 400
+    
+    return jsonify({'success': True, 'history': history})
+
+
+
+def _export_response(rows, fields, fmt: str, filename: str):
+    """Streamed export response in the requested format"""
+    mimetype, extension = FORMATS[fmt]
+    return Response(
+        stream_export(rows, fields, fmt),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}.{extension}'
+        }
+    )
+
+def _export_params(section: str, fmt: str):
+    """Validation error response for export parameters, or None"""
+    if section not in SECTIONS:
+        return jsonify({'error': f"Unknown section, expected one of {sorted(SECTIONS)}"}), 400
+    if fmt not in FORMATS:
+        return jsonify({'error': f"Unknown format, expected one of {sorted(FORMATS)}"}), 400
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        return jsonify({'error': 'Parquet export requires pyarrow'}), 501
+    return None
+
 @niche_bp.route('/export/csv', methods=['POST'])
 def export_csv():
     """
@@ -217,39 +371,70 @@ def export_csv():
         if not results:
             return jsonify({'error': 'No results to export'}), 400
         
-        # Create CSV content
-        import csv
-        import io
-        
-        output = io.StringIO()
-        
-        # Export keywords
-        if 'keywords' in results and 'all_keywords' in results['keywords']:
-            writer = csv.DictWriter(output, fieldnames=['keyword', 'type', 'intent', 'search_volume_score', 'competition'])
-            writer.writeheader()
-            
-            for kw in results['keywords']['all_keywords']:
-                writer.writerow({
-                    'keyword': kw.get('keyword', ''),
-                    'type': kw.get('type', ''),
-                    'intent': kw.get('intent', ''),
-                    'search_volume_score': kw.get('search_volume_score', 0),
-                    'competition': kw.get('competition', 'unknown')
-                })
-        
-        # Return CSV file
-        output.seek(0)
-        return Response(
-            output.getvalue(),
-            mimetype='text/csv',
-            headers={
-                'Content-Disposition': 'attachment; filename=niche_analysis.csv'
-            }
-        )
+        return _export_response(iter_rows(results, 'keywords'), SECTIONS['keywords'][0], 'csv', 'niche_analysis')
         
     except Exception as e:
         logger.error(f"Error in export_csv: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@niche_bp.route('/export/<analysis_id>', methods=['GET'])
+def export_analysis(analysis_id):
+    """
+    Stream one section of a stored analysis
+    Query params: section=keywords|competitors|opportunities, format=csv|ndjson|parquet
+    """
+    section = request.args.get('section', 'keywords')
+    fmt = request.args.get('format', 'csv')
+    error = _export_params(section, fmt)
+    if error:
+        return error
+    
+    results = get_lead_agent().get_analysis(analysis_id)
+    if results is None:
+        return jsonify({'error': 'Analysis not found'}), 404
+    
+    return _export_response(iter_rows(results, section), SECTIONS[section][0], fmt,
+                            f"niche_analysis_{analysis_id}_{section}")
+
+@niche_bp.route('/export/bulk', methods=['POST'])
+def export_bulk():
+    """
+    Stream one section across many stored analyses (e.g. one per location)
+    Expects: {"analysis_ids": [...], "section": "keywords", "format": "ndjson"}
+    """
+    data = request.get_json() or {}
+    analysis_ids = data.get('analysis_ids') or []
+    section = data.get('section', 'keywords')
+    fmt = data.get('format', 'csv')
+    
+    if not analysis_ids:
+        return jsonify({'error': 'analysis_ids is required'}), 400
+    error = _export_params(section, fmt)
+    if error:
+        return error
+    
+    lead_agent = get_lead_agent()
+    found = lead_agent.cache.exists_many([f"analysis_result:{aid}" for aid in analysis_ids])
+    missing = [aid for aid in analysis_ids if not found.get(f"analysis_result:{aid}")]
+    if missing:
+        return jsonify({'error': 'Analyses not found', 'analysis_ids': missing}), 404
+    
+    # Analyses are loaded one at a time while streaming
+    analyses = (lead_agent.get_analysis(aid) or {} for aid in analysis_ids)
+    return _export_response(iter_bulk_rows(analyses, section), BULK_FIELDS + SECTIONS[section][0], fmt,
+                            f"niche_analysis_bulk_{section}")
+
+@niche_bp.route('/stats/cache', methods=['GET'])
+def get_cache_stats():
+    """
+    Cache backend, Redis circuit breaker state, latency and fallback counts
+    (for the worker process that answers; /metrics covers all workers)
+    """
+    return jsonify({
+        'success': True,
+        'worker': os.getpid(),
+        'stats': get_lead_agent().cache.get_metrics()
+    })
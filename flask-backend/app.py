@@ -1,9 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from config.config import Config
-from api.niche_routes import niche_bp
+from api.niche_routes import niche_bp, get_lead_agent
+from utils.json_codec import FastJSONProvider
+from utils import metrics
+import gc
+import importlib
+import importlib.util
 import logging
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,17 +17,34 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config.from_object(Config)
 
 # Enable CORS
 CORS(app, origins=["http://localhost:3000", "http://localhost:3001"])
 
-# Initialize SocketIO for real-time updates
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Initialize SocketIO for real-time updates; with several workers, events
+# go through the message queue so they reach clients connected to any worker
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading',
+                    message_queue=Config.SOCKETIO_MESSAGE_QUEUE)
 
 # Register blueprints
 app.register_blueprint(niche_bp, url_prefix='/api/niche')
 
+# Request latency per route for /metrics
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=request.method,
+                                              route=route, status=response.status_code)
+    return response
+
 # Health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -31,6 +54,11 @@ def health_check():
         'version': '1.0.0'
     })
 
+# Prometheus scrape endpoint
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 # WebSocket events for progress updates
 @socketio.on('connect')
 def handle_connect():
@@ -47,6 +75,27 @@ def handle_start_analysis(data):
     logger.info(f"Starting analysis: {data}")
     emit('analysis_started', {'status': 'processing', 'message': 'Analysis started'})
 
+# Modules deferred to first use; warm_up() loads them ahead of traffic
+WARM_UP_MODULES = ('anthropic', 'pandas', 'selenium.webdriver', 'geopy.geocoders', 'geopy.distance',
+                   'aiohttp', 'pyarrow.parquet')
+
+def warm_up():
+    """
+    Load deferred modules and build the agents before serving.
+
+    Call once in the master before forking workers (gunicorn preload_app),
+    so workers share the imported code copy-on-write; gc.freeze() keeps the
+    collector from touching (and so copying) those pages after the fork.
+    """
+    start = time.perf_counter()
+    for name in WARM_UP_MODULES:
+        if importlib.util.find_spec(name.split('.')[0]) is not None:
+            importlib.import_module(name)
+    get_lead_agent()
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
@@ -58,4 +107,5 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
+    # Development server; production runs under gunicorn (see gunicorn.conf.py)
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
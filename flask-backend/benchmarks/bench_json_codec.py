@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: stdlib json vs the json_codec backend on a niche_analysis
+payload shaped like LeadAgent.analyze_niche output.
+
+Run from flask-backend/:
+    python -m benchmarks.bench_json_codec [n_keywords] [n_competitors]
+"""
+import json
+import random
+import sys
+import time
+
+from utils import json_codec
+from benchmarks.bench_keyword_scoring import make_keywords, make_serps, timed
+
+
+def make_competitor(i, rng):
+    return {
+        'name': f"Competitor {i} Heating & Air",
+        'url': f"https://competitor{i}.example.com",
+        'type': rng.choice(['local', 'organic']),
+        'local_data': {'rating': round(rng.uniform(3, 5), 1), 'reviews_count': str(rng.randint(5, 900)),
+                       'category': 'HVAC contractor'},
+        'seo_data': {
+            'url': f"https://competitor{i}.example.com",
+            'title': f"Competitor {i} | AC Repair & Heating Service",
+            'h1_tags': [f"Trusted HVAC Service {i}"],
+            'h2_tags': [f"Service area {j}" for j in range(rng.randint(3, 15))],
+            'meta_description': 'Fast, friendly heating and cooling service. ' * 3,
+            'schema_types': ['LocalBusiness', 'HVACBusiness'],
+            'internal_links': [{'url': f"https://competitor{i}.example.com/page-{j}",
+                                'anchor_text': f"Page {j}"} for j in range(50)],
+            'images_alt_text': []
+        },
+        'keywords': [f"hvac keyword {j}" for j in range(20)],
+        'content_strategy': {'service_focus': ['ac repair', 'furnace install'],
+                             'value_propositions': ['24/7 service'], 'content_gaps': ['financing']},
+        'strengths': ['Strong local presence', 'Good schema markup'],
+        'weaknesses': ['Thin service pages']
+    }
+
+
+def make_analysis(n_keywords, n_competitors, rng):
+    keywords = make_keywords(n_keywords, rng)
+    return {
+        'analysis_id': '0123456789abcdef',
+        'query': 'hvac repair',
+        'location': 'Pelham Alabama',
+        'timestamp': 12345.678,
+        'geographic_data': {'primary_location': 'Pelham Alabama', 'nearby_cities': [f"City {i}" for i in range(30)]},
+        'keywords': {'all_keywords': keywords, 'primary_keywords': keywords[:20],
+                     'serp_data': make_serps(20, rng)},
+        'competitors': {'local': [make_competitor(i, rng)['local_data'] for i in range(5)],
+                        'organic': [{'title': f"Result {i}", 'url': f"https://r{i}.example.com", 'position': i}
+                                    for i in range(5)],
+                        'detailed_analysis': [make_competitor(i, rng) for i in range(n_competitors)]},
+        'opportunities': {'keyword_gaps': keywords[:50], 'low_competition': keywords[50:60]},
+        'recommendations': {'immediate_actions': [{'action': 'Target emergency keywords', 'priority': 'high',
+                                                   'keywords': keywords[:5]}]}
+    }
+
+
+def main(n_keywords, n_competitors):
+    """Round-trip check, then dumps/loads timings for both backends"""
+    payload = make_analysis(n_keywords, n_competitors, random.Random(42))
+    text = json.dumps(payload)
+    assert json_codec.loads(json_codec.dumps(payload)) == payload, "round trip differs"
+    assert json_codec.loads(text) == json.loads(text), "stdlib text decodes differently"
+    print(f"backend={json_codec.BACKEND}  payload {len(text) / 1024:.0f} KB  "
+          f"({n_keywords} keywords, {n_competitors} competitors)")
+
+    t_std, _ = timed(lambda: json.dumps(payload), repeat=20)
+    t_fast, _ = timed(lambda: json_codec.dumps(payload), repeat=20)
+    print(f"dumps   stdlib {t_std * 1000:8.2f} ms  codec {t_fast * 1000:8.2f} ms  x{t_std / t_fast:.1f}")
+
+    t_std, _ = timed(lambda: json.loads(text), repeat=20)
+    t_fast, _ = timed(lambda: json_codec.loads(text), repeat=20)
+    print(f"loads   stdlib {t_std * 1000:8.2f} ms  codec {t_fast * 1000:8.2f} ms  x{t_std / t_fast:.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 10)
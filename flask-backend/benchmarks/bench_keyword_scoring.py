@@ -0,0 +1,97 @@
+"""
+Micro-benchmark: per-dict keyword scoring vs the columnar KeywordTable.
+
+Run from flask-backend/:
+    python -m benchmarks.bench_keyword_scoring [n_keywords]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from agents.keyword_agent import KeywordAgent
+from utils.keyword_table import KeywordTable, MISSING
+
+TYPES = ['primary', 'autocomplete', 'emergency', 'commercial', 'ai_suggested']
+INTENTS = ['urgent', 'commercial', 'high', None]
+COMPETITION = ['low', 'medium', 'high', 'unknown']
+TERMS = ['emergency', '24/7', 'repair', 'cost', 'near me', 'today', 'install']
+
+
+def make_keywords(n, rng):
+    keywords = []
+    for i in range(n):
+        kw = {
+            'keyword': f"{rng.choice(TERMS)} hvac {rng.choice(TERMS)} city {i}",
+            'type': rng.choice(TYPES),
+            'search_volume_score': rng.randint(0, 9)
+        }
+        if rng.random() < 0.8:
+            kw['intent'] = rng.choice(INTENTS)
+        if rng.random() < 0.8:
+            kw['competition'] = rng.choice(COMPETITION)
+        keywords.append(kw)
+    return keywords
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(n):
+    """Compare outputs and timings; table timings exclude the shared build"""
+    rng = random.Random(42)
+    keywords = make_keywords(n, rng)
+
+    # The per-dict method does not touch instance state
+    calculate_keyword_value = KeywordAgent.calculate_keyword_value.__get__(object())
+
+    # Building the table is the one Python-level pass; report it separately
+    t_build, table = timed(lambda: KeywordTable(keywords))
+    print(f"table build     n={n:>7}  {t_build * 1000:8.2f} ms")
+
+    t_dict, dict_scores = timed(lambda: [calculate_keyword_value(kw) for kw in keywords])
+    t_table, table_scores = timed(lambda: table.value_scores().tolist())
+    assert dict_scores == table_scores, "keyword value scores differ"
+    print(f"keyword value   n={n:>7}  per-dict {t_dict * 1000:8.2f} ms  table {t_table * 1000:8.2f} ms  "
+          f"x{t_dict / t_table:.1f}")
+
+    competitor_keywords = {kw['keyword'] for kw in keywords[::7]}
+    emergency_terms = ['emergency', '24/7', 'urgent', 'now', 'today']
+
+    def dict_opportunities():
+        # The per-dict scans LeadAgent._identify_opportunities used to run
+        gaps = [kw for kw in keywords
+                if kw['keyword'] not in competitor_keywords and kw.get('intent') == 'commercial']
+        emergency = [kw for kw in keywords
+                     if any(term in kw['keyword'].lower() for term in emergency_terms)
+                     and kw.get('competition', 'high') != 'high']
+        low_comp = [kw for kw in keywords if kw.get('competition') == 'low']
+        top = sorted(low_comp, key=lambda x: x.get('search_volume_score', 0), reverse=True)[:10]
+        return gaps, emergency, top
+
+    def table_opportunities():
+        gaps = table.rows(np.flatnonzero(table.not_in(competitor_keywords) & table.intent.eq('commercial')))
+        emergency_mask = table.contains_any(emergency_terms)
+        emergency_mask &= ~table.competition.eq('high') & ~table.competition.eq(MISSING)
+        emergency = table.rows(np.flatnonzero(emergency_mask))
+        top = table.top_k(table.competition.eq('low'), 10)
+        return gaps, emergency, top
+
+    t_dict, dict_result = timed(dict_opportunities)
+    t_table, table_result = timed(table_opportunities)
+    assert dict_result == table_result, "opportunity filters differ"
+    print(f"opportunities   n={n:>7}  per-dict {t_dict * 1000:8.2f} ms  table {t_table * 1000:8.2f} ms  "
+          f"x{t_dict / t_table:.1f}")
+
+if __name__ == '__main__':
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [1000, 10000, 100000]
+    for size in sizes:
+        main(size)
@@ -0,0 +1,92 @@
+"""
+Cold-start benchmark: each measurement runs in a fresh interpreter.
+
+  import      - `import app` (what every worker, test run and CLI pays)
+  warm_up     - import plus app.warm_up() (what a preloading master pays once)
+  first_req   - import, then /health and the first agent-backed route
+                (/api/niche/stats/scraping builds the LeadAgent)
+
+Run from flask-backend/:
+    python -m benchmarks.bench_startup [runs] [--importtime N]
+
+--importtime N also lists the N slowest modules under `python -X importtime`.
+"""
+import json
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = {
+    'import': """
+import time
+start = time.perf_counter()
+import app
+print(json.dumps({'import': time.perf_counter() - start}))
+""",
+    'warm_up': """
+import time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.warm_up()
+print(json.dumps({'import': imported - start, 'warm_up': time.perf_counter() - imported}))
+""",
+    'first_req': """
+import time
+start = time.perf_counter()
+import app
+client = app.app.test_client()
+imported = time.perf_counter()
+client.get('/health')
+health = time.perf_counter()
+client.get('/api/niche/stats/scraping')
+print(json.dumps({'import': imported - start, 'health': health - imported,
+                  'agent_route': time.perf_counter() - health}))
+"""
+}
+
+
+def run_scenario(code):
+    out = subprocess.run([sys.executable, '-c', 'import json\n' + code], capture_output=True,
+                         text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(n):
+    """(cumulative_us, module) for the n slowest top-level imports under app"""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main():
+    args = sys.argv[1:]
+    top = 0
+    if '--importtime' in args:
+        i = args.index('--importtime')
+        top = int(args[i + 1])
+        del args[i:i + 2]
+    runs = int(args[0]) if args else 5
+
+    print(f"{'scenario':<10} {'phase':<12} {'median_s':>9} {'min_s':>7} {'max_s':>7}")
+    for name, code in SCENARIOS.items():
+        results = [run_scenario(code) for _ in range(runs)]
+        for phase in results[0]:
+            values = [r[phase] for r in results]
+            print(f"{name:<10} {phase:<12} {statistics.median(values):>9.3f} "
+                  f"{min(values):>7.3f} {max(values):>7.3f}")
+
+    if top:
+        print(f"\nSlowest imports (cumulative ms):")
+        for cumulative, module in slowest_imports(top):
+            print(f"{cumulative / 1000:>8.1f}  {module}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Deterministic fixtures for the offline benchmark server.
+
+Each page fixture is the payload the in-page extraction script would return
+for that page (see utils/dom_extraction.py), so the scrapers' downstream
+parsing runs on realistic data. Sizes follow what live pages typically
+return: 10 organic results, 0-4 ads, a 0-3 business local pack, 20 Maps
+results and competitor pages with 5-15 H2s and 50 internal links.
+"""
+import hashlib
+import json
+import re
+from typing import Dict, Any, List
+
+SUGGESTION_WORDS = ['near me', 'cost', 'prices', 'emergency', 'company', 'services', 'reviews',
+                    'installation', 'replacement', 'repair', 'maintenance', 'contractors']
+RELATED_SERVICES = [
+    'furnace maintenance', 'AC installation', 'duct cleaning', 'heat pump repair', 'thermostat installation',
+    'mini split installation', 'indoor air quality testing', 'dryer vent cleaning', 'boiler repair',
+    'water heater repair', 'tankless water heater installation', 'attic insulation', 'attic fan installation',
+    'dehumidifier installation', 'air purifier installation', 'ductwork replacement', 'furnace installation',
+    'AC tune up', 'heat pump installation', 'geothermal heating', 'radiant floor heating', 'gas line repair',
+    'carbon monoxide detector installation', 'humidifier installation', 'zoning system installation',
+    'commercial hvac maintenance', 'refrigerant recharge', 'condenser coil cleaning', 'blower motor repair',
+    'smart home climate control', 'crawl space encapsulation', 'whole house fan installation',
+    'emergency furnace repair', 'window ac installation', 'evaporative cooler repair', 'chimney inspection',
+    'fireplace repair', 'pool heater repair', 'generator installation', 'electrical panel upgrade',
+    'plumbing leak detection', 'sump pump installation', 'mold remediation', 'home energy audit',
+    'solar attic fan installation', 'uv light installation hvac', 'hvac maintenance plan',
+    'ductless heating repair', 'air handler replacement', 'heat exchanger repair'
+]
+SERVICE_AREAS = ['Pelham', 'Alabaster', 'Helena', 'Hoover', 'Chelsea', 'Calera', 'Montevallo',
+                 'Vestavia Hills', 'Homewood', 'Indian Springs', 'Birmingham', 'Columbiana']
+
+
+def _seed(*parts: str) -> int:
+    return int(hashlib.sha256('|'.join(parts).encode()).hexdigest()[:8], 16)
+
+
+def slugify(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def serp_payload(query: str, site_bases: List[str]) -> Dict[str, Any]:
+    """SERP_EXTRACTION_SCRIPT result for a query; results link to stub sites on distinct hosts"""
+    seed = _seed('serp', query)
+    slug = slugify(query)[:40]
+    return {
+        'organic_results': [{
+            'title': f"{query.title()} | Result {i + 1}",
+            'url': f"{site_bases[(seed + i) % len(site_bases)]}/{slug}-{(seed + i) % 40}",
+            'snippet': f"Top rated {query} with upfront pricing and same day service. " * 2,
+            'position': i + 1
+        } for i in range(10)],
+        'ads': [{'title': f"Ad {i} for {query}", 'url': f"{site_bases[0]}/ad-{i}",
+                 'description': 'Call now for a free estimate.'} for i in range(seed % 5)],
+        'local_pack': [{'name': f"Local Business {i}", 'position': i + 1} for i in range(seed % 4)],
+        'people_also_ask': [f"How much does {query} cost?", f"Is {query} worth it?",
+                            f"How long does {query} take?", f"Who does {query} near me?"][:seed % 5],
+        'related_searches': [f"{query} {word}" for word in SUGGESTION_WORDS[:8]],
+        'people_also_search_for': [],
+        'featured_snippet': None,
+        'knowledge_panel': None
+    }
+
+
+def autocomplete_payload(query: str) -> List[Any]:
+    """Suggestion endpoint response: [query, [suggestions]]"""
+    seed = _seed('autocomplete', query)
+    # The bare seed and single-letter completions saturate at 10 suggestions;
+    # longer prefixes and question forms thin out
+    words = query.split()
+    count = 10 if len(words) <= 4 or len(words[-1]) == 1 else seed % 6
+    words = SUGGESTION_WORDS[seed % 4:] + SUGGESTION_WORDS[:seed % 4]
+    return [query, [f"{query} {words[i % len(words)]}".strip() for i in range(count)]]
+
+
+def maps_payload(query: str, location: str) -> List[Dict[str, Any]]:
+    """MAPS_EXTRACTION_SCRIPT result for a Maps search"""
+    seed = _seed('maps', query, location)
+    return [{
+        'name': f"{location.split()[0]} {query.title()} Pros {i + 1}",
+        'rating_label': f"{3.5 + ((seed + i) % 15) / 10:.1f} stars",
+        'reviews_text': f"({(seed + i * 37) % 900 + 5})"
+    } for i in range(20)]
+
+
+def competitor_payload(slug: str, site_base: str) -> Dict[str, Any]:
+    """COMPETITOR_EXTRACTION_SCRIPT result for a competitor page"""
+    seed = _seed('site', slug)
+    service = slug.rsplit('-', 1)[0].replace('-', ' ')
+    return {
+        'title': f"{service.title()} | Licensed & Insured | Site {slug}",
+        'h1_tags': [f"Trusted {service.title()} Experts"],
+        'h2_tags': [f"{service.title()} in {SERVICE_AREAS[(seed + i) % len(SERVICE_AREAS)]}"
+                    for i in range(5 + seed % 11)],
+        'meta_description': f"Fast, friendly {service} with upfront pricing. Call today for same day service.",
+        'schema_scripts': [json.dumps({'@context': 'https://schema.org', '@type': 'LocalBusiness'})],
+        'internal_links': [{'url': f"{site_base}/{slug}/page-{i}", 'anchor_text': f"Page {i}"}
+                           for i in range(50)]
+    }
+
+
+def geocode_payload(query: str) -> List[Dict[str, Any]]:
+    """Nominatim /search response"""
+    seed = _seed('geo', query)
+    town = query.split()[0] if query else 'Pelham'
+    return [{
+        'place_id': seed, 'lat': f"{33.2 + (seed % 100) / 1000:.6f}", 'lon': f"{-86.8 - (seed % 50) / 1000:.6f}",
+        'display_name': f"{query}, United States", 'class': 'place', 'type': 'town',
+        'address': {'town': town, 'county': 'Shelby County', 'state': 'Alabama', 'postcode': '35124',
+                    'country': 'United States', 'country_code': 'us'}
+    }]
+
+
+def reverse_payload(lat: str, lon: str) -> Dict[str, Any]:
+    """Nominatim /reverse response"""
+    seed = _seed('reverse', lat, lon)
+    return {
+        'place_id': seed, 'lat': lat, 'lon': lon, 'display_name': 'Alabama, United States',
+        'address': {'town': SERVICE_AREAS[seed % len(SERVICE_AREAS)], 'state': 'Alabama',
+                    'country': 'United States', 'country_code': 'us'}
+    }
+
+
+def llm_text(prompt: str) -> str:
+    """Canned model output shaped like what each prompt asks for"""
+    if 'Format as JSON' in prompt:
+        return json.dumps({
+            'keywords': ['ac repair', 'furnace repair', 'hvac installation', 'heat pump service',
+                         'emergency hvac', 'duct cleaning'],
+            'service_focus': ['repair', 'installation', 'maintenance'],
+            'value_propositions': ['24/7 service', 'upfront pricing', 'licensed technicians'],
+            'content_gaps': ['financing options', 'service area pages', 'maintenance plans']
+        })
+    if 'related services' in prompt:
+        count = re.search(r'list (\d+) closely related services', prompt)
+        count = int(count.group(1)) if count else 5
+        return '\n'.join(f"{i + 1}. {service}" for i, service in enumerate(RELATED_SERVICES[:count]))
+    return '\n'.join([f"worried about broken air conditioner {i} near me" for i in range(10)])
+
+
+def html_page(title: str, extraction: Any, padding_kb: int) -> str:
+    """HTML document carrying the extraction payload, padded to a realistic size"""
+    padding = '<p>' + ('Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 18) + '</p>\n'
+    body = padding * max(0, padding_kb)
+    return (f"<!doctype html><html><head><title>{title}</title>"
+            f"<script type=\"application/json\" id=\"stub-extraction\">{json.dumps(extraction)}</script>"
+            f"</head><body><h1>{title}</h1>{body}</body></html>")
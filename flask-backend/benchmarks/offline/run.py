@@ -0,0 +1,330 @@
+"""
+End-to-end offline benchmark for LeadAgent.analyze_niche and keyword batches.
+
+Starts the stub server, points every upstream setting at it (Google, the
+autocomplete endpoint, competitor sites, Nominatim, Anthropic), uses a
+throwaway file cache, then runs the scenarios:
+
+  single      one cold analysis through POST /api/niche/analyze, then warm repeats
+  concurrent  distinct cold analyses from parallel request threads
+  bulk        ScraperAgent.batch_scrape_keywords over a keyword batch, cold then warm
+  interactive /competitors/local and /keywords/autocomplete latency while
+              the concurrent analyses run (compare INTERACTIVE_RESERVED_*=0)
+  workers     the concurrent load over HTTP against gunicorn with 1, 2, 4...
+              worker processes (--workers), each run on a fresh cache
+
+Each scenario reports p50/p95 latency, throughput, upstream request counts
+by endpoint and the cache hit rate (in-process scenarios only).
+
+Run from flask-backend/:
+    python -m benchmarks.offline.run [--scenario all] [--latency-scale 0.2] [--json out.json]
+
+--browser chrome drives a real Chrome against the stub server instead of
+the HTTP stand-in driver (needs Chrome and chromedriver installed).
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple, Callable
+
+from benchmarks.offline.stub_server import StubServer, DEFAULT_LATENCY_MS
+
+LOCATIONS = ['Pelham Alabama', 'Hoover Alabama', 'Helena Alabama', 'Alabaster Alabama',
+             'Chelsea Alabama', 'Calera Alabama', 'Homewood Alabama', 'Vestavia Hills Alabama']
+SERVICES = ['hvac repair', 'plumber', 'roof repair', 'electrician', 'water heater installation',
+            'garage door repair', 'pest control', 'tree removal']
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def configure_environment(server: StubServer, cache_dir: str, use_redis: bool):
+    """Point every upstream at the stub server; must run before app modules are imported"""
+    host = server.base_url.split('://', 1)[1]
+    os.environ.update({
+        'GOOGLE_BASE_URL': f"{server.base_url}/google",
+        'AUTOCOMPLETE_ENDPOINT': f"{server.base_url}/google/complete/search",
+        'ANTHROPIC_BASE_URL': f"{server.base_url}/anthropic",
+        'ANTHROPIC_API_KEY': 'offline-benchmark',
+        'NOMINATIM_DOMAIN': f"{host}/nominatim",
+        'NOMINATIM_SCHEME': 'http',
+        'BRIGHTDATA_HOST': '',
+        'CACHE_DIR': cache_dir,
+        # Synthetic SERPs must not land in the real rank history
+        'SERP_HISTORY_DB': os.path.join(cache_dir, 'serp_history.sqlite3')
+    })
+    if not use_redis:
+        # Unroutable port: the cache starts on the file tier without waiting on a connect
+        os.environ['REDIS_URL'] = 'redis://127.0.0.1:1/0'
+
+
+class Measurement:
+    """Latency samples plus upstream and cache counter deltas for one scenario"""
+
+    def __init__(self, name: str, server: StubServer, cache):
+        self.name = name
+        self.server = server
+        self.cache = cache
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def __enter__(self):
+        self.upstream_before = self.server.snapshot()
+        # No cache when the app runs in other processes
+        self.lookups_before = self.cache.get_metrics()['lookups'] if self.cache else None
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        upstream_after = self.server.snapshot()
+        self.upstream = {k: upstream_after[k] - self.upstream_before.get(k, 0) for k in upstream_after}
+        self.cache_hit_rate = None
+        if self.cache:
+            lookups_after = self.cache.get_metrics()['lookups']
+            hits = lookups_after['hits'] - self.lookups_before['hits']
+            misses = lookups_after['misses'] - self.lookups_before['misses']
+            self.cache_hit_rate = hits / (hits + misses) if hits + misses else 0.0
+
+    def timed(self, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn()
+        except Exception as e:
+            self.errors += 1
+            print(f"[Benchmark] {self.name} call failed: {str(e)}")
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'scenario': self.name,
+            'calls': len(self.latencies),
+            'errors': self.errors,
+            'p50_ms': round(percentile(self.latencies, 0.50) * 1000, 1),
+            'p95_ms': round(percentile(self.latencies, 0.95) * 1000, 1),
+            'throughput_per_s': round(len(self.latencies) / self.elapsed, 3) if self.elapsed else 0.0,
+            'wall_s': round(self.elapsed, 2),
+            'upstream_requests': {k: v for k, v in self.upstream.items() if v},
+            'cache_hit_rate': None if self.cache_hit_rate is None else round(self.cache_hit_rate, 3)
+        }
+
+
+def analyze_call(client, query: str, location: str, options: Dict[str, Any]) -> Callable[[], Any]:
+    def call():
+        response = client.post('/api/niche/analyze', json={'query': query, 'location': location, 'options': options})
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return response
+    return call
+
+
+def scenario_single(app, server, cache, args) -> List[Dict[str, Any]]:
+    client = app.test_client()
+    options = {'radius': 20}
+    reports = []
+    with Measurement('single/cold', server, cache) as m:
+        m.timed(analyze_call(client, SERVICES[0], LOCATIONS[0], options))
+    reports.append(m.report())
+    with Measurement('single/warm', server, cache) as m:
+        for _ in range(args.repeats):
+            m.timed(analyze_call(client, SERVICES[0], LOCATIONS[0], options))
+    reports.append(m.report())
+    return reports
+
+
+def scenario_concurrent(app, server, cache, args) -> List[Dict[str, Any]]:
+    jobs = [(SERVICES[(i + 1) % len(SERVICES)], LOCATIONS[(i + 1) % len(LOCATIONS)])
+            for i in range(args.analyses)]
+    with Measurement(f"concurrent/x{args.concurrency}", server, cache) as m:
+        def run(job):
+            # One client per request thread, like concurrent dashboard users
+            return m.timed(analyze_call(app.test_client(), job[0], job[1], {}))
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(run, jobs))
+    return [m.report()]
+
+
+def scenario_bulk(app, server, cache, args) -> List[Dict[str, Any]]:
+    from agents.scraper_agent import ScraperAgent
+    from utils.cache_manager import close_loop_clients
+
+    scraper = ScraperAgent()
+    keywords = [f"{service} {modifier}" for service in SERVICES
+                for modifier in ['near me', 'cost', 'emergency', 'company', 'reviews', 'best']][:args.keywords]
+    reports = []
+    for phase in ('cold', 'warm'):
+        with Measurement(f"bulk/{phase}/{len(keywords)}kw", server, cache) as m:
+            loop = asyncio.new_event_loop()
+            try:
+                m.timed(lambda: loop.run_until_complete(scraper.batch_scrape_keywords(keywords, LOCATIONS[0])))
+                loop.run_until_complete(close_loop_clients())
+            finally:
+                loop.close()
+        reports.append(m.report())
+    return reports
+
+
+def scenario_interactive(app, server, cache, args) -> List[Dict[str, Any]]:
+    jobs = [(SERVICES[(i + 3) % len(SERVICES)], LOCATIONS[(i + 5) % len(LOCATIONS)])
+            for i in range(args.analyses)]
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        background = [pool.submit(analyze_call(app.test_client(), query, location, {}))
+                      for query, location in jobs]
+        # Measure once the analyses have filled the browser queue
+        from utils.scrape_governor import BROWSER_GOVERNOR
+        deadline = time.monotonic() + 60
+        while BROWSER_GOVERNOR.waiting == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        client = app.test_client()
+        reports = []
+        for name, path, body in (('local', '/api/niche/competitors/local', {'location': LOCATIONS[0]}),
+                                 ('autocomplete', '/api/niche/keywords/autocomplete', {})):
+            with Measurement(f"interactive/{name}", server, cache) as m:
+                for i in range(args.repeats):
+                    def call():
+                        response = client.post(path, json={'query': f"{SERVICES[i % len(SERVICES)]} {i}", **body})
+                        if response.status_code != 200:
+                            raise RuntimeError(f"HTTP {response.status_code}")
+                    m.timed(call)
+            reports.append(m.report())
+        for future in background:
+            future.result()
+    return reports
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers: int, cache_dir: str) -> Tuple[subprocess.Popen, str]:
+    """gunicorn with the stub driver on a free port; returns once /health answers"""
+    import requests
+
+    port = free_port()
+    env = {**os.environ, 'WEB_WORKERS': str(workers), 'WEB_BIND': f"127.0.0.1:{port}",
+           'CACHE_DIR': cache_dir, 'SERP_HISTORY_DB': os.path.join(cache_dir, 'serp_history.sqlite3'),
+           'METRICS_MULTIPROC_DIR': os.path.join(cache_dir, 'metrics')}
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                'benchmarks.offline.stub_wsgi:app'],
+                               env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def scenario_workers(app, server, cache, args) -> List[Dict[str, Any]]:
+    import requests
+
+    jobs = [(SERVICES[(i + 1) % len(SERVICES)], LOCATIONS[(i + 1) % len(LOCATIONS)])
+            for i in range(args.analyses)]
+    reports = []
+    for workers in (int(n) for n in args.workers.split(',')):
+        process, base_url = start_gunicorn(workers, tempfile.mkdtemp(prefix='ranksavvy-bench-cache-'))
+        try:
+            with Measurement(f"workers/{workers}/x{args.concurrency}", server, None) as m:
+                def run(job):
+                    def call():
+                        response = requests.post(f"{base_url}/api/niche/analyze", timeout=600,
+                                                 json={'query': job[0], 'location': job[1], 'options': {}})
+                        if response.status_code != 200:
+                            raise RuntimeError(f"HTTP {response.status_code}")
+                    return m.timed(call)
+                with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                    list(pool.map(run, jobs))
+            reports.append(m.report())
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return reports
+
+
+SCENARIOS = {'single': scenario_single, 'concurrent': scenario_concurrent, 'bulk': scenario_bulk,
+             'interactive': scenario_interactive, 'workers': scenario_workers}
+
+
+def print_report(report: Dict[str, Any]):
+    upstream = ' '.join(f"{k}={v}" for k, v in sorted(report['upstream_requests'].items()))
+    hit = '-' if report['cache_hit_rate'] is None else f"{report['cache_hit_rate']:.2f}"
+    print(f"{report['scenario']:<24} calls={report['calls']:<3} err={report['errors']:<2} "
+          f"p50={report['p50_ms']:>9.1f}ms p95={report['p95_ms']:>9.1f}ms "
+          f"thr={report['throughput_per_s']:>7.3f}/s hit={hit}  {upstream}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', choices=['all'] + list(SCENARIOS), default='all')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='multiply every stub latency')
+    parser.add_argument('--latency', default='', help='per endpoint overrides in ms, e.g. serp=500,llm=800')
+    parser.add_argument('--page-kb', type=int, default=60, help='approximate HTML page weight')
+    parser.add_argument('--repeats', type=int, default=5, help='warm repeats in the single scenario')
+    parser.add_argument('--analyses', type=int, default=4, help='cold analyses in the concurrent scenario')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--keywords', type=int, default=24, help='keywords in the bulk scenario')
+    parser.add_argument('--workers', default='1,2,4', help='gunicorn worker counts in the workers scenario')
+    parser.add_argument('--browser', choices=['stub', 'chrome'], default='stub')
+    parser.add_argument('--redis', action='store_true', help='use REDIS_URL instead of a throwaway file cache')
+    parser.add_argument('--json', help='write the reports to this file')
+    args = parser.parse_args(argv)
+
+    latency = {k: v * args.latency_scale for k, v in DEFAULT_LATENCY_MS.items()}
+    for item in filter(None, args.latency.split(',')):
+        name, _, value = item.partition('=')
+        latency[name.strip()] = float(value) * args.latency_scale
+
+    server = StubServer(latency_ms=latency, page_kb=args.page_kb).start()
+    cache_dir = tempfile.mkdtemp(prefix='ranksavvy-bench-cache-')
+    configure_environment(server, cache_dir, args.redis)
+
+    # App modules read Config at import time, so import them only now
+    from app import app
+    from api.niche_routes import get_lead_agent
+    lead_agent = get_lead_agent()
+    if args.browser == 'stub':
+        # BrightDataClient imports selenium.webdriver where it opens a browser
+        import selenium.webdriver
+        from benchmarks.offline.stub_driver import StubDriver
+        selenium.webdriver.Chrome = StubDriver
+
+    print(f"[Benchmark] stub server {server.base_url}  latency(ms) {latency}  cache {cache_dir}")
+    reports = []
+    try:
+        for name in (SCENARIOS if args.scenario == 'all' else [args.scenario]):
+            for report in SCENARIOS[name](app, server, lead_agent.cache, args):
+                print_report(report)
+                reports.append(report)
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'latency_ms': latency, 'reports': reports,
+                       'scrape_stats': lead_agent.scraper_agent.brightdata.get_stats()}, f, indent=2)
+    return reports
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,55 @@
+"""
+Minimal stand-in for webdriver.Chrome, for machines without a browser.
+
+get() fetches the page from the stub server over HTTP (so latency, bytes
+and concurrency are real); the extraction scripts are answered from the
+payload the page embeds, which is what the script would have returned.
+Everything above the driver (governor, sessions, stats, parsing, caching,
+agents) runs unchanged.
+"""
+import json
+import re
+
+import requests
+
+from utils.dom_extraction import SERP_EXTRACTION_SCRIPT, COMPETITOR_EXTRACTION_SCRIPT, MAPS_EXTRACTION_SCRIPT
+from utils.brightdata_client import MAPS_RESULT_COUNT_SCRIPT, READY_STATE_SCRIPT, TRANSFERRED_BYTES_SCRIPT
+
+EXTRACTION_SCRIPTS = {SERP_EXTRACTION_SCRIPT, COMPETITOR_EXTRACTION_SCRIPT, MAPS_EXTRACTION_SCRIPT}
+EXTRACTION_PATTERN = re.compile(r'<script type="application/json" id="stub-extraction">(.*?)</script>', re.S)
+
+
+class StubDriver:
+    """The subset of the WebDriver API BrightDataClient uses"""
+
+    def __init__(self, options=None, **kwargs):
+        self.payload = None
+        self.transferred = 0
+        self.session = requests.Session()
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def get(self, url: str):
+        response = self.session.get(url, timeout=30)
+        response.raise_for_status()
+        self.transferred += len(response.content)
+        match = EXTRACTION_PATTERN.search(response.text)
+        self.payload = json.loads(match.group(1)) if match else None
+
+    def execute_script(self, script: str, *args):
+        if script in EXTRACTION_SCRIPTS:
+            return self.payload
+        if script == MAPS_RESULT_COUNT_SCRIPT:
+            return len(self.payload or [])
+        if script == TRANSFERRED_BYTES_SCRIPT:
+            return self.transferred
+        if script == READY_STATE_SCRIPT:
+            return 'complete'
+        return None
+
+    def find_element(self, by=None, value=None):
+        return self
+
+    def quit(self):
+        self.session.close()
@@ -0,0 +1,154 @@
+"""
+Local HTTP server standing in for Google SERP/Maps/autocomplete, competitor
+sites, Nominatim and the Anthropic Messages API, with per-endpoint latency.
+
+Runs on its own event loop in a background thread so the code under test
+talks to it over real sockets.
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Any, List
+
+from aiohttp import web
+
+from benchmarks.offline import fixtures
+
+# Median upstream latency in ms per endpoint class
+DEFAULT_LATENCY_MS = {
+    'serp': 900, 'maps': 1500, 'site': 400, 'autocomplete': 60, 'llm': 1200, 'geo': 80
+}
+
+
+class StubServer:
+    """Fixture server; counts requests per endpoint class"""
+
+    def __init__(self, latency_ms: Dict[str, float] = None, jitter: float = 0.2,
+                 page_kb: int = 60, seed: int = 7, site_hosts: int = 16):
+        self.latency_ms = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+        self.jitter = jitter
+        self.page_kb = page_kb
+        self.random = random.Random(seed)
+        self.counts: Dict[str, int] = {name: 0 for name in self.latency_ms}
+        self.base_url = None
+        self.site_bases: List[str] = []
+        self.site_hosts = site_hosts
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> 'StubServer':
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self._app(), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, '127.0.0.1', 0)
+            self._loop.run_until_complete(site.start())
+            port = site._server.sockets[0].getsockname()[1]
+            self.base_url = f"http://127.0.0.1:{port}"
+            # Competitor sites need distinct domains (the competitor store is
+            # keyed by domain), so they are also served on other loopback
+            # addresses where the OS allows it
+            self.site_bases = [f"{self.base_url}/sites"]
+            for i in range(1, self.site_hosts):
+                host = f"127.0.1.{i}"
+                try:
+                    self._loop.run_until_complete(web.TCPSite(self._runner, host, port).start())
+                    self.site_bases.append(f"http://{host}:{port}/sites")
+                except OSError:
+                    break
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='stub-server', daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    async def _delay(self, kind: str):
+        with self._lock:
+            self.counts[kind] += 1
+            jitter = 1 + self.random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(self.latency_ms[kind] * jitter / 1000)
+
+    def _app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/google/search', self._serp)
+        app.router.add_get('/google/maps/search/{tail:.*}', self._maps)
+        app.router.add_get('/google/complete/search', self._autocomplete)
+        app.router.add_route('*', '/sites/{slug}', self._site)
+        app.router.add_get('/nominatim/search', self._geocode)
+        app.router.add_get('/nominatim/reverse', self._reverse)
+        app.router.add_post('/anthropic/v1/messages', self._messages)
+        return app
+
+    async def _serp(self, request: web.Request) -> web.Response:
+        await self._delay('serp')
+        query = request.query.get('q', '')
+        payload = fixtures.serp_payload(query, self.site_bases)
+        return web.Response(text=fixtures.html_page(query, payload, self.page_kb), content_type='text/html')
+
+    async def _maps(self, request: web.Request) -> web.Response:
+        await self._delay('maps')
+        query, _, location = request.match_info['tail'].partition('+')
+        payload = fixtures.maps_payload(query, location or 'Pelham')
+        return web.Response(text=fixtures.html_page(query, payload, self.page_kb), content_type='text/html')
+
+    async def _autocomplete(self, request: web.Request) -> web.Response:
+        await self._delay('autocomplete')
+        return web.json_response(fixtures.autocomplete_payload(request.query.get('q', '')))
+
+    async def _site(self, request: web.Request) -> web.Response:
+        slug = request.match_info['slug']
+        etag = f'"{slug}-v1"'
+        headers = {'ETag': etag, 'Last-Modified': 'Mon, 06 Jan 2025 10:00:00 GMT'}
+        if request.method == 'HEAD':
+            # Validator checks are cheap compared with a page load
+            with self._lock:
+                self.counts['site'] += 1
+            status = 304 if request.headers.get('If-None-Match') == etag else 200
+            return web.Response(status=status, headers=headers)
+        await self._delay('site')
+        payload = fixtures.competitor_payload(slug, f"http://{request.host}/sites")
+        return web.Response(text=fixtures.html_page(payload['title'], payload, self.page_kb),
+                            content_type='text/html', headers=headers)
+
+    async def _geocode(self, request: web.Request) -> web.Response:
+        await self._delay('geo')
+        return web.json_response(fixtures.geocode_payload(request.query.get('q', '')))
+
+    async def _reverse(self, request: web.Request) -> web.Response:
+        await self._delay('geo')
+        return web.json_response(fixtures.reverse_payload(request.query.get('lat', '0'),
+                                                          request.query.get('lon', '0')))
+
+    async def _messages(self, request: web.Request) -> web.Response:
+        await self._delay('llm')
+        body: Dict[str, Any] = await request.json()
+        prompt = ''.join(m.get('content', '') for m in body.get('messages', []) if isinstance(m.get('content'), str))
+        text = fixtures.llm_text(prompt)
+        return web.json_response({
+            'id': f"msg_{int(time.time() * 1000)}",
+            'type': 'message',
+            'role': 'assistant',
+            'model': body.get('model', 'stub'),
+            'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'end_turn',
+            'stop_sequence': None,
+            'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4}
+        })
@@ -0,0 +1,14 @@
+"""
+WSGI entry point for load tests under gunicorn: the app with the browser
+driver replaced by StubDriver. The environment must already point every
+upstream at the stub server (see run.configure_environment).
+
+    gunicorn -c gunicorn.conf.py benchmarks.offline.stub_wsgi:app
+"""
+import selenium.webdriver
+
+from benchmarks.offline.stub_driver import StubDriver
+
+selenium.webdriver.Chrome = StubDriver
+
+from app import app  # noqa: E402
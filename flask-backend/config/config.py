@@ -16,9 +16,41 @@ class Config:
     
     # Claude
     ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
+    ANTHROPIC_BASE_URL = os.getenv('ANTHROPIC_BASE_URL')  # None uses the SDK default
+    
+    # Upstream endpoints (overridable so benchmarks can run against local stubs)
+    GOOGLE_BASE_URL = os.getenv('GOOGLE_BASE_URL', 'https://www.google.com')
+    NOMINATIM_DOMAIN = os.getenv('NOMINATIM_DOMAIN', 'nominatim.openstreetmap.org')
+    NOMINATIM_SCHEME = os.getenv('NOMINATIM_SCHEME', 'https')
     
     # Redis
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 32))  # shared pool, all agents
+    REDIS_LOOP_MAX_CONNECTIONS = int(os.getenv('REDIS_LOOP_MAX_CONNECTIONS', 4))  # per request event loop (async API)
+    REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', 0.25))  # max wait for a free pooled connection
+    REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.25))  # seconds per operation
+    REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', 0.5))
+    REDIS_BREAKER_THRESHOLD = int(os.getenv('REDIS_BREAKER_THRESHOLD', 3))  # consecutive failures to open
+    REDIS_HEALTH_CHECK_INTERVAL = float(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 15))  # seconds between probes
+    
+    # Serving (see gunicorn.conf.py)
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', 1))
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 32))  # request threads per worker
+    WEB_BIND = os.getenv('WEB_BIND', '0.0.0.0:5000')
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')  # e.g. redis://localhost:6379/1; needed with WEB_WORKERS > 1
+    # Workers share /metrics through snapshot files here when WEB_WORKERS > 1
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', os.path.join(os.path.dirname(__file__), '..', '.data', 'metrics'))
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))  # seconds between snapshots
+    
+    # Tracing
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'  # trace every analysis
+    OTEL_EXPORTER_OTLP_TRACES_ENDPOINT = os.getenv('OTEL_EXPORTER_OTLP_TRACES_ENDPOINT')  # e.g. http://collector:4318/v1/traces
+    OTEL_SERVICE_NAME = os.getenv('OTEL_SERVICE_NAME', 'ranksavvy-backend')
+    
+    # Profiling (folded-stack samples of an analysis, stored as profile:{analysis_id})
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))  # fraction of analyses profiled without options.profile
+    PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 10))
+    PROFILE_TTL = int(os.getenv('PROFILE_TTL', 604800))  # 7 days
     
     # Celery
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
@@ -27,6 +59,64 @@ class Config:
     # Scraping settings
     SCRAPE_TIMEOUT = 30000  # 30 seconds
     MAX_RETRIES = 3
+    # Block images/fonts/media/analytics and use eager page loads (see LOAD_PROFILES)
+    SCRAPE_BLOCK_RESOURCES = os.getenv('SCRAPE_BLOCK_RESOURCES', 'true').lower() == 'true'
+    SCRAPE_EXTRA_BLOCKED_URLS = [p for p in os.getenv('SCRAPE_EXTRA_BLOCKED_URLS', '').split(',') if p]
+    MAPS_SCROLL_TIMEOUT = float(os.getenv('MAPS_SCROLL_TIMEOUT', 3))  # max wait for new results per scroll
+    SERP_SETTLE_TIMEOUT = float(os.getenv('SERP_SETTLE_TIMEOUT', 2))  # max wait for late SERP blocks (local pack, PAA)
+    AUTOCOMPLETE_ENDPOINT = os.getenv('AUTOCOMPLETE_ENDPOINT', 'https://suggestqueries.google.com/complete/search')
+    AUTOCOMPLETE_CONCURRENCY = int(os.getenv('AUTOCOMPLETE_CONCURRENCY', 8))
+    # Process-wide concurrency caps enforced by the governors (utils/scrape_governor.py)
+    MAX_CONCURRENT_BROWSERS = int(os.getenv('MAX_CONCURRENT_BROWSERS', 4))
+    MAX_CONCURRENT_HTTP_SCRAPES = int(os.getenv('MAX_CONCURRENT_HTTP_SCRAPES', 16))
+    # Caps across all worker processes, enforced with Redis leases (0 = per-process caps only)
+    GLOBAL_MAX_CONCURRENT_BROWSERS = int(os.getenv('GLOBAL_MAX_CONCURRENT_BROWSERS', 0))
+    GLOBAL_MAX_CONCURRENT_HTTP_SCRAPES = int(os.getenv('GLOBAL_MAX_CONCURRENT_HTTP_SCRAPES', 0))
+    MAX_CONCURRENT_CLAUDE_REQUESTS = int(os.getenv('MAX_CONCURRENT_CLAUDE_REQUESTS', 4))
+    # Slots only interactive requests (autocomplete, local competitors) may use,
+    # per process and, with a GLOBAL_MAX_* cap, across workers too. Interactive
+    # routes make no Claude calls, so no Claude slot is reserved by default.
+    INTERACTIVE_RESERVED_BROWSERS = int(os.getenv('INTERACTIVE_RESERVED_BROWSERS', 1))
+    INTERACTIVE_RESERVED_HTTP_SCRAPES = int(os.getenv('INTERACTIVE_RESERVED_HTTP_SCRAPES', 4))
+    INTERACTIVE_RESERVED_CLAUDE_REQUESTS = int(os.getenv('INTERACTIVE_RESERVED_CLAUDE_REQUESTS', 0))
+    PRIORITY_AGING_SECONDS = float(os.getenv('PRIORITY_AGING_SECONDS', 15))  # queued time that promotes a waiter one class
+    SCRAPE_LEASE_TTL = float(os.getenv('SCRAPE_LEASE_TTL', 60))  # seconds; renewed while held, frees slots of dead workers
+    
+    # Analysis budgets (options.deadline_ms / max_scrapes / max_cost)
+    ANALYSIS_BUDGET_RESERVE_MS = float(os.getenv('ANALYSIS_BUDGET_RESERVE_MS', 3000))  # stop new scrapes this long before the deadline
+    PARTIAL_ANALYSIS_TTL = int(os.getenv('PARTIAL_ANALYSIS_TTL', 3600))  # budget-cut results, kept for export only
+    SCRAPE_COST_BROWSER_SESSION = float(os.getenv('SCRAPE_COST_BROWSER_SESSION', 0.004))  # estimated USD
+    SCRAPE_COST_HTTP_REQUEST = float(os.getenv('SCRAPE_COST_HTTP_REQUEST', 0.0002))
+    CLAUDE_COST_INPUT_PER_MTOK = float(os.getenv('CLAUDE_COST_INPUT_PER_MTOK', 3.0))
+    CLAUDE_COST_OUTPUT_PER_MTOK = float(os.getenv('CLAUDE_COST_OUTPUT_PER_MTOK', 15.0))
     
     # Cache settings
-    CACHE_TTL = 86400  # 24 hours
\ No newline at end of file
+    CACHE_TTL = 86400  # 24 hours
+    CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(os.path.dirname(__file__), '..', '.cache'))  # file cache tier
+    RESPONSE_CACHE_ENTRIES = int(os.getenv('RESPONSE_CACHE_ENTRIES', 64))  # encoded analysis bodies kept in memory
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
+    
+    # SERP history (durable rank tracking store)
+    SERP_HISTORY_ENABLED = os.getenv('SERP_HISTORY_ENABLED', 'true').lower() == 'true'
+    SERP_HISTORY_DB = os.getenv('SERP_HISTORY_DB', os.path.join(os.path.dirname(__file__), '..', '.data', 'serp_history.sqlite3'))
+    
+    # Keyword discovery settings
+    KEYWORD_VARIANT_SCRAPE_BUDGET = int(os.getenv('KEYWORD_VARIANT_SCRAPE_BUDGET', 10))  # per variant family
+    KEYWORD_VARIANT_WAVE_SIZE = int(os.getenv('KEYWORD_VARIANT_WAVE_SIZE', 5))
+    AUTOCOMPLETE_EXPANSION_ENABLED = os.getenv('AUTOCOMPLETE_EXPANSION_ENABLED', 'true').lower() == 'true'
+    AUTOCOMPLETE_EXPANSION_DEPTH = int(os.getenv('AUTOCOMPLETE_EXPANSION_DEPTH', 2))
+    AUTOCOMPLETE_EXPANSION_BUDGET = int(os.getenv('AUTOCOMPLETE_EXPANSION_BUDGET', 80))  # prefixes per seed
+    LONG_TAIL_KEYWORD_LIMIT = int(os.getenv('LONG_TAIL_KEYWORD_LIMIT', 50))
+    
+    # Surprise mode (related services explored in parallel, options.surprise_breadth overrides)
+    SURPRISE_BREADTH = int(os.getenv('SURPRISE_BREADTH', 20))
+    SURPRISE_MAX_BREADTH = int(os.getenv('SURPRISE_MAX_BREADTH', 50))
+    SURPRISE_BATCH_SIZE = int(os.getenv('SURPRISE_BATCH_SIZE', 5))  # services per batch_scrape_keywords call
+    SURPRISE_MIN_SCORE = float(os.getenv('SURPRISE_MIN_SCORE', 5))  # 0-10 opportunity score
+    SURPRISE_RESULT_LIMIT = int(os.getenv('SURPRISE_RESULT_LIMIT', 10))
+    
+    # Competitor store settings
+    COMPETITOR_STORE_TTL = int(os.getenv('COMPETITOR_STORE_TTL', 2592000))  # 30 days
+    COMPETITOR_SCRAPE_MAX_AGE = int(os.getenv('COMPETITOR_SCRAPE_MAX_AGE', 86400))  # 24 hours
+    COMPETITOR_INSIGHTS_MAX_AGE = int(os.getenv('COMPETITOR_INSIGHTS_MAX_AGE', 604800))  # 7 days
+    COMPETITOR_SITE_MAX_TTL = int(os.getenv('COMPETITOR_SITE_MAX_TTL', 604800))  # unchanged sites back off to 7 days
\ No newline at end of file
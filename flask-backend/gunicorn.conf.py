@@ -0,0 +1,59 @@
+"""
+Production server settings:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Each worker is a separate process with its own GIL, so HTML parsing, JSON
+encoding and request handling scale across cores. Workers use threads
+because routes run their own event loops (async_mode='threading').
+
+Running more than one worker needs Redis for the shared state:
+  - SOCKETIO_MESSAGE_QUEUE so Socket.IO events reach clients on any worker;
+  - GLOBAL_MAX_CONCURRENT_BROWSERS (and _HTTP_SCRAPES) so the workers share
+    one scrape budget instead of each applying its own cap.
+gunicorn doesn't do sticky sessions, so Socket.IO clients must connect with
+the websocket transport only (or sit behind a sticky proxy).
+With several workers, /metrics merges every worker's metrics through
+METRICS_MULTIPROC_DIR (see utils/metrics.py); /stats/* still describe the
+worker that answered.
+"""
+from config.config import Config
+
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS
+worker_class = 'gthread'
+threads = Config.WEB_THREADS
+# Full analyses can take minutes
+timeout = 600
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app and warm it up once in the master; workers fork from it
+preload_app = True
+
+
+def when_ready(server):
+    import app
+    app.warm_up()
+    if Config.WEB_WORKERS > 1:
+        from utils import metrics
+        metrics.reset_multiprocess_dir(Config.METRICS_MULTIPROC_DIR)
+    if Config.WEB_WORKERS > 1 and not Config.SOCKETIO_MESSAGE_QUEUE:
+        server.log.warning("SOCKETIO_MESSAGE_QUEUE is not set: Socket.IO events only reach "
+                           "clients connected to the emitting worker")
+    if Config.WEB_WORKERS > 1 and not Config.GLOBAL_MAX_CONCURRENT_BROWSERS:
+        server.log.warning(f"GLOBAL_MAX_CONCURRENT_BROWSERS is not set: up to "
+                           f"{Config.WEB_WORKERS * Config.MAX_CONCURRENT_BROWSERS} browser sessions "
+                           f"({Config.MAX_CONCURRENT_BROWSERS} per worker)")
+
+
+def post_fork(server, worker):
+    if Config.WEB_WORKERS > 1:
+        from utils import metrics
+        metrics.enable_multiprocess(Config.METRICS_MULTIPROC_DIR, Config.METRICS_FLUSH_INTERVAL)
+
+
+def child_exit(server, worker):
+    if Config.WEB_WORKERS > 1:
+        from utils import metrics
+        metrics.mark_process_dead(Config.METRICS_MULTIPROC_DIR, worker.pid)
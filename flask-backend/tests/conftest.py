@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests import the backend packages (agents, utils, config) the way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Agents built in tests must not write to the real SERP rank history
+os.environ['SERP_HISTORY_ENABLED'] = 'false'
@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+from utils.analysis_export import SECTIONS, iter_rows, stream_csv, stream_parquet
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+COMPETITOR_FIELDS = SECTIONS['competitors'][0]
+
+
+def competitors(*ratings):
+    return {'competitors': {'detailed_analysis': [
+        {'name': f"Pro {i}", 'url': f"https://pro{i}.com", 'local_data': {'rating': rating, 'reviews_count': '12'},
+         'seo_data': {'h1_tags': ['a'], 'h2_tags': []}}
+        for i, rating in enumerate(ratings)
+    ]}}
+
+
+def read_parquet(results, section, batch_size):
+    fields = SECTIONS[section][0]
+    data = b''.join(stream_parquet(iter_rows(results, section), fields, batch_size=batch_size))
+    return pq.read_table(io.BytesIO(data))
+
+
+def test_column_empty_in_first_row_group_takes_later_values():
+    table = read_parquet(competitors(None, None, 4.5, '3.9'), 'competitors', batch_size=2)
+    assert table.num_rows == 4
+    assert str(table.schema.field('rating').type) == 'double'
+    assert table.column('rating').to_pylist() == [None, None, 4.5, 3.9]
+    assert table.column('reviews_count').to_pylist() == [12, 12, 12, 12]
+
+
+def test_unparseable_numbers_become_null():
+    table = read_parquet(competitors('n/a'), 'competitors', batch_size=10)
+    assert table.column('rating').to_pylist() == [None]
+    assert table.column('h1_count').to_pylist() == [1]
+
+
+def test_empty_export_still_has_the_schema():
+    table = read_parquet({}, 'keywords', batch_size=10)
+    assert table.num_rows == 0
+    assert table.schema.names == SECTIONS['keywords'][0]
+
+
+def test_csv_streams_header_then_rows():
+    lines = list(stream_csv(iter_rows(competitors(4.5), 'competitors'), COMPETITOR_FIELDS))
+    assert lines[0].startswith('name,url,type,rating')
+    assert lines[1].startswith('Pro 0,https://pro0.com,,4.5,12')
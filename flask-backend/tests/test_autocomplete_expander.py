@@ -0,0 +1,58 @@
+import asyncio
+import string
+
+from utils.autocomplete_expander import AutocompleteExpander, SuggestionTrie
+
+
+def google_like_fetch(calls):
+    """
+    Suggestion endpoint stand-in: like Google, it only completes the last
+    word of the query, and a single-letter last word returns a full page
+    """
+    async def fetch_batch(queries):
+        calls.append(list(queries))
+        results = {}
+        for query in queries:
+            last = query.split()[-1]
+            count = 10 if len(last) == 1 else 3
+            results[query] = [f"{query}{suffix}" for suffix in string.ascii_lowercase[:count]]
+        return results
+    return fetch_batch
+
+
+def test_location_is_part_of_the_seed():
+    calls = []
+    expander = AutocompleteExpander(google_like_fetch(calls), max_depth=1, budget=80)
+    asyncio.run(expander.expand('hvac repair', 'Pelham Alabama'))
+
+    first = calls[0]
+    assert first[0] == 'hvac repair Pelham Alabama'
+    assert 'hvac repair Pelham Alabama c' in first
+    assert 'how hvac repair Pelham Alabama' in first
+    # Letters follow the location; question words precede the localized seed
+    seed = 'hvac repair Pelham Alabama'
+    assert all(query.startswith(seed) or query.endswith(f" {seed}") for query in first)
+
+
+def test_saturated_letter_prefixes_expand_to_depth_two():
+    calls = []
+    expander = AutocompleteExpander(google_like_fetch(calls), max_depth=2, budget=80)
+    trie, stats = asyncio.run(expander.expand('hvac repair', 'Pelham Alabama'))
+
+    assert stats['depth_reached'] == 2
+    assert stats['prefixes'] == 80
+    second = calls[1]
+    assert len(second) == 40
+    assert second[0] == 'hvac repair Pelham Alabama aa'
+    assert all(query.startswith('hvac repair Pelham Alabama ') and len(query.split()[-1]) == 2
+               for query in second)
+    assert 'hvac repair Pelham Alabama aab' in trie
+
+
+def test_trie_keeps_best_rank():
+    trie = SuggestionTrie()
+    assert trie.insert('HVAC Repair Cost', 4, 'hvac repair c')
+    assert not trie.insert('hvac  repair cost', 1, 'hvac repair')
+    assert len(trie) == 1
+    entry = trie.with_prefix('hvac repair')[0]
+    assert entry['rank'] == 1 and entry['source'] == 'hvac repair'
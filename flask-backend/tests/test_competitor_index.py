@@ -0,0 +1,59 @@
+import asyncio
+
+from utils.competitor_index import CompetitorIndex, normalize, tokenize
+
+COMPETITORS = [
+    {'name': 'Pelham HVAC', 'seo_data': {'h1_tags': ['24/7 Emergency Service Availability'],
+                                         'h2_tags': ['Our Service Guarantees', "Owner's Local Expertise"]},
+     'keywords': ['AC Repair Pelham', 'emergency  HVAC']},
+    {'name': 'Cool Air', 'seo_data': {'h1_tags': [], 'h2_tags': ['Pricing, and transparency']},
+     'keywords': ['furnace install']},
+    None
+]
+
+
+def index():
+    return CompetitorIndex.from_competitors(COMPETITORS)
+
+
+def test_tokenize_keeps_slashes_and_apostrophes():
+    assert tokenize("24/7 Owner's AC-Repair!") == ['24/7', "owner's", 'ac', 'repair']
+    assert normalize('  Emergency   HVAC ') == 'emergency hvac'
+
+
+def test_phrase_matches_consecutive_tokens_ignoring_case():
+    idx = index()
+    assert idx.has_phrase('service guarantees')
+    assert idx.has_phrase('EMERGENCY service')
+    assert idx.has_phrase("owner's local expertise")
+    # Tokens present but not consecutive, or in another order
+    assert not idx.has_phrase('pricing transparency')
+    assert not idx.has_phrase('guarantees service')
+    assert not idx.has_phrase('')
+
+
+def test_phrase_match_respects_fields():
+    idx = index()
+    assert idx.has_phrase('emergency service availability', fields=('h1',))
+    assert not idx.has_phrase('emergency service availability', fields=('h2',))
+    assert idx.has_phrase('ac repair', fields=('keyword',))
+    assert not idx.has_phrase('ac repair', fields=('h1', 'h2'))
+
+
+def test_covers_keyword_normalizes_case_and_punctuation():
+    idx = index()
+    assert idx.covers_keyword('ac repair pelham')
+    assert idx.covers_keyword('Emergency HVAC!')
+    assert not idx.covers_keyword('ac repair')  # exact keyword, not a phrase inside one
+
+
+def test_find_content_gaps_checks_h1_and_h2_phrases():
+    from agents.competitor_agent import CompetitorAgent
+
+    find_content_gaps = CompetitorAgent.find_content_gaps.__get__(object())
+    gaps = asyncio.run(find_content_gaps([c for c in COMPETITORS if c], []))
+    industry = {gap['gap'] for gap in gaps if gap['type'] == 'industry_standard'}
+    assert 'emergency service availability' not in industry  # covered by an H1
+    assert 'service guarantees' not in industry
+    assert 'local expertise' not in industry
+    assert 'pricing transparency' in industry
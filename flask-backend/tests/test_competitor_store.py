@@ -0,0 +1,90 @@
+import asyncio
+import os
+
+import pytest
+
+from config.config import Config
+from utils.cache_manager import CacheManager
+from utils.competitor_store import CompetitorStore, competitor_domain
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(tmp_path))
+    cache = CacheManager()
+    # Exercise the file tier whether or not a Redis server is running
+    monkeypatch.setattr(cache, 'redis_client', None)
+    return CompetitorStore(cache)
+
+
+def test_concurrent_puts_keep_every_domain_in_the_location_index(store):
+    domains = [f"competitor{i}.com" for i in range(40)]
+
+    async def main():
+        await asyncio.gather(*(store.put({'domain': domain}, 'Pelham Alabama') for domain in domains))
+        return await store.find_by_location('pelham alabama ')
+
+    records = asyncio.run(main())
+    assert sorted(record['domain'] for record in records) == sorted(domains)
+    assert all(record['locations'] == ['Pelham Alabama'] for record in records)
+
+
+def test_competitor_domain_normalizes_urls():
+    assert competitor_domain('https://www.Example.com:443/page') == 'example.com'
+    assert competitor_domain('user@shop.example.com') == 'shop.example.com'
+
+
+def test_file_tier_add_to_set_dedupes(store):
+    file_cache = store.cache.file_cache
+    assert file_cache.add_to_set('set:test', ['a', 'b', 'a'])
+    assert file_cache.add_to_set('set:test', ['b', 'c'])
+    assert asyncio.run(store.cache.aset_members('set:test')) == ['a', 'b', 'c']
+
+
+def test_preseeded_records_stay_with_the_analysis(store, monkeypatch):
+    from agents.competitor_agent import CompetitorAgent
+
+    agent = CompetitorAgent()
+    agent.store = store
+    site_data = {'title': 'Pelham HVAC', 'h1_tags': ['AC Repair'], 'h2_tags': []}
+    scraped = []
+
+    async def scrape_competitor_site(url):
+        scraped.append(url)
+        return site_data
+
+    async def analyze_competitor_content(data):
+        return {'keywords': ['ac repair'], 'service_focus': [], 'value_propositions': [], 'content_gaps': []}
+
+    monkeypatch.setattr(agent.scraper, 'scrape_competitor_site', scrape_competitor_site)
+    monkeypatch.setattr(agent.claude, 'analyze_competitor_content', analyze_competitor_content)
+    competitor = {'url': 'https://www.pelhamhvac.com/', 'name': 'Pelham HVAC'}
+
+    async def main():
+        await agent.analyze_competitor(competitor, 'Pelham Alabama', {})
+        known_pelham, known_hoover = await asyncio.gather(agent.preseed('Pelham Alabama'), agent.preseed('Hoover Alabama'))
+        pelham = await agent.analyze_competitor(competitor, 'Pelham Alabama', known_pelham)
+        return known_pelham, known_hoover, pelham
+
+    known_pelham, known_hoover, pelham = asyncio.run(main())
+    assert list(known_pelham) == ['pelhamhvac.com'] and known_hoover == {}
+    assert scraped == ['https://www.pelhamhvac.com/']  # second analysis reused the preseeded scrape
+    assert pelham['keywords'] == ['ac repair']
+    assert not hasattr(agent, '_preseeded')
+
+
+def test_file_tier_add_to_set_refreshes_ttl_and_leaves_no_lock_files(store, tmp_path, monkeypatch):
+    import json
+    import time
+
+    file_cache = store.cache.file_cache
+    assert file_cache.add_to_set('set:ttl', ['a'], ttl=10)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 8)
+    # Nothing new is added, but the TTL still restarts, as EXPIRE does on Redis
+    assert file_cache.add_to_set('set:ttl', ['a'], ttl=10)
+    monkeypatch.setattr(time, 'time', lambda: now + 15)
+    assert json.loads(file_cache.get('set:ttl')) == ['a']
+
+    assert file_cache.add_to_set('set:other', ['b'])
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.lock') and name != '.sets.lock'] == []
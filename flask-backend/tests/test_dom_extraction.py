@@ -0,0 +1,124 @@
+"""
+Extraction scripts run against saved pages in headless Chrome (the browser
+the scrapers drive), plus the parse_* helpers on their output. The script
+tests skip when Chrome or chromedriver isn't installed.
+"""
+import os
+
+import pytest
+
+from utils.dom_extraction import (
+    SERP_EXTRACTION_SCRIPT, COMPETITOR_EXTRACTION_SCRIPT, MAPS_EXTRACTION_SCRIPT,
+    parse_competitor_payload, parse_maps_payload
+)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.fixture(scope='module')
+def driver():
+    from selenium import webdriver
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    try:
+        chrome = webdriver.Chrome(options=options)
+    except Exception as e:
+        pytest.skip(f"headless Chrome unavailable: {str(e).splitlines()[0]}")
+    yield chrome
+    chrome.quit()
+
+
+def run_script(driver, fixture, script, *args):
+    driver.get(f"file://{os.path.join(FIXTURES, fixture)}")
+    return driver.execute_script(script, *args)
+
+
+def test_serp_script(driver):
+    serp = run_script(driver, 'serp_hvac_repair.html', SERP_EXTRACTION_SCRIPT)
+
+    assert [(r['position'], r['url']) for r in serp['organic_results']] == [
+        (1, 'https://www.pelhamhvac.com/'),
+        (2, 'https://www.yelp.com/search?find_desc=hvac&find_loc=Pelham%2C+AL'),
+        (3, 'https://www.homeadvisor.com/c.HVAC.Pelham.AL.html')
+    ]
+    assert serp['organic_results'][0]['title'] == 'Pelham HVAC | Heating & Cooling Repair'
+    assert serp['organic_results'][0]['snippet'].startswith('Family-owned HVAC repair')
+
+    assert serp['ads'] == [
+        {'title': 'Cool Air Pros - 24/7 AC Repair', 'url': 'https://www.coolairpros.com/pelham',
+         'description': 'Same-day service in Pelham. Call now for a free estimate.'},
+        {'title': 'Service Masters HVAC', 'url': 'https://www.servicemasters.com/hvac',
+         'description': 'Licensed technicians. Financing available.'}
+    ]
+    assert serp['local_pack'] == [
+        {'name': 'Pelham Heating & Air', 'position': 1},
+        {'name': 'Shelby County Comfort', 'position': 2},
+        {'name': 'Oak Mountain Mechanical', 'position': 3}
+    ]
+    assert serp['people_also_ask'] == ['How much does HVAC repair cost in Alabama?',
+                                       'Is it worth repairing a 15 year old AC unit?']
+    assert serp['related_searches'] == ['hvac repair pelham al cost', 'emergency hvac repair pelham']
+    assert serp['featured_snippet'] is None and serp['knowledge_panel'] is None
+
+
+def test_competitor_script(driver):
+    payload = run_script(driver, 'competitor_site.html', COMPETITOR_EXTRACTION_SCRIPT, 'www.pelhamhvac.com')
+
+    assert payload['title'] == 'Pelham HVAC | Heating & Cooling Repair in Pelham, AL'
+    assert payload['h1_tags'] == ['Heating & Cooling Repair in Pelham, AL']
+    assert payload['h2_tags'] == ['AC Repair', 'Furnace Installation', 'Maintenance Plans']
+    assert payload['meta_description'].startswith('24/7 heating and air conditioning repair')
+    assert payload['internal_links'] == [
+        {'url': 'https://www.pelhamhvac.com/', 'anchor_text': 'Home'},
+        {'url': 'https://www.pelhamhvac.com/ac-repair', 'anchor_text': 'AC Repair'},
+        {'url': 'https://www.pelhamhvac.com/heating', 'anchor_text': 'Heating Services'}
+    ]
+    assert len(payload['schema_scripts']) == 3
+
+    site = parse_competitor_payload(payload, 'https://www.pelhamhvac.com/')
+    assert site['schema_types'] == ['HVACBusiness', 'FAQPage']
+
+
+def test_maps_script(driver):
+    payload = run_script(driver, 'maps_results.html', MAPS_EXTRACTION_SCRIPT)
+
+    assert payload == [
+        {'name': 'Pelham Heating & Air', 'rating_label': '4.8 stars 212 Reviews', 'reviews_text': '(212)'},
+        {'name': 'Shelby County Comfort', 'rating_label': '4.1 stars', 'reviews_text': None}
+    ]
+
+
+def test_parse_competitor_payload():
+    payload = {
+        'title': 'Pelham HVAC',
+        'h1_tags': ['Heating & Cooling Repair'],
+        'meta_description': 'Repair in Pelham',
+        'schema_scripts': ['{"@type": "HVACBusiness"}', '{"name": "no type"}', '{broken'],
+        'internal_links': [{'url': 'https://www.pelhamhvac.com/ac-repair', 'anchor_text': 'AC Repair'}]
+    }
+    site = parse_competitor_payload(payload, 'https://www.pelhamhvac.com/')
+
+    assert site['url'] == 'https://www.pelhamhvac.com/'
+    assert site['schema_types'] == ['HVACBusiness']
+    assert site['h2_tags'] == []
+    assert site['internal_links'] == payload['internal_links']
+    assert site['images_alt_text'] == []
+
+
+def test_parse_maps_payload():
+    businesses = parse_maps_payload([
+        {'name': 'Pelham Heating & Air', 'rating_label': '4.8 stars 212 Reviews', 'reviews_text': '(212)'},
+        {'name': 'Shelby County Comfort', 'rating_label': '4.1 stars', 'reviews_text': None},
+        {'name': 'New Business', 'rating_label': 'No reviews', 'reviews_text': None},
+        {'name': 'Unrated', 'rating_label': None, 'reviews_text': '(3)'}
+    ])
+
+    assert [(b['name'], b['rating'], b['reviews_count']) for b in businesses] == [
+        ('Pelham Heating & Air', 4.8, '212'),
+        ('Shelby County Comfort', 4.1, None),
+        ('New Business', None, None),
+        ('Unrated', None, '3')
+    ]
+    assert set(businesses[0]) == {'name', 'rating', 'reviews_count', 'category', 'address', 'phone', 'website'}
@@ -0,0 +1,42 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+from utils import json_codec
+
+flask_app = Flask(__name__)
+
+
+@pytest.fixture
+def raw():
+    return json_codec.dumps({'analysis_id': 'abc', 'keywords': {'all_keywords': [{'keyword': 'hvac repair'}] * 200}})
+
+
+def respond(raw, **headers):
+    from api.niche_routes import _payload_response
+
+    with flask_app.test_request_context(headers=headers):
+        return _payload_response(raw, [])
+
+
+def test_each_content_coding_gets_its_own_etag(raw):
+    identity = respond(raw, **{'Accept-Encoding': 'identity'})
+    gzipped = respond(raw, **{'Accept-Encoding': 'gzip'})
+
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzipped.get_data()) == identity.get_data()
+    identity_tag, weak = identity.get_etag()
+    gzip_tag, _ = gzipped.get_etag()
+    assert not weak
+    assert gzip_tag == identity_tag + '-gz'
+
+
+def test_if_none_match_accepts_any_coding_of_the_body(raw):
+    gzip_tag, _ = respond(raw, **{'Accept-Encoding': 'gzip'}).get_etag()
+
+    response = respond(raw, **{'Accept-Encoding': 'identity', 'If-None-Match': f'"{gzip_tag}"'})
+    assert response.status_code == 304
+    assert response.get_etag() == (gzip_tag, False)
+
+    assert respond(raw, **{'If-None-Match': '"stale"'}).status_code == 200
@@ -0,0 +1,31 @@
+import itertools
+
+import numpy as np
+
+from agents.keyword_agent import KeywordAgent
+from utils.keyword_table import KeywordTable, MISSING, top_k_indices
+
+
+def test_value_scores_match_the_per_dict_score():
+    keywords = []
+    for i, (kw_type, intent, competition) in enumerate(itertools.product(
+            ['primary', 'autocomplete', 'emergency', None], ['urgent', 'commercial', 'high', None],
+            ['low', 'medium', 'high', 'unknown', MISSING])):
+        kw = {'keyword': f"hvac repair {i}", 'type': kw_type, 'intent': intent, 'search_volume_score': i % 7}
+        if competition != MISSING:
+            kw['competition'] = competition
+        keywords.append(kw)
+
+    calculate_keyword_value = KeywordAgent.calculate_keyword_value.__get__(object())
+    assert KeywordTable(keywords).value_scores().tolist() == [calculate_keyword_value(kw) for kw in keywords]
+
+
+def test_top_k_keeps_original_order_for_ties():
+    scores = np.array([1, 3, 3, 2, 3], dtype=np.float64)
+    assert top_k_indices(scores, 2).tolist() == [1, 2]
+    assert top_k_indices(scores, 10).tolist() == [1, 2, 4, 3, 0]
+
+
+def test_contains_any_maps_matches_back_to_rows():
+    table = KeywordTable([{'keyword': k} for k in ['Emergency AC', 'ac cost', '24/7 plumber', 'roof']])
+    assert table.contains_any(['emergency', '24/7']).tolist() == [True, False, True, False]
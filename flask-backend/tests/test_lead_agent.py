@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from config.config import Config
+from utils.cache_manager import CacheManager
+
+
+@pytest.fixture
+def lead(tmp_path, monkeypatch):
+    from agents.lead_agent import LeadAgent
+
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(tmp_path))
+    agent = LeadAgent()
+    agent.cache = CacheManager()
+    monkeypatch.setattr(agent.cache, 'redis_client', None)
+    agent.keyword_delay = 0
+
+    async def analyze_location(location, radius=None):
+        return {'primary_location': location}
+
+    async def discover_keywords(service, location, geo_data):
+        await asyncio.sleep(agent.keyword_delay)
+        return {'all_keywords': [{'keyword': f"{service} {location}", 'intent': 'commercial', 'competition': 'low'}]}
+
+    async def analyze_competitors(query, location):
+        return {'local': [], 'organic': [], 'detailed_analysis': []}
+
+    monkeypatch.setattr(agent.geo_agent, 'analyze_location', analyze_location)
+    monkeypatch.setattr(agent.keyword_agent, 'discover_keywords', discover_keywords)
+    monkeypatch.setattr(agent, '_analyze_competitors', analyze_competitors)
+    return agent
+
+
+def test_each_run_gets_its_own_analysis_id(lead):
+    first = asyncio.run(lead.analyze_niche('hvac repair', 'Pelham Alabama', {'trace': True}))
+    assert lead.get_analysis(first['analysis_id'])['analysis_id'] == first['analysis_id']
+
+    second = asyncio.run(lead.analyze_niche('hvac repair', 'Pelham Alabama', {'trace': True}))
+    assert second['analysis_id'] != first['analysis_id']
+    assert lead.get_analysis(second['analysis_id'])['analysis_id'] == second['analysis_id']
+    # The first run's result was replaced, so its ID no longer resolves to another run
+    assert lead.get_analysis(first['analysis_id']) is None
+
+    cached = asyncio.run(lead.analyze_niche('hvac repair', 'Pelham Alabama'))
+    assert cached['analysis_id'] == second['analysis_id']
+
+
+def test_partial_run_keeps_the_full_result_under_its_id(lead):
+    full = asyncio.run(lead.analyze_niche('hvac repair', 'Pelham Alabama', {'trace': True}))
+
+    lead.keyword_delay = 5
+    partial = asyncio.run(lead.analyze_niche('hvac repair', 'Pelham Alabama', {'trace': True, 'deadline_ms': 500}))
+    assert 'keywords' in partial['incomplete_sections']
+    assert partial['analysis_id'] != full['analysis_id']
+
+    assert 'incomplete_sections' not in lead.get_analysis(full['analysis_id'])
+    assert lead.get_analysis(partial['analysis_id'])['incomplete_sections'] == partial['incomplete_sections']
+    assert asyncio.run(lead.analyze_niche('hvac repair', 'Pelham Alabama'))['analysis_id'] == full['analysis_id']
+
+
+def test_each_profiled_run_keeps_its_own_profile(lead):
+    first = asyncio.run(lead.analyze_niche('hvac repair', 'Pelham Alabama', {'profile': True}))
+    second = asyncio.run(lead.analyze_niche('hvac repair', 'Pelham Alabama', {'profile': True}))
+
+    assert first['profile']['analysis_id'] == first['analysis_id']
+    assert second['profile']['analysis_id'] == second['analysis_id'] != first['analysis_id']
+    assert lead.get_profile(first['analysis_id']) is not None
+    assert lead.get_profile(second['analysis_id']) is not None
@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+
+from utils import metrics
+
+
+@pytest.fixture
+def shared_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, '_multiprocess_dir', str(tmp_path))
+    return tmp_path
+
+
+def write_worker(directory, pid, snapshot):
+    (directory / f"{pid}.json").write_text(json.dumps(snapshot))
+
+
+def sample(text, line_start):
+    return [line for line in text.splitlines() if line.startswith(line_start)]
+
+
+def test_render_sums_counters_and_histograms_over_workers(shared_dir):
+    counter = metrics.Counter('test_mp_requests_total', 'Test counter', ('route',))
+    histogram = metrics.Histogram('test_mp_duration_seconds', 'Test histogram', buckets=(1,))
+    gauge = metrics.Gauge('test_mp_in_flight', 'Test gauge')
+    try:
+        counter.inc(2, route='/a')
+        histogram.observe(0.5)
+        gauge.set(1)
+        write_worker(shared_dir, 99999, {
+            'test_mp_requests_total': [[['/a'], 3], [['/b'], 1]],
+            'test_mp_duration_seconds': [[[], {'buckets': [0, 1], 'sum': 4.0, 'count': 1}]],
+            'test_mp_in_flight': [[[], 5]]
+        })
+
+        text = metrics.render()
+        assert sample(text, 'test_mp_requests_total{route="/a"}') == ['test_mp_requests_total{route="/a"} 5']
+        assert sample(text, 'test_mp_requests_total{route="/b"}') == ['test_mp_requests_total{route="/b"} 1']
+        assert sample(text, 'test_mp_duration_seconds_count') == ['test_mp_duration_seconds_count 2']
+        assert sample(text, 'test_mp_duration_seconds_bucket{le="1"}') == ['test_mp_duration_seconds_bucket{le="1"} 1']
+        assert sorted(sample(text, 'test_mp_in_flight{')) == sorted([
+            f'test_mp_in_flight{{worker="{os.getpid()}"}} 1', 'test_mp_in_flight{worker="99999"} 5'
+        ])
+
+        # An exited worker keeps its totals but no longer reports gauges
+        metrics.mark_process_dead(str(shared_dir), 99999)
+        text = metrics.render()
+        assert sample(text, 'test_mp_requests_total{route="/a"}') == ['test_mp_requests_total{route="/a"} 5']
+        assert sample(text, 'test_mp_in_flight{') == [f'test_mp_in_flight{{worker="{os.getpid()}"}} 1']
+    finally:
+        for metric in (counter, histogram, gauge):
+            metrics._registry.remove(metric)
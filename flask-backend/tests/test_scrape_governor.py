@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+
+from utils.scrape_governor import ScrapeGovernor, work_class
+
+
+def test_cancelled_step_keeps_slot_until_thread_returns():
+    governor = ScrapeGovernor('test-browser', 1)
+    started, finish = threading.Event(), threading.Event()
+
+    def session():
+        started.set()
+        finish.wait(5)
+        return 'done'
+
+    async def cut_at_deadline():
+        try:
+            await asyncio.wait_for(governor.run_in_thread(session), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(cut_at_deadline())
+    loop.close()
+
+    assert started.is_set()
+    assert governor.active == 1
+    finish.set()
+    deadline = time.monotonic() + 5
+    while governor.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert governor.active == 0
+
+
+def test_call_cancelled_while_queued_is_skipped():
+    governor = ScrapeGovernor('test-browser', 1)
+    ran = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def hold():
+            async with governor.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(governor.run_in_thread(ran.append, 'queued'))
+        await asyncio.sleep(0.01)
+        assert governor.waiting == 1
+        queued.cancel()
+        release.set()
+        await holder
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert ran == []
+    assert governor.active == 0 and governor.waiting == 0
+
+
+def test_reserved_slot_goes_to_interactive_work():
+    governor = ScrapeGovernor('test-browser', 2, reserved=1)
+
+    async def main():
+        await governor.acquire('analysis')
+        assert not governor._eligible('analysis')
+        assert governor._eligible('interactive')
+        with work_class('interactive'):
+            async with governor.slot():
+                assert governor.snapshot()['active'] == {'interactive': 1, 'analysis': 1, 'background': 0}
+        governor.release('analysis')
+
+    asyncio.run(main())
+    assert governor.active == 0
@@ -0,0 +1,36 @@
+import asyncio
+
+from utils.scrape_scheduler import AdaptiveScrapeScheduler
+
+
+def candidates(*terms):
+    return [{'keyword': f"{term} hvac" if placement == 'prefix' else f"hvac {term}", 'term': term,
+             'placement': placement, 'priority': 1.0}
+            for term in terms for placement in ('prefix', 'suffix')]
+
+
+def run(candidate_list, signals, budget=10, wave_size=5):
+    scraped = []
+
+    async def scrape_batch(keywords, location):
+        scraped.extend(keywords)
+        return [{'serp_data': {'ads': [{}] if signals.get(keyword) else []}} for keyword in keywords]
+
+    scheduler = AdaptiveScrapeScheduler(scrape_batch, budget=budget, wave_size=wave_size)
+    results = asyncio.run(scheduler.run(candidate_list, 'pelham alabama'))
+    return scraped, results
+
+
+def test_one_empty_serp_does_not_prune_the_term():
+    # The prefix variant comes back empty, the suffix variant has ads
+    scraped, results = run(candidates('emergency'), {'hvac emergency': True})
+    assert sorted(scraped) == ['emergency hvac', 'hvac emergency']
+    assert results['hvac emergency']['serp_data']['ads']
+
+
+def test_term_is_pruned_after_two_empty_serps():
+    scraped, _ = run(candidates('emergency', 'repair') + [
+        {'keyword': 'emergency hvac now', 'term': 'emergency', 'placement': 'prefix', 'priority': 0.5}
+    ], {'repair hvac': True, 'hvac repair': True}, wave_size=1)
+    assert 'emergency hvac now' not in scraped
+    assert sorted(k for k in scraped if 'emergency' in k) == ['emergency hvac', 'hvac emergency']
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from config.config import Config
+from utils.cache_manager import CacheManager
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    from agents.scraper_agent import ScraperAgent
+
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'SERP_HISTORY_ENABLED', False)
+    agent = ScraperAgent()
+    agent.cache = CacheManager()
+    monkeypatch.setattr(agent.cache, 'redis_client', None)
+    agent.calls = []
+    agent.site_headers = {}
+
+    async def scrape_competitor_site(url):
+        agent.calls.append('scrape')
+        return {'title': 'Pelham HVAC', 'h1_tags': ['AC Repair']}
+
+    async def check_site_validators(url, etag=None, last_modified=None):
+        agent.calls.append('head')
+        return {'status': 200, 'etag': agent.site_headers.get('etag') or etag,
+                'last_modified': agent.site_headers.get('last_modified') or last_modified,
+                'not_modified': bool(etag) and agent.site_headers.get('etag') == etag}
+
+    monkeypatch.setattr(agent.brightdata, 'scrape_competitor_site', scrape_competitor_site)
+    monkeypatch.setattr(agent.brightdata, 'check_site_validators', check_site_validators)
+    return agent
+
+
+def rescrape(agent, url):
+    """Scrape after the cached copy expired"""
+    agent.cache.file_cache.delete(f"competitor_site:{url}")
+    return asyncio.run(agent.scrape_competitor_site(url))
+
+
+def test_site_without_validators_is_not_probed_again(scraper):
+    url = 'https://www.pelhamhvac.com/'
+    asyncio.run(scraper.scrape_competitor_site(url))
+    assert scraper.calls == ['scrape', 'head']
+
+    scraper.calls.clear()
+    rescrape(scraper, url)
+    assert scraper.calls == ['scrape']
+
+
+def test_site_with_validators_is_checked_before_scraping(scraper):
+    url = 'https://www.pelhamhvac.com/'
+    scraper.site_headers = {'etag': '"v1"'}
+    asyncio.run(scraper.scrape_competitor_site(url))
+
+    scraper.calls.clear()
+    assert rescrape(scraper, url)['title'] == 'Pelham HVAC'
+    assert scraper.calls == ['head']
@@ -0,0 +1,44 @@
+import threading
+
+from utils.serp_history import SerpHistoryStore
+
+
+def serp(*domains):
+    return {'organic_results': [{'url': f"https://{domain}/", 'title': domain} for domain in domains]}
+
+
+def test_unchanged_serp_extends_the_snapshot(tmp_path):
+    store = SerpHistoryStore(str(tmp_path / 'history.sqlite3'))
+    assert store.record('HVAC repair', 'Pelham Alabama', serp('a.com', 'b.com'), captured_at=86400) == 'inserted'
+    assert store.record('hvac  repair', 'pelham alabama', serp('a.com', 'b.com'), captured_at=3 * 86400) == 'unchanged'
+    assert store.record('hvac repair', 'pelham alabama', serp('b.com', 'a.com'), captured_at=3 * 86400) == 'inserted'
+
+    history = store.keyword_history('hvac repair', 'pelham alabama')
+    assert [(s['first_seen'], s['last_seen']) for s in history] == [
+        ('1970-01-02', '1970-01-04'), ('1970-01-04', '1970-01-04')
+    ]
+    assert [r['domain'] for r in history[-1]['results']] == ['b.com', 'a.com']
+
+
+def test_concurrent_records_of_the_same_day_do_not_conflict(tmp_path):
+    store = SerpHistoryStore(str(tmp_path / 'history.sqlite3'))
+    workers = 8
+    barrier = threading.Barrier(workers)
+    outcomes, errors = [], []
+
+    def record(i):
+        barrier.wait()
+        try:
+            outcomes.append(store.record('hvac repair', 'pelham alabama', serp(f"site{i}.com"), captured_at=86400))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=record, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert sorted(outcomes) == ['inserted'] + ['replaced'] * (workers - 1)
+    assert len(store.keyword_history('hvac repair', 'pelham alabama')) == 1
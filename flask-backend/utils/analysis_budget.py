@@ -0,0 +1,136 @@
+"""
+Per-analysis time, scrape and cost budget.
+
+The budget rides in a contextvar, like the work class and the trace, so
+every scrape and Claude call made for an analysis is admitted against it:
+the governors refuse new upstream calls once it's spent (BudgetExhausted),
+and LeadAgent runs each pipeline step under the remaining time. Work in
+flight when the budget runs out finishes; steps still running at the
+deadline are cancelled and reported as incomplete. A browser session or
+Claude call a cancelled step started can't be interrupted, so it keeps
+its governor slot until its thread returns (ScrapeGovernor.run_in_thread).
+
+Cost is an estimate in USD: a flat rate per browser session and HTTP
+lookup, and Claude tokens at list price.
+"""
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Awaitable, Tuple
+
+from config.config import Config
+
+# Time kept after the last step to assemble and return the result
+FINISH_MS = 250
+
+_current_budget = contextvars.ContextVar('analysis_budget', default=None)
+
+
+class BudgetExhausted(Exception):
+    """Raised instead of starting an upstream call the budget can't afford"""
+
+
+class AnalysisBudget:
+    """Deadline, browser scrape count and estimated cost limits (None = unlimited)"""
+
+    def __init__(self, deadline_ms: float = None, max_scrapes: int = None, max_cost: float = None):
+        self.deadline_ms = deadline_ms
+        self.max_scrapes = max_scrapes
+        self.max_cost = max_cost
+        self.started = time.monotonic()
+        self.scrapes = 0
+        self.cost = 0.0
+        self.refused = 0
+        self.reason = None
+        # New upstream calls stop early enough for in-flight ones to finish
+        self.reserve_ms = min(Config.ANALYSIS_BUDGET_RESERVE_MS, deadline_ms / 4) if deadline_ms else 0
+
+    @classmethod
+    def from_options(cls, options: Dict[str, Any]) -> Optional['AnalysisBudget']:
+        """Budget from options.deadline_ms / max_scrapes / max_cost, or None if none is set"""
+        limits = {key: options.get(key) for key in ('deadline_ms', 'max_scrapes', 'max_cost')}
+        if all(value is None for value in limits.values()):
+            return None
+        return cls(deadline_ms=float(limits['deadline_ms']) if limits['deadline_ms'] is not None else None,
+                   max_scrapes=int(limits['max_scrapes']) if limits['max_scrapes'] is not None else None,
+                   max_cost=float(limits['max_cost']) if limits['max_cost'] is not None else None)
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def remaining_s(self) -> Optional[float]:
+        """Seconds a step may still run before the hard deadline"""
+        if self.deadline_ms is None:
+            return None
+        return max(0.0, (self.deadline_ms - FINISH_MS - self.elapsed_ms()) / 1000)
+
+    def exhausted(self) -> bool:
+        """True once no new upstream call should start; records why"""
+        if self.reason is None:
+            if self.deadline_ms is not None and self.elapsed_ms() >= self.deadline_ms - self.reserve_ms:
+                self.reason = 'deadline'
+            elif self.max_scrapes is not None and self.scrapes >= self.max_scrapes:
+                self.reason = 'max_scrapes'
+            elif self.max_cost is not None and self.cost >= self.max_cost:
+                self.reason = 'max_cost'
+        return self.reason is not None
+
+    def admit(self, pool: str):
+        """Charge one upstream call from a governor pool, or raise BudgetExhausted"""
+        if self.exhausted():
+            self.refused += 1
+            raise BudgetExhausted(f"Analysis budget exhausted ({self.reason}), skipping {pool} call")
+        if pool == 'browser':
+            self.scrapes += 1
+            self.cost += Config.SCRAPE_COST_BROWSER_SESSION
+        elif pool == 'http':
+            self.cost += Config.SCRAPE_COST_HTTP_REQUEST
+
+    def charge_tokens(self, input_tokens: int, output_tokens: int):
+        self.cost += (input_tokens * Config.CLAUDE_COST_INPUT_PER_MTOK
+                      + output_tokens * Config.CLAUDE_COST_OUTPUT_PER_MTOK) / 1e6
+
+    async def run(self, step: Awaitable[Any]) -> Tuple[bool, Any]:
+        """
+        Run a pipeline step within the remaining time.
+        Returns (complete, result): result is None if the step was skipped,
+        cancelled at the deadline or refused an upstream call.
+        """
+        if self.exhausted():
+            step.close()
+            return False, None
+        refused = self.refused
+        try:
+            result = await asyncio.wait_for(step, timeout=self.remaining_s())
+        except (asyncio.TimeoutError, BudgetExhausted):
+            self.exhausted()
+            return False, None
+        # Calls refused inside the step (gathered with return_exceptions) leave gaps too
+        return self.refused == refused, result
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'deadline_ms': self.deadline_ms,
+            'max_scrapes': self.max_scrapes,
+            'max_cost': self.max_cost,
+            'elapsed_ms': round(self.elapsed_ms(), 1),
+            'scrapes': self.scrapes,
+            'cost': round(self.cost, 4),
+            'refused_calls': self.refused,
+            'exhausted': self.reason
+        }
+
+
+def current_budget() -> Optional[AnalysisBudget]:
+    return _current_budget.get()
+
+
+@contextmanager
+def active(budget: Optional[AnalysisBudget]):
+    """Admit the block's upstream calls against the budget (no-op for None)"""
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
@@ -0,0 +1,232 @@
+"""
+Row-by-row export of stored niche analyses.
+
+Rows are produced lazily from the results dict and encoded one at a time
+(CSV, NDJSON) or one row group at a time (Parquet), so a large agency export
+never builds the whole file in memory.
+"""
+import csv
+import importlib.util
+import uuid
+from typing import Dict, Any, List, Iterable, Iterator, Callable, Tuple
+
+from utils import json_codec
+
+# pyarrow is only imported when a Parquet export runs
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+KEYWORD_FIELDS = ['keyword', 'type', 'intent', 'search_volume_score', 'competition', 'value_score']
+# Prepended to every row of a bulk export
+BULK_FIELDS = ['analysis_id', 'query', 'location']
+
+# Parquet column types; every other export field is a string. All columns are
+# nullable and the schema is fixed up front, so a column that is empty in the
+# first row group still takes values later.
+COLUMN_TYPES = {
+    'search_volume_score': 'float64',
+    'value_score': 'int64',
+    'rating': 'float64',
+    'reviews_count': 'int64',
+    'h1_count': 'int64',
+    'h2_count': 'int64'
+}
+
+
+def new_analysis_id() -> str:
+    """ID of one analysis run (runs of the same inputs get different IDs)"""
+    return uuid.uuid4().hex
+
+
+def is_analysis(payload: str, analysis_id: str) -> bool:
+    """Whether a stored analysis payload is that run, without parsing it"""
+    # Results dicts start with their ID and the cache stores compact JSON
+    return payload.startswith(f'{{"analysis_id":"{analysis_id}"')
+
+
+def _keyword_row(kw: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'keyword': kw.get('keyword', ''),
+        'type': kw.get('type', ''),
+        'intent': kw.get('intent', ''),
+        'search_volume_score': kw.get('search_volume_score', 0),
+        'competition': kw.get('competition', 'unknown'),
+        'value_score': kw.get('value_score')
+    }
+
+
+def _keyword_rows(results: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for kw in (results.get('keywords') or {}).get('all_keywords', []):
+        yield _keyword_row(kw)
+
+
+def _competitor_rows(results: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for comp in (results.get('competitors') or {}).get('detailed_analysis', []):
+        local_data = comp.get('local_data') or {}
+        seo_data = comp.get('seo_data') or {}
+        yield {
+            'name': comp.get('name', ''),
+            'url': comp.get('url', ''),
+            'type': comp.get('type', ''),
+            'rating': local_data.get('rating'),
+            'reviews_count': local_data.get('reviews_count'),
+            'title': seo_data.get('title', ''),
+            'h1_count': len(seo_data.get('h1_tags', [])),
+            'h2_count': len(seo_data.get('h2_tags', [])),
+            'keywords': '; '.join(map(str, comp.get('keywords', []))),
+            'strengths': '; '.join(map(str, comp.get('strengths', []))),
+            'weaknesses': '; '.join(map(str, comp.get('weaknesses', [])))
+        }
+
+
+def _opportunity_rows(results: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for opportunity_type, items in (results.get('opportunities') or {}).items():
+        for item in items:
+            if isinstance(item, dict):
+                yield {'opportunity_type': opportunity_type, **_keyword_row(item)}
+            else:
+                yield {'opportunity_type': opportunity_type, **_keyword_row({'keyword': item})}
+
+
+# section -> (column names, row generator)
+SECTIONS: Dict[str, Tuple[List[str], Callable[[Dict[str, Any]], Iterator[Dict[str, Any]]]]] = {
+    'keywords': (KEYWORD_FIELDS, _keyword_rows),
+    'competitors': (['name', 'url', 'type', 'rating', 'reviews_count', 'title', 'h1_count',
+                     'h2_count', 'keywords', 'strengths', 'weaknesses'], _competitor_rows),
+    'opportunities': (['opportunity_type'] + KEYWORD_FIELDS, _opportunity_rows)
+}
+
+
+def iter_rows(results: Dict[str, Any], section: str) -> Iterator[Dict[str, Any]]:
+    """Rows of one section of an analysis"""
+    return SECTIONS[section][1](results)
+
+
+def iter_bulk_rows(analyses: Iterable[Dict[str, Any]], section: str) -> Iterator[Dict[str, Any]]:
+    """Rows of one section across many analyses, tagged with analysis ID, query and location"""
+    for results in analyses:
+        tags = {
+            'analysis_id': results.get('analysis_id', ''),
+            'query': results.get('query', ''),
+            'location': results.get('location', '')
+        }
+        for row in iter_rows(results, section):
+            yield {**tags, **row}
+
+
+class _LineBuffer:
+    """File-like target that hands back whatever csv.writer wrote"""
+
+    def __init__(self):
+        self.value = ''
+
+    def write(self, value: str):
+        self.value = value
+
+
+def stream_csv(rows: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[str]:
+    """Header, then one CSV line per row"""
+    buffer = _LineBuffer()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.value
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.value
+
+
+def stream_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """One JSON object per line"""
+    for row in rows:
+        yield json_codec.dumps(row) + '\n'
+
+
+class _ChunkSink:
+    """Write-only file object for ParquetWriter that can be drained between row groups"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _coerce(value: Any, kind: str) -> Any:
+    """Value for a Parquet column type; numbers that don't parse become null"""
+    if value is None:
+        return None
+    if kind == 'string':
+        return value if isinstance(value, str) else str(value)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if number != number or number in (float('inf'), float('-inf')):
+        return None
+    return int(number) if kind == 'int64' else number
+
+
+def stream_parquet(rows: Iterable[Dict[str, Any]], fields: List[str], batch_size: int = 5000) -> Iterator[bytes]:
+    """Parquet file written one row group per batch_size rows (requires pyarrow)"""
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    kinds = [COLUMN_TYPES.get(field, 'string') for field in fields]
+    schema = pa.schema([pa.field(field, getattr(pa, kind)(), nullable=True) for field, kind in zip(fields, kinds)])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    batch = []
+
+    def write_batch():
+        arrays = [pa.array([_coerce(row.get(field), kind) for row in batch], type=schema.field(field).type)
+                  for field, kind in zip(fields, kinds)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            write_batch()
+            batch = []
+            yield sink.drain()
+
+    if batch:
+        write_batch()
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(rows: Iterable[Dict[str, Any]], fields: List[str], fmt: str) -> Iterator:
+    """Encode rows in an export format"""
+    if fmt == 'csv':
+        return stream_csv(rows, fields)
+    if fmt == 'ndjson':
+        return stream_ndjson(rows)
+    if fmt == 'parquet':
+        return stream_parquet(rows, fields)
+    raise ValueError(f"Unknown export format: {fmt}")
@@ -0,0 +1,132 @@
+from typing import Dict, Any, List, Callable, Awaitable, Iterator, Tuple
+import string
+
+QUESTION_WORDS = ['how', 'what', 'why', 'when', 'where', 'who', 'which',
+                  'can', 'does', 'is', 'should', 'will', 'cost of']
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def localized_query(query: str, location: str = None) -> str:
+    """Query with the location appended, ready for a letter or question word"""
+    return f"{query} {location}" if location else query
+
+
+class SuggestionTrie:
+    """
+    Character trie of autocomplete suggestions.
+    Duplicates (case/whitespace-insensitive) collapse into one entry that
+    keeps the best (lowest) rank and the prefix that produced it.
+    """
+
+    _END = '\0'
+
+    def __init__(self):
+        self.root: Dict[str, Any] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, suggestion: str) -> bool:
+        node = self._find(_normalize(suggestion))
+        return node is not None and self._END in node
+
+    def insert(self, suggestion: str, rank: int, source: str) -> bool:
+        """Add a suggestion; returns True if it was new"""
+        node = self.root
+        for char in _normalize(suggestion):
+            node = node.setdefault(char, {})
+        entry = node.get(self._END)
+        if entry is None:
+            node[self._END] = {'suggestion': suggestion, 'rank': rank, 'source': source}
+            self._size += 1
+            return True
+        if rank < entry['rank']:
+            entry.update(rank=rank, source=source)
+        return False
+
+    def _find(self, prefix: str):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _walk(self, node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for key, child in current.items():
+                if key == self._END:
+                    yield child
+                else:
+                    stack.append(child)
+
+    def with_prefix(self, prefix: str) -> List[Dict[str, Any]]:
+        """Entries under a prefix, best rank first"""
+        node = self._find(_normalize(prefix))
+        if node is None:
+            return []
+        return sorted(self._walk(node), key=lambda e: (e['rank'], e['suggestion']))
+
+    def ranked(self) -> List[Dict[str, Any]]:
+        """All entries, best rank first"""
+        return self.with_prefix('')
+
+
+class AutocompleteExpander:
+    """
+    Recursive "alphabet soup" expansion of a seed keyword.
+
+    Depth 1 queries the seed, seed + each letter and each question word +
+    seed. Deeper levels extend the letter prefixes that came back full
+    (saturated), e.g. "hvac repair c" -> "hvac repair ca", "hvac repair cb".
+    Each level is fetched as one concurrent batch; the request budget caps
+    the total number of prefixes.
+
+    The location goes into the seed ("hvac repair pelham al c"), so the
+    letter being completed is always the end of the query.
+    """
+
+    SATURATED = 10  # The endpoint returns at most 10 suggestions
+
+    def __init__(self, fetch_batch: Callable[[List[str]], Awaitable[Dict[str, List[str]]]],
+                 max_depth: int = 2, budget: int = 80):
+        self.fetch_batch = fetch_batch
+        self.max_depth = max_depth
+        self.budget = budget
+
+    async def expand(self, seed: str, location: str = None) -> Tuple[SuggestionTrie, Dict[str, Any]]:
+        """Expand a seed and return the suggestion trie plus run stats"""
+        trie = SuggestionTrie()
+        stats = {'prefixes': 0, 'depth_reached': 0, 'suggestions': 0}
+        seed = localized_query(seed, location)
+
+        level = [seed] + [f"{seed} {letter}" for letter in string.ascii_lowercase] + \
+                [f"{word} {seed}" for word in QUESTION_WORDS]
+
+        depth = 1
+        while level and depth <= self.max_depth and stats['prefixes'] < self.budget:
+            level = level[:self.budget - stats['prefixes']]
+            results = await self.fetch_batch(level)
+            stats['prefixes'] += len(level)
+            stats['depth_reached'] = depth
+
+            saturated = []
+            for prefix in level:
+                suggestions = results.get(prefix, [])
+                for rank, suggestion in enumerate(suggestions, start=1):
+                    trie.insert(suggestion, rank, prefix)
+                # Only letter prefixes recurse; question forms are already specific
+                if len(suggestions) >= self.SATURATED and prefix.startswith(seed) and prefix != seed:
+                    saturated.append(prefix)
+
+            level = [f"{prefix}{letter}" for prefix in saturated for letter in string.ascii_lowercase]
+            depth += 1
+
+        stats['suggestions'] = len(trie)
+        return trie, stats
@@ -1,22 +1,113 @@
 import asyncio
-import aiohttp
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from config.config import Config
+from utils.scrape_governor import BROWSER_GOVERNOR, HTTP_GOVERNOR
+from utils.analysis_budget import BudgetExhausted
+from utils.autocomplete_expander import localized_query
+from utils import tracing, metrics
+from utils.dom_extraction import (
+    SERP_EXTRACTION_SCRIPT, COMPETITOR_EXTRACTION_SCRIPT, MAPS_EXTRACTION_SCRIPT,
+    parse_competitor_payload, parse_maps_payload
+)
+from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
 import json
-from typing import List, Dict, Any
+import threading
 import time
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+# Selenium and aiohttp are imported where they're used, so processes that
+# never scrape (and worker start-up) don't pay for loading them
+
+# Third-party analytics/ads hosts that never affect extracted data
+ANALYTICS_URL_PATTERNS = [
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*googleadservices.com*', '*facebook.net*',
+    '*connect.facebook.com*', '*hotjar.com*', '*clarity.ms*', '*segment.io*',
+    '*hubspot.com*', '*intercom.io*', '*newrelic.com*', '*nr-data.net*'
+]
+IMAGE_URL_PATTERNS = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.avif']
+FONT_URL_PATTERNS = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+MEDIA_URL_PATTERNS = ['*.mp4', '*.webm', '*.mp3', '*.wav', '*.ogg', '*.m3u8']
+
+# Loading profile per scrape type. 'eager' returns from driver.get once the
+# DOM is parsed instead of waiting for every subresource; scrapers wait for
+# the elements they need explicitly. Stylesheets are never blocked because
+# extraction reads rendered text.
+LOAD_PROFILES = {
+    'serp': {'block_images': True, 'block_fonts': True, 'block_media': True,
+             'block_analytics': True, 'page_load_strategy': 'eager'},
+    'autocomplete': {'block_images': True, 'block_fonts': True, 'block_media': True,
+                     'block_analytics': True, 'page_load_strategy': 'eager'},
+    # Map tiles are images; the result list itself is rendered from script
+    'maps': {'block_images': True, 'block_fonts': True, 'block_media': True,
+             'block_analytics': True, 'page_load_strategy': 'eager',
+             'extra_blocked': ['*maps/vt*', '*streetviewpixels*', '*/maps/preview/photo*']},
+    # Embedded players, map widgets and chat bubbles on small-business sites
+    'competitor': {'block_images': True, 'block_fonts': True, 'block_media': True,
+                   'block_analytics': True, 'page_load_strategy': 'eager',
+                   'extra_blocked': ['*youtube.com/embed*', '*player.vimeo.com*', '*maps.googleapis.com*',
+                                     '*widget.intercom.io*', '*js.driftt.com*', '*tawk.to*']}
+}
+
+MAPS_RESULT_COUNT_SCRIPT = """return document.querySelectorAll('div[role="article"]').length;"""
+READY_STATE_SCRIPT = "return document.readyState;"
+
+# Reads transfer sizes the browser recorded for the page and its resources.
+# A lower bound: Resource Timing reports transferSize 0 for cross-origin
+# resources served without Timing-Allow-Origin.
+TRANSFERRED_BYTES_SCRIPT = """
+return performance.getEntriesByType('navigation')
+    .concat(performance.getEntriesByType('resource'))
+    .reduce((total, entry) => total + (entry.transferSize || 0), 0);
+"""
+
+
+class ScrapeStats:
+    """Thread-safe per-scrape-type counters for browser sessions"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        
+    # transferred_bytes is a lower bound (see TRANSFERRED_BYTES_SCRIPT)
+    def record(self, scrape_type: str, seconds: float, transferred_bytes: int, success: bool,
+               failure: str = None):
+        metrics.SCRAPE_DURATION.observe(seconds, type=scrape_type)
+        metrics.SCRAPE_BYTES.inc(transferred_bytes, type=scrape_type)
+        if not success:
+            metrics.SCRAPE_FAILURES.inc(type=scrape_type, reason=failure or 'unknown')
+        with self._lock:
+            stats = self._stats.setdefault(scrape_type, {
+                'sessions': 0, 'failures': 0, 'seconds': 0.0, 'bytes': 0
+            })
+            stats['sessions'] += 1
+            stats['failures'] += 0 if success else 1
+            stats['seconds'] += seconds
+            stats['bytes'] += transferred_bytes
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Totals and per-session averages by scrape type"""
+        with self._lock:
+            snapshot = {}
+            for scrape_type, stats in self._stats.items():
+                sessions = stats['sessions'] or 1
+                snapshot[scrape_type] = dict(stats,
+                                             avg_seconds=round(stats['seconds'] / sessions, 3),
+                                             avg_bytes=int(stats['bytes'] / sessions))
+            return snapshot
+
+
+# Shared by every client instance in the process
+SCRAPE_STATS = ScrapeStats()
+
 
 class BrightDataClient:
     def __init__(self):
         self.proxy_url = f"http://{Config.BRIGHTDATA_USERNAME}:{Config.BRIGHTDATA_PASSWORD}@{Config.BRIGHTDATA_HOST}:{Config.BRIGHTDATA_PORT}"
         
-    def _get_chrome_options(self):
-        """Configure Chrome options for BrightData proxy"""
+    def _get_chrome_options(self, profile: Dict[str, Any] = None):
+        """Configure Chrome options for BrightData proxy and a loading profile"""
+        from selenium.webdriver.chrome.options import Options
         options = Options()
         options.add_argument(f'--proxy-server={self.proxy_url}')
         options.add_argument('--no-sandbox')
@@ -24,263 +115,270 @@ class BrightDataClient:
         options.add_argument('--disable-blink-features=AutomationControlled')
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
+        
+        if profile and Config.SCRAPE_BLOCK_RESOURCES:
+            options.page_load_strategy = profile.get('page_load_strategy', 'normal')
+            if profile.get('block_images'):
+                options.add_argument('--blink-settings=imagesEnabled=false')
+                options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
         return options
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    async def scrape_google_serp(self, query: str, location: str = None) -> Dict[str, Any]:
-        """Scrape Google SERP for a given query"""
+    def _blocked_url_patterns(self, profile: Dict[str, Any]) -> List[str]:
+        """URL patterns to block at the network layer for a profile"""
+        patterns = list(Config.SCRAPE_EXTRA_BLOCKED_URLS)
+        if profile.get('block_images'):
+            patterns += IMAGE_URL_PATTERNS
+        if profile.get('block_fonts'):
+            patterns += FONT_URL_PATTERNS
+        if profile.get('block_media'):
+            patterns += MEDIA_URL_PATTERNS
+        if profile.get('block_analytics'):
+            patterns += ANALYTICS_URL_PATTERNS
+        return patterns + profile.get('extra_blocked', [])
+    
+    @contextmanager
+    def _browser_session(self, scrape_type: str):
+        """Open a browser with the scrape type's loading profile and record its cost"""
+        from selenium import webdriver
+        profile = LOAD_PROFILES.get(scrape_type, {})
+        start = time.perf_counter()
+        transferred = 0
+        success = False
+        failure = None
         driver = None
         try:
-            driver = webdriver.Chrome(options=self._get_chrome_options())
-            
-            # Build search URL
-            search_query = f"{query} {location}" if location else query
-            url = f"https://www.google.com/search?q={search_query}"
-            
-            driver.get(url)
-            wait = WebDriverWait(driver, Config.SCRAPE_TIMEOUT / 1000)
-            
-            results = {
-                'organic_results': [],
-                'ads': [],
-                'local_pack': [],
-                'people_also_ask': [],
-                'related_searches': [],
-                'people_also_search_for': [],
-                'featured_snippet': None,
-                'knowledge_panel': None
-            }
-            
-            # Organic results
-            organic_elements = driver.find_elements(By.CSS_SELECTOR, 'div.g')
-            for element in organic_elements[:10]:
-                try:
-                    title = element.find_element(By.CSS_SELECTOR, 'h3').text
-                    link = element.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                    snippet = element.find_element(By.CSS_SELECTOR, 'span.VwiC3b').text
-                    
-                    results['organic_results'].append({
-                        'title': title,
-                        'url': link,
-                        'snippet': snippet,
-                        'position': len(results['organic_results']) + 1
-                    })
-                except:
-                    continue
-            
-            # Ads
-            ad_elements = driver.find_elements(By.CSS_SELECTOR, 'div[data-text-ad]')
-            for ad in ad_elements:
-                try:
-                    results['ads'].append({
-                        'title': ad.find_element(By.CSS_SELECTOR, 'div[role="heading"]').text,
-                        'url': ad.find_element(By.CSS_SELECTOR, 'a').get_attribute('href'),
-                        'description': ad.find_element(By.CSS_SELECTOR, 'div.Va3FIb').text
-                    })
-                except:
-                    continue
-            
-            # Local Pack
-            try:
-                local_pack = driver.find_element(By.CSS_SELECTOR, 'div[jscontroller][data-async-context]')
-                places = local_pack.find_elements(By.CSS_SELECTOR, 'div[jsaction*="mouseover"]')
-                for place in places[:3]:
+            with tracing.span('browser.start', scrape_type=scrape_type):
+                driver = webdriver.Chrome(options=self._get_chrome_options(profile))
+                if Config.SCRAPE_BLOCK_RESOURCES:
                     try:
-                        name = place.find_element(By.CSS_SELECTOR, 'div[role="heading"]').text
-                        results['local_pack'].append({
-                            'name': name,
-                            'position': len(results['local_pack']) + 1
-                        })
-                    except:
-                        continue
-            except:
-                pass
-            
-            # People Also Ask
-            try:
-                paa_elements = driver.find_elements(By.CSS_SELECTOR, 'div[jsname="yEVEwb"]')
-                for paa in paa_elements:
-                    question = paa.find_element(By.CSS_SELECTOR, 'span').text
-                    results['people_also_ask'].append(question)
-            except:
-                pass
-            
-            # Related searches
-            try:
-                related = driver.find_elements(By.CSS_SELECTOR, 'div[data-hveid] a')
-                for rel in related:
-                    text = rel.text.strip()
-                    if text:
-                        results['related_searches'].append(text)
-            except:
-                pass
-            
-            return results
-            
+                        driver.execute_cdp_cmd('Network.enable', {})
+                        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self._blocked_url_patterns(profile)})
+                    except Exception as e:
+                        print(f"[BrightData] Resource blocking unavailable: {str(e)}")
+            yield driver
+            success = True
+        except Exception as e:
+            failure = type(e).__name__
+            raise
         finally:
             if driver:
+                try:
+                    transferred = int(driver.execute_script(TRANSFERRED_BYTES_SCRIPT) or 0)
+                except Exception:
+                    pass
                 driver.quit()
+            tracing.current_span().add('bytes', transferred)
+            SCRAPE_STATS.record(scrape_type, time.perf_counter() - start, transferred, success, failure)
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Session count, failures, seconds and transferred bytes (a lower bound) by scrape type"""
+        return SCRAPE_STATS.snapshot()
+    
+    async def scrape_google_serp(self, query: str, location: str = None) -> Dict[str, Any]:
+        """Scrape Google SERP for a given query"""
+        with tracing.span('brightdata.serp', query=query, location=location):
+            return await self._scrape_google_serp_attempts(query, location)
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10),
+           retry=retry_if_not_exception_type(BudgetExhausted), before_sleep=tracing.record_retry)
+    async def _scrape_google_serp_attempts(self, query: str, location: str = None) -> Dict[str, Any]:
+        # The browser session blocks, keep it off the event loop
+        return await BROWSER_GOVERNOR.run_in_thread(self._scrape_google_serp_session, query, location)
+    
+    def _scrape_google_serp_session(self, query: str, location: str = None) -> Dict[str, Any]:
+        """Run one browser session for a SERP and extract it in a single script call"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        with self._browser_session('serp') as driver:
+            # Build search URL
+            search_query = f"{query} {location}" if location else query
+            url = f"{Config.GOOGLE_BASE_URL}/search?q={search_query}"
+            
+            with tracing.span('browser.navigate'):
+                driver.get(url)
+                
+                # 'eager' returns at DOMContentLoaded: wait for the result list, then
+                # briefly for the load event so script-inserted blocks (local pack, PAA) are in
+                WebDriverWait(driver, Config.SCRAPE_TIMEOUT / 1000).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, '#rso, #search'))
+                )
+                try:
+                    WebDriverWait(driver, Config.SERP_SETTLE_TIMEOUT, poll_frequency=0.1).until(
+                        lambda d: d.execute_script(READY_STATE_SCRIPT) == 'complete'
+                    )
+                except TimeoutException:
+                    pass  # Extract whatever has rendered
+            
+            with tracing.span('browser.extract'):
+                return driver.execute_script(SERP_EXTRACTION_SCRIPT)
     
     async def scrape_google_autocomplete(self, query: str, location: str = None) -> List[str]:
         """Get Google autocomplete suggestions"""
+        async with self._autocomplete_session() as session:
+            return await self._fetch_autocomplete(session, query, location)
+    
+    async def scrape_google_autocomplete_batch(self, queries: List[str], location: str = None) -> Dict[str, List[str]]:
+        """
+        Fetch autocomplete suggestions for many queries concurrently from the
+        suggestion endpoint, over one pooled HTTP session. Failed queries are
+        left out of the result.
+        """
+        with tracing.span('brightdata.autocomplete_batch', queries=len(queries)) as batch_span:
+            async with self._autocomplete_session() as session:
+                results = await asyncio.gather(
+                    *(self._fetch_autocomplete(session, query, location) for query in queries),
+                    return_exceptions=True
+                )
+            
+            suggestions = {}
+            for query, result in zip(queries, results):
+                if isinstance(result, Exception):
+                    print(f"[BrightData] Autocomplete failed for {query}: {str(result)}")
+                    batch_span.add('failures')
+                    continue
+                suggestions[query] = result
+            return suggestions
+    
+    def _autocomplete_session(self) -> 'aiohttp.ClientSession':
+        """HTTP session with a connection pool sized for concurrent prefix lookups"""
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=Config.AUTOCOMPLETE_CONCURRENCY)
+        timeout = aiohttp.ClientTimeout(total=Config.SCRAPE_TIMEOUT / 1000)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+    
+    async def _fetch_autocomplete(self, session: 'aiohttp.ClientSession', query: str, location: str = None) -> List[str]:
+        """One suggestion endpoint request"""
+        search_query = localized_query(query, location)
+        proxy = self.proxy_url if Config.BRIGHTDATA_HOST else None
+        params = {'client': 'firefox', 'hl': 'en', 'q': search_query}
+        
+        async with HTTP_GOVERNOR.slot():
+            start = time.perf_counter()
+            success = False
+            failure = None
+            body = b''
+            with tracing.span('brightdata.autocomplete') as fetch_span:
+                try:
+                    async with session.get(Config.AUTOCOMPLETE_ENDPOINT, params=params, proxy=proxy) as response:
+                        response.raise_for_status()
+                        body = await response.read()
+                    # Response format: [query, [suggestion, ...], ...]
+                    payload = json.loads(body.decode('utf-8', errors='replace'))
+                    success = True
+                except Exception as e:
+                    failure = type(e).__name__
+                    raise
+                finally:
+                    fetch_span.set('bytes', len(body))
+                    SCRAPE_STATS.record('autocomplete', time.perf_counter() - start, len(body), success, failure)
+        
         suggestions = []
-        driver = None
+        for text in payload[1] if len(payload) > 1 else []:
+            text = text.strip()
+            if text and text != search_query:
+                suggestions.append(text)
         
-        try:
-            driver = webdriver.Chrome(options=self._get_chrome_options())
-            driver.get("https://www.google.com")
-            
-            search_box = driver.find_element(By.NAME, "q")
-            search_query = f"{query} {location}" if location else query
-            
-            # Type slowly to trigger autocomplete
-            for char in search_query:
-                search_box.send_keys(char)
-                await asyncio.sleep(0.1)
-            
-            # Wait for suggestions
-            await asyncio.sleep(1)
-            
-            # Get suggestions
-            suggestion_elements = driver.find_elements(By.CSS_SELECTOR, 'li[role="option"] span')
-            for element in suggestion_elements:
-                text = element.text.strip()
-                if text and text != search_query:
-                    suggestions.append(text)
-            
-            return suggestions[:10]  # Top 10 suggestions
-            
-        finally:
-            if driver:
-                driver.quit()
+        return suggestions[:10]  # Top 10 suggestions
     
     async def scrape_competitor_site(self, url: str) -> Dict[str, Any]:
         """Scrape competitor website for SEO data"""
-        driver = None
-        try:
-            driver = webdriver.Chrome(options=self._get_chrome_options())
-            driver.get(url)
-            wait = WebDriverWait(driver, Config.SCRAPE_TIMEOUT / 1000)
-            
-            # Wait for page to load
-            wait.until(EC.presence_of_element_located((By.TAG_NAME, "h1")))
-            
-            data = {
-                'url': url,
-                'title': driver.title,
-                'h1_tags': [],
-                'h2_tags': [],
-                'meta_description': '',
-                'schema_types': [],
-                'internal_links': [],
-                'images_alt_text': []
-            }
-            
-            # H1 tags
-            h1_elements = driver.find_elements(By.TAG_NAME, 'h1')
-            data['h1_tags'] = [h1.text.strip() for h1 in h1_elements if h1.text.strip()]
-            
-            # H2 tags
-            h2_elements = driver.find_elements(By.TAG_NAME, 'h2')
-            data['h2_tags'] = [h2.text.strip() for h2 in h2_elements if h2.text.strip()]
-            
-            # Meta description
-            try:
-                meta_desc = driver.find_element(By.CSS_SELECTOR, 'meta[name="description"]')
-                data['meta_description'] = meta_desc.get_attribute('content')
-            except:
-                pass
-            
-            # Schema markup
+        with tracing.span('brightdata.competitor', url=url):
+            return await BROWSER_GOVERNOR.run_in_thread(self._scrape_competitor_site_session, url)
+    
+    def _scrape_competitor_site_session(self, url: str) -> Dict[str, Any]:
+        """Run one browser session for a competitor page and extract it in a single script call"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        with self._browser_session('competitor') as driver:
+            with tracing.span('browser.navigate'):
+                driver.get(url)
+                wait = WebDriverWait(driver, Config.SCRAPE_TIMEOUT / 1000)
+                
+                # Wait for page to load
+                wait.until(EC.presence_of_element_located((By.TAG_NAME, "h1")))
+            
+            with tracing.span('browser.extract'):
+                base_domain = url.split('/')[2]
+                payload = driver.execute_script(COMPETITOR_EXTRACTION_SCRIPT, base_domain)
+                return parse_competitor_payload(payload, url)
+    
+    async def check_site_validators(self, url: str, etag: str = None, last_modified: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Conditional HEAD request for a site's ETag/Last-Modified validators.
+        Returns None when the check itself fails, so callers fall back to a full scrape.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
+        import aiohttp
+        proxy = self.proxy_url if Config.BRIGHTDATA_HOST else None
+        with tracing.span('brightdata.validators', url=url) as check_span:
             try:
-                scripts = driver.find_elements(By.CSS_SELECTOR, 'script[type="application/ld+json"]')
-                for script in scripts:
-                    try:
-                        schema_data = json.loads(script.get_attribute('innerHTML'))
-                        if '@type' in schema_data:
-                            data['schema_types'].append(schema_data['@type'])
-                    except:
-                        continue
-            except:
-                pass
-            
-            # Internal links
-            links = driver.find_elements(By.TAG_NAME, 'a')
-            base_domain = url.split('/')[2]
-            for link in links[:50]:  # Limit to 50 links
-                href = link.get_attribute('href')
-                if href and base_domain in href:
-                    data['internal_links'].append({
-                        'url': href,
-                        'anchor_text': link.text.strip()
-                    })
-            
-            return data
-            
-        finally:
-            if driver:
-                driver.quit()
+                timeout = aiohttp.ClientTimeout(total=10)
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    async with session.head(url, headers=headers, proxy=proxy, allow_redirects=True) as response:
+                        new_etag = response.headers.get('ETag')
+                        new_last_modified = response.headers.get('Last-Modified')
+                        # Servers that ignore conditional HEADs still return comparable validators
+                        not_modified = response.status == 304 or bool(
+                            (etag and new_etag == etag) or
+                            (not etag and last_modified and new_last_modified == last_modified)
+                        )
+                        check_span.set('not_modified', not_modified)
+                        return {
+                            'status': response.status,
+                            'etag': new_etag or etag,
+                            'last_modified': new_last_modified or last_modified,
+                            'not_modified': not_modified
+                        }
+            except Exception as e:
+                print(f"[BrightData] Validator check failed for {url}: {str(e)}")
+                return None
     
     async def scrape_google_maps(self, query: str, location: str) -> List[Dict[str, Any]]:
         """Scrape Google Maps for local businesses"""
-        driver = None
-        try:
-            driver = webdriver.Chrome(options=self._get_chrome_options())
-            
+        with tracing.span('brightdata.maps', query=query, location=location):
+            return await BROWSER_GOVERNOR.run_in_thread(self._scrape_google_maps_session, query, location)
+    
+    def _scrape_google_maps_session(self, query: str, location: str) -> List[Dict[str, Any]]:
+        """Run one browser session for a Maps search"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        with self._browser_session('maps') as driver:
             # Go to Google Maps
-            maps_url = f"https://www.google.com/maps/search/{query}+{location}"
-            driver.get(maps_url)
-            
-            # Wait for results to load
-            wait = WebDriverWait(driver, Config.SCRAPE_TIMEOUT / 1000)
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="article"]')))
-            
-            # Scroll to load more results
-            results_container = driver.find_element(By.CSS_SELECTOR, 'div[role="feed"]')
-            for _ in range(3):  # Scroll 3 times
-                driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", results_container)
-                await asyncio.sleep(2)
-            
-            businesses = []
-            business_elements = driver.find_elements(By.CSS_SELECTOR, 'div[role="article"]')
-            
-            for element in business_elements[:20]:  # Top 20 results
-                try:
-                    name = element.find_element(By.CSS_SELECTOR, 'div[class*="fontHeadlineSmall"]').text
-                    
-                    business_data = {
-                        'name': name,
-                        'rating': None,
-                        'reviews_count': None,
-                        'category': None,
-                        'address': None,
-                        'phone': None,
-                        'website': None
-                    }
-                    
-                    # Try to get rating
-                    try:
-                        rating_text = element.find_element(By.CSS_SELECTOR, 'span[role="img"]').get_attribute('aria-label')
-                        if rating_text:
-                            rating = float(rating_text.split()[0])
-                            business_data['rating'] = rating
-                    except:
-                        pass
-                    
-                    # Try to get review count
+            maps_url = f"{Config.GOOGLE_BASE_URL}/maps/search/{query}+{location}"
+            with tracing.span('browser.navigate'):
+                driver.get(maps_url)
+                
+                # Wait for results to load
+                wait = WebDriverWait(driver, Config.SCRAPE_TIMEOUT / 1000)
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="article"]')))
+            
+            # Scroll to load more results, waiting for new results instead of a fixed sleep
+            with tracing.span('browser.scroll') as scroll_span:
+                results_container = driver.find_element(By.CSS_SELECTOR, 'div[role="feed"]')
+                for _ in range(3):  # Scroll up to 3 times
+                    count = driver.execute_script(MAPS_RESULT_COUNT_SCRIPT)
+                    if count >= 20:  # Enough for the top 20
+                        break
+                    scroll_span.add('scrolls')
+                    driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", results_container)
                     try:
-                        reviews = element.find_element(By.CSS_SELECTOR, 'span[aria-label*="reviews"]').text
-                        business_data['reviews_count'] = reviews.strip('()')
-                    except:
-                        pass
-                    
-                    businesses.append(business_data)
-                    
-                except:
-                    continue
+                        WebDriverWait(driver, Config.MAPS_SCROLL_TIMEOUT, poll_frequency=0.2).until(
+                            lambda d: d.execute_script(MAPS_RESULT_COUNT_SCRIPT) > count
+                        )
+                    except TimeoutException:
+                        break  # End of the result list
             
-            return businesses
+            with tracing.span('browser.extract'):
+                businesses = parse_maps_payload(driver.execute_script(MAPS_EXTRACTION_SCRIPT))
             
-        finally:
-            if driver:
-                driver.quit()
\ No newline at end of file
+            return businesses
\ No newline at end of file
@@ -1,93 +1,474 @@
+import asyncio
 import json
-from typing import Any, Optional
+import threading
+import time
+import weakref
+from typing import Any, Optional, Dict, List, Callable, Awaitable
 try:
     import redis
+    import redis.asyncio as aioredis
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
 
 from config.config import Config
+from utils.circuit_breaker import CircuitBreaker
+from utils import json_codec, tracing, metrics
 from utils.simple_cache import SimpleFileCache
 
+# One breaker and one connection pool per process, shared by every agent's
+# CacheManager so an outage is detected once and connections are bounded
+REDIS_BREAKER = CircuitBreaker('redis', failure_threshold=Config.REDIS_BREAKER_THRESHOLD,
+                               reset_timeout=Config.REDIS_HEALTH_CHECK_INTERVAL)
+_redis_client = None
+_redis_lock = threading.Lock()
+_fallbacks = {'reads': 0, 'writes': 0}
+_lookups = {'hits': 0, 'misses': 0}
+# redis.asyncio connections are bound to the loop that opened them, and each
+# Flask request runs its own loop, so async clients are kept per loop. Each
+# loop gets a small pool, so a process holds at most REDIS_MAX_CONNECTIONS
+# plus REDIS_LOOP_MAX_CONNECTIONS per concurrent request (WEB_THREADS per
+# worker under gunicorn).
+_async_clients = weakref.WeakKeyDictionary()
+# What redis-py raises when no pooled connection frees up in time
+POOL_EXHAUSTED_ERRORS = ('No connection available.', 'Too many connections')
+
+
+def _shared_redis_client():
+    """Redis client over the shared, explicitly sized pool (created once)"""
+    global _redis_client
+    with _redis_lock:
+        if _redis_client is None:
+            # Callers wait briefly for a free connection instead of failing at once
+            pool = redis.BlockingConnectionPool.from_url(
+                Config.REDIS_URL,
+                max_connections=Config.REDIS_MAX_CONNECTIONS,
+                timeout=Config.REDIS_POOL_TIMEOUT,
+                socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=Config.REDIS_CONNECT_TIMEOUT,
+                decode_responses=True
+            )
+            _redis_client = redis.Redis(connection_pool=pool)
+            try:
+                _redis_client.ping()
+                print("[Cache] Using Redis cache")
+            except Exception:
+                # Start degraded; health probes switch back once Redis answers
+                REDIS_BREAKER.trip()
+                print("[Cache] Redis not available, using file cache")
+        return _redis_client
+
+
+def _redis_failed(description: str, error: Exception):
+    """Count a Redis error against the breaker, unless the pool was only busy"""
+    if str(error) in POOL_EXHAUSTED_ERRORS:
+        # Local load, not an outage: this call uses the file tier, the breaker stays closed
+        print(f"[Cache] Redis pool exhausted {description}")
+        return
+    REDIS_BREAKER.record_failure()
+    print(f"[Cache] Redis unavailable {description}: {str(error)}")
+
+
+def _count_lookups(keys: List[str], found):
+    """Count hits (keys in found) and misses, overall and per key prefix"""
+    hits = 0
+    for key in keys:
+        hit = key in found
+        hits += hit
+        metrics.CACHE_LOOKUPS.inc(prefix=metrics.cache_prefix(key), result='hit' if hit else 'miss')
+    _lookups['hits'] += hits
+    _lookups['misses'] += len(keys) - hits
+
+
+def _loop_redis_client():
+    """redis.asyncio client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        pool = aioredis.BlockingConnectionPool.from_url(
+            Config.REDIS_URL,
+            max_connections=Config.REDIS_LOOP_MAX_CONNECTIONS,
+            timeout=Config.REDIS_POOL_TIMEOUT,
+            socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=Config.REDIS_CONNECT_TIMEOUT,
+            decode_responses=True
+        )
+        client = aioredis.Redis.from_pool(pool)
+        _async_clients[loop] = client
+    return client
+
+
+async def aeval(script: str, keys: List[str], args: List[Any]) -> Any:
+    """
+    Run a Lua script on the loop's Redis client under the shared breaker.
+    Returns None when Redis is unavailable; callers degrade to local state.
+    """
+    if not REDIS_AVAILABLE or not REDIS_BREAKER.allow():
+        return None
+    start = time.perf_counter()
+    try:
+        result = await _loop_redis_client().eval(script, len(keys), *keys, *args)
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        _redis_failed('running script', e)
+        return None
+    REDIS_BREAKER.record_success(time.perf_counter() - start)
+    return result
+
+
+def eval_script(script: str, keys: List[str], args: List[Any]) -> Any:
+    """Blocking aeval on the shared client, for threads without an event loop"""
+    if not REDIS_AVAILABLE or not REDIS_BREAKER.allow():
+        return None
+    start = time.perf_counter()
+    try:
+        result = _shared_redis_client().eval(script, len(keys), *keys, *args)
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+        _redis_failed('running script', e)
+        return None
+    REDIS_BREAKER.record_success(time.perf_counter() - start)
+    return result
+
+
+async def close_loop_clients():
+    """Close the running loop's async Redis connections (call before loop.close())"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
 class CacheManager:
-    """Manages caching for the application (Redis or file-based)"""
-    
+    """Manages caching for the application (Redis with a local file-cache tier)"""
+
     def __init__(self):
         self.default_ttl = Config.CACHE_TTL
-        
-        # Try to use Redis, fall back to file cache
+
+        # The file cache is always there as the degraded tier
+        self.file_cache = SimpleFileCache()
         if REDIS_AVAILABLE:
-            try:
-                self.redis_client = redis.from_url(Config.REDIS_URL, decode_responses=True)
-                # Test connection
-                self.redis_client.ping()
-                self.use_redis = True
-                print("[Cache] Using Redis cache")
-            except:
-                self.use_redis = False
-                self.file_cache = SimpleFileCache()
-                print("[Cache] Redis not available, using file cache")
+            self.redis_client = _shared_redis_client()
         else:
-            self.use_redis = False
-            self.file_cache = SimpleFileCache()
+            self.redis_client = None
             print("[Cache] Using file cache (Redis not installed)")
-        
-    def get(self, key: str) -> Optional[str]:
-        """Get value from cache"""
-        if self.use_redis:
+
+    @property
+    def use_redis(self) -> bool:
+        """True while Redis is serving (breaker closed)"""
+        return self.redis_client is not None and REDIS_BREAKER.state == CircuitBreaker.CLOSED
+
+    def _redis_ready(self) -> bool:
+        """Whether to try Redis now; runs the health probe when the breaker is due one"""
+        if self.redis_client is None or not REDIS_BREAKER.allow():
+            return False
+        if REDIS_BREAKER.state == CircuitBreaker.HALF_OPEN:
+            start = time.perf_counter()
             try:
-                return self.redis_client.get(key)
+                self.redis_client.ping()
+            except Exception:
+                REDIS_BREAKER.record_failure()
+                return False
+            REDIS_BREAKER.record_success(time.perf_counter() - start)
+        return True
+
+    def _call(self, description: str, redis_op: Callable[[Any], Any], file_op: Callable[[], Any],
+              write: bool = False) -> Any:
+        """Run redis_op under the breaker, falling back to the file tier"""
+        if self._redis_ready():
+            start = time.perf_counter()
+            try:
+                result = redis_op(self.redis_client)
+            except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+                _redis_failed(description, e)
             except Exception as e:
-                print(f"[Cache] Error getting key {key}: {str(e)}")
-                return None
-        else:
-            return self.file_cache.get(key)
-    
+                print(f"[Cache] Error {description}: {str(e)}")
+            else:
+                REDIS_BREAKER.record_success(time.perf_counter() - start)
+                tracing.current_span().set('backend', 'redis')
+                return result
+
+        _fallbacks['writes' if write else 'reads'] += 1
+        tracing.current_span().set('backend', 'file')
+        return file_op()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get value from cache"""
+        with tracing.span('cache.get', key=key) as s:
+            value = self._call(f"getting key {key}",
+                               lambda client: client.get(key),
+                               lambda: self.file_cache.get(key))
+            s.set('hit', value is not None)
+            s.set('bytes', len(value) if value else 0)
+        _count_lookups([key], () if value is None else (key,))
+        return value
+
     def set(self, key: str, value: str, ttl: int = None) -> bool:
         """Set value in cache with TTL"""
         ttl = ttl or self.default_ttl
-        
-        if self.use_redis:
-            try:
-                return self.redis_client.setex(key, ttl, value)
-            except Exception as e:
-                print(f"[Cache] Error setting key {key}: {str(e)}")
-                return False
-        else:
-            return self.file_cache.set(key, value, ttl)
-    
+        with tracing.span('cache.set', key=key, bytes=len(value)):
+            return self._call(f"setting key {key}",
+                              lambda client: client.setex(key, ttl, value),
+                              lambda: self.file_cache.set(key, value, ttl),
+                              write=True)
+
+    def get_json(self, key: str) -> Any:
+        """Get a JSON value from cache, or None"""
+        cached = self.get(key)
+        return json_codec.loads(cached) if cached else None
+
+    def set_json(self, key: str, value: Any, ttl: int = None) -> bool:
+        """Set a JSON-serializable value in cache with TTL"""
+        return self.set(key, json_codec.dumps(value), ttl)
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Get several values in one round trip; missing keys are left out"""
+        if not keys:
+            return {}
+
+        def redis_op(client):
+            values = client.mget(keys)
+            return {key: value for key, value in zip(keys, values) if value is not None}
+
+        with tracing.span('cache.get_many', keys=len(keys)) as s:
+            values = self._call(f"getting {len(keys)} keys", redis_op,
+                                lambda: self.file_cache.get_many(keys))
+            s.set('hits', len(values))
+        _count_lookups(keys, values)
+        return values
+
+    def set_many(self, items: Dict[str, str], ttl: int = None) -> bool:
+        """Set several values with the same TTL in one pipelined round trip"""
+        if not items:
+            return True
+        ttl = ttl or self.default_ttl
+
+        def redis_op(client):
+            pipeline = client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipeline.setex(key, ttl, value)
+            return all(pipeline.execute())
+
+        with tracing.span('cache.set_many', keys=len(items)):
+            return self._call(f"setting {len(items)} keys", redis_op,
+                              lambda: self.file_cache.set_many(items, ttl),
+                              write=True)
+
+    def exists_many(self, keys: List[str]) -> Dict[str, bool]:
+        """Check several keys in one round trip"""
+        if not keys:
+            return {}
+
+        def redis_op(client):
+            pipeline = client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.exists(key)
+            return {key: count > 0 for key, count in zip(keys, pipeline.execute())}
+
+        def file_op():
+            found = self.file_cache.get_many(keys)
+            return {key: key in found for key in keys}
+
+        return self._call(f"checking {len(keys)} keys", redis_op, file_op)
+
     def delete(self, key: str) -> bool:
         """Delete key from cache"""
-        if self.use_redis:
-            try:
-                return self.redis_client.delete(key) > 0
-            except Exception as e:
-                print(f"[Cache] Error deleting key {key}: {str(e)}")
-                return False
-        else:
-            return self.file_cache.delete(key)
-    
+        return self._call(f"deleting key {key}",
+                          lambda client: client.delete(key) > 0,
+                          lambda: self.file_cache.delete(key),
+                          write=True)
+
     def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
-        if self.use_redis:
-            try:
-                return self.redis_client.exists(key) > 0
-            except Exception as e:
-                print(f"[Cache] Error checking key {key}: {str(e)}")
-                return False
-        else:
-            return self.file_cache.exists(key)
-    
+        return self._call(f"checking key {key}",
+                          lambda client: client.exists(key) > 0,
+                          lambda: self.file_cache.exists(key))
+
     def clear_pattern(self, pattern: str) -> int:
         """Clear all keys matching a pattern"""
-        if self.use_redis:
+        def redis_op(client):
+            keys = client.keys(pattern)
+            if keys:
+                return client.delete(*keys)
+            return 0
+
+        return self._call(f"clearing pattern {pattern}", redis_op,
+                          lambda: self.file_cache.clear_pattern(pattern),
+                          write=True)
+
+    # Async API for agents: Redis via redis.asyncio, file tier in a worker
+    # thread, so cache I/O never blocks the event loop. Same breaker and
+    # fallback rules as the sync API above.
+
+    async def _aredis_ready(self) -> bool:
+        """Async _redis_ready, with the health probe on the loop's client"""
+        if self.redis_client is None or not REDIS_BREAKER.allow():
+            return False
+        if REDIS_BREAKER.state == CircuitBreaker.HALF_OPEN:
+            start = time.perf_counter()
             try:
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    return self.redis_client.delete(*keys)
-                return 0
+                await _loop_redis_client().ping()
+            except Exception:
+                REDIS_BREAKER.record_failure()
+                return False
+            REDIS_BREAKER.record_success(time.perf_counter() - start)
+        return True
+
+    async def _acall(self, description: str, redis_op: Callable[[Any], Awaitable[Any]],
+                     file_op: Callable[[], Any], write: bool = False) -> Any:
+        """Async _call"""
+        if await self._aredis_ready():
+            start = time.perf_counter()
+            try:
+                result = await redis_op(_loop_redis_client())
+            except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+                _redis_failed(description, e)
             except Exception as e:
-                print(f"[Cache] Error clearing pattern {pattern}: {str(e)}")
-                return 0
-        else:
-            return self.file_cache.clear_pattern(pattern)
\ No newline at end of file
+                print(f"[Cache] Error {description}: {str(e)}")
+            else:
+                REDIS_BREAKER.record_success(time.perf_counter() - start)
+                tracing.current_span().set('backend', 'redis')
+                return result
+
+        _fallbacks['writes' if write else 'reads'] += 1
+        tracing.current_span().set('backend', 'file')
+        return await asyncio.to_thread(file_op)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Get value from cache"""
+        with tracing.span('cache.get', key=key) as s:
+            value = await self._acall(f"getting key {key}",
+                                      lambda client: client.get(key),
+                                      lambda: self.file_cache.get(key))
+            s.set('hit', value is not None)
+            s.set('bytes', len(value) if value else 0)
+        _count_lookups([key], () if value is None else (key,))
+        return value
+
+    async def aset(self, key: str, value: str, ttl: int = None) -> bool:
+        """Set value in cache with TTL"""
+        ttl = ttl or self.default_ttl
+        with tracing.span('cache.set', key=key, bytes=len(value)):
+            return await self._acall(f"setting key {key}",
+                                     lambda client: client.setex(key, ttl, value),
+                                     lambda: self.file_cache.set(key, value, ttl),
+                                     write=True)
+
+    async def aget_json(self, key: str) -> Any:
+        """Get a JSON value from cache, or None"""
+        cached = await self.aget(key)
+        return json_codec.loads(cached) if cached else None
+
+    async def aset_json(self, key: str, value: Any, ttl: int = None) -> bool:
+        """Set a JSON-serializable value in cache with TTL"""
+        return await self.aset(key, json_codec.dumps(value), ttl)
+
+    async def aget_many_json(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several JSON values in one round trip; missing keys are left out"""
+        return {key: json_codec.loads(value) for key, value in (await self.aget_many(keys)).items()}
+
+    async def aset_many_json(self, items: Dict[str, Any], ttl: int = None) -> bool:
+        """Set several JSON-serializable values with the same TTL in one round trip"""
+        return await self.aset_many({key: json_codec.dumps(value) for key, value in items.items()}, ttl)
+
+    async def aget_many(self, keys: List[str]) -> Dict[str, str]:
+        """Get several values in one round trip; missing keys are left out"""
+        if not keys:
+            return {}
+
+        async def redis_op(client):
+            values = await client.mget(keys)
+            return {key: value for key, value in zip(keys, values) if value is not None}
+
+        with tracing.span('cache.get_many', keys=len(keys)) as s:
+            values = await self._acall(f"getting {len(keys)} keys", redis_op,
+                                       lambda: self.file_cache.get_many(keys))
+            s.set('hits', len(values))
+        _count_lookups(keys, values)
+        return values
+
+    async def aset_many(self, items: Dict[str, str], ttl: int = None) -> bool:
+        """Set several values with the same TTL in one pipelined round trip"""
+        if not items:
+            return True
+        ttl = ttl or self.default_ttl
+
+        async def redis_op(client):
+            pipeline = client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipeline.setex(key, ttl, value)
+            return all(await pipeline.execute())
+
+        with tracing.span('cache.set_many', keys=len(items)):
+            return await self._acall(f"setting {len(items)} keys", redis_op,
+                                     lambda: self.file_cache.set_many(items, ttl),
+                                     write=True)
+
+    async def aexists_many(self, keys: List[str]) -> Dict[str, bool]:
+        """Check several keys in one round trip"""
+        if not keys:
+            return {}
+
+        async def redis_op(client):
+            pipeline = client.pipeline(transaction=False)
+            for key in keys:
+                pipeline.exists(key)
+            return {key: count > 0 for key, count in zip(keys, await pipeline.execute())}
+
+        def file_op():
+            found = self.file_cache.get_many(keys)
+            return {key: key in found for key in keys}
+
+        return await self._acall(f"checking {len(keys)} keys", redis_op, file_op)
+
+    async def aadd_to_set(self, key: str, members: List[str], ttl: int = None) -> bool:
+        """Add members to a set atomically (SADD; the file tier locks the entry) and refresh its TTL"""
+        if not members:
+            return True
+        ttl = ttl or self.default_ttl
+
+        async def redis_op(client):
+            pipeline = client.pipeline(transaction=True)
+            pipeline.sadd(key, *members)
+            pipeline.expire(key, ttl)
+            await pipeline.execute()
+            return True
+
+        with tracing.span('cache.add_to_set', key=key, members=len(members)):
+            return await self._acall(f"adding to set {key}", redis_op,
+                                     lambda: self.file_cache.add_to_set(key, members, ttl),
+                                     write=True)
+
+    async def aset_members(self, key: str) -> List[str]:
+        """Members of a set written by aadd_to_set (empty if missing)"""
+        async def redis_op(client):
+            return sorted(await client.smembers(key))
+
+        def file_op():
+            value = self.file_cache.get(key)
+            return json.loads(value) if value else []
+
+        with tracing.span('cache.set_members', key=key):
+            return await self._acall(f"reading set {key}", redis_op, file_op)
+
+    async def adelete(self, key: str) -> bool:
+        """Delete key from cache"""
+        async def redis_op(client):
+            return await client.delete(key) > 0
+
+        return await self._acall(f"deleting key {key}", redis_op,
+                                 lambda: self.file_cache.delete(key),
+                                 write=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Breaker state, Redis latency, hit/miss and file-tier fallback counts"""
+        pool = self.redis_client.connection_pool if self.redis_client is not None else None
+        return {
+            'backend': 'redis' if self.use_redis else 'file',
+            'breaker': REDIS_BREAKER.snapshot(),
+            'lookups': dict(_lookups),
+            'fallbacks': dict(_fallbacks),
+            'pool': {
+                'max_connections': pool.max_connections,
+                'timeout': Config.REDIS_POOL_TIMEOUT,
+                'loop_max_connections': Config.REDIS_LOOP_MAX_CONNECTIONS,
+                'loop_clients': len(_async_clients)
+            } if pool is not None else None
+        }
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Any
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker for a remote dependency.
+
+    closed: calls go through; consecutive failures are counted.
+    open: calls fail fast until reset_timeout has passed.
+    half_open: one caller is let through as a probe; success closes the
+    breaker, failure re-opens it for another reset_timeout.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 latency_window: int = 500):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._counters = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0, 'probes': 0}
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """True if a call may go to the dependency now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Let exactly one caller probe the dependency
+                self._state = self.HALF_OPEN
+                self._counters['probes'] += 1
+                return True
+            self._counters['rejected'] += 1
+            return False
+
+    def record_success(self, latency: float = None):
+        with self._lock:
+            self._counters['successes'] += 1
+            if latency is not None:
+                self._latencies.append(latency)
+            if self._state != self.CLOSED:
+                print(f"[Circuit Breaker] {self.name} closed, dependency recovered")
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._counters['failures'] += 1
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._counters['opened'] += 1
+                    print(f"[Circuit Breaker] {self.name} open after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def trip(self):
+        """Open the breaker immediately (e.g. dependency unreachable at startup)"""
+        with self._lock:
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._counters['opened'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State, counters and latency percentiles (ms) over the recent window"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            snapshot = {
+                'name': self.name,
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                **self._counters
+            }
+        if latencies:
+            snapshot['latency_ms'] = {
+                'p50': round(latencies[len(latencies) // 2] * 1000, 3),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+                'max': round(latencies[-1] * 1000, 3),
+                'samples': len(latencies)
+            }
+        return snapshot
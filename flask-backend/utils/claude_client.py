@@ -1,32 +1,62 @@
-import anthropic
+import time
 from config.config import Config
+from utils import tracing, metrics, analysis_budget
+from utils.scrape_governor import CLAUDE_GOVERNOR
 from typing import Dict, Any, List
 
 class ClaudeClient:
     """Claude API client for AI analysis"""
     
     def __init__(self):
-        self.client = anthropic.Anthropic(api_key=Config.ANTHROPIC_API_KEY)
+        self._client = None
+    
+    @property
+    def client(self):
+        """Anthropic SDK client, created on first use (the SDK import alone costs ~0.4s)"""
+        if self._client is None:
+            import anthropic
+            self._client = anthropic.Anthropic(api_key=Config.ANTHROPIC_API_KEY, base_url=Config.ANTHROPIC_BASE_URL)
+        return self._client
         
     async def analyze(self, prompt: str, max_tokens: int = 1000) -> str:
         """Send a prompt to Claude and get response"""
-        try:
-            response = self.client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=max_tokens,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-            
-            return response.content[0].text
-            
-        except Exception as e:
-            print(f"[Claude Client] Error: {str(e)}")
-            raise
+        model = "claude-3-sonnet-20240229"
+        # The SDK client is blocking; keep the loop free for the request's other tasks.
+        # The slot is held until the call returns, even if the step is cancelled.
+        response = await CLAUDE_GOVERNOR.run_in_thread(self._create, model, max_tokens, prompt)
+        return response.content[0].text
+    
+    def _create(self, model: str, max_tokens: int, prompt: str):
+        """One Messages API call (runs in a worker thread), charged to the analysis budget"""
+        start = time.perf_counter()
+        with tracing.span('claude.messages', model=model, max_tokens=max_tokens) as call_span:
+            try:
+                response = self.client.messages.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ]
+                )
+                
+                metrics.CLAUDE_REQUEST_DURATION.observe(time.perf_counter() - start, model=model, outcome='ok')
+                metrics.CLAUDE_TOKENS.inc(response.usage.input_tokens, model=model, direction='input')
+                metrics.CLAUDE_TOKENS.inc(response.usage.output_tokens, model=model, direction='output')
+                call_span.set('input_tokens', response.usage.input_tokens)
+                call_span.set('output_tokens', response.usage.output_tokens)
+                budget = analysis_budget.current_budget()
+                if budget is not None:
+                    budget.charge_tokens(response.usage.input_tokens, response.usage.output_tokens)
+                return response
+                
+            except Exception as e:
+                metrics.CLAUDE_REQUEST_DURATION.observe(time.perf_counter() - start, model=model, outcome='error')
+                metrics.CLAUDE_ERRORS.inc(model=model, type=type(e).__name__)
+                print(f"[Claude Client] Error: {str(e)}")
+                raise
     
     async def analyze_competitor_content(self, competitor_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze competitor website content"""
@@ -0,0 +1,94 @@
+from typing import Dict, Any, List, Iterable, Set, Tuple
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[/'][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; keeps '24/7' and "owner's" together"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def normalize(text: str) -> str:
+    """Canonical form used for exact keyword matching"""
+    return ' '.join(tokenize(text))
+
+
+class CompetitorIndex:
+    """
+    Tokenized inverted index over competitor H1/H2/keyword data.
+
+    Built once per analysis, then answers phrase queries from postings
+    lists instead of scanning every topic for every gap.
+    """
+
+    def __init__(self):
+        # doc_id -> (competitor name, field, original text)
+        self.docs: List[Tuple[str, str, str]] = []
+        # token -> {doc_id: [positions]}
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+        self.keywords: Set[str] = set()
+
+    @classmethod
+    def from_competitors(cls, competitors: Iterable[Dict[str, Any]]) -> 'CompetitorIndex':
+        """Build from CompetitorAgent.analyze_competitor results"""
+        index = cls()
+        for comp in competitors:
+            if not comp:
+                continue
+            name = comp.get('name') or comp.get('url', '')
+            seo_data = comp.get('seo_data') or {}
+            for text in seo_data.get('h1_tags') or []:
+                index.add(name, 'h1', text)
+            for text in seo_data.get('h2_tags') or []:
+                index.add(name, 'h2', text)
+            for text in comp.get('keywords') or []:
+                index.add(name, 'keyword', text)
+        return index
+
+    def add(self, competitor: str, field: str, text: str):
+        """Index one phrase"""
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        doc_id = len(self.docs)
+        self.docs.append((competitor, field, text))
+        for position, token in enumerate(tokens):
+            self.postings.setdefault(token, {}).setdefault(doc_id, []).append(position)
+        if field == 'keyword':
+            self.keywords.add(' '.join(tokens))
+
+    def _candidates(self, tokens: List[str], fields: Iterable[str] = None) -> Set[int]:
+        """Docs containing every token, intersected from the rarest token up"""
+        postings = [self.postings.get(token) for token in tokens]
+        if not postings or any(p is None for p in postings):
+            return set()
+        postings.sort(key=len)
+        docs = set(postings[0])
+        for p in postings[1:]:
+            docs.intersection_update(p)
+            if not docs:
+                break
+        if fields is not None:
+            fields = set(fields)
+            docs = {d for d in docs if self.docs[d][1] in fields}
+        return docs
+
+    def phrase_docs(self, phrase: str, fields: Iterable[str] = None) -> List[int]:
+        """Docs containing the phrase as consecutive tokens"""
+        tokens = tokenize(phrase)
+        matches = []
+        for doc_id in self._candidates(tokens, fields):
+            first = self.postings[tokens[0]][doc_id]
+            rest = [set(self.postings[token][doc_id]) for token in tokens[1:]]
+            if any(all(start + i + 1 in positions for i, positions in enumerate(rest)) for start in first):
+                matches.append(doc_id)
+        return sorted(matches)
+
+    def has_phrase(self, phrase: str, fields: Iterable[str] = None) -> bool:
+        """True when any indexed phrase contains the query phrase"""
+        return bool(self.phrase_docs(phrase, fields))
+
+    def covers_keyword(self, keyword: str) -> bool:
+        """Exact keyword match after case and punctuation normalization"""
+        return normalize(keyword) in self.keywords
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import time
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+from config.config import Config
+from utils.cache_manager import CacheManager
+
+
+def competitor_domain(url: str) -> str:
+    """Normalize a competitor URL to its bare domain (no scheme, port or www.)"""
+    netloc = urlparse(url if '//' in url else f"//{url}").netloc.lower()
+    netloc = netloc.split('@')[-1].split(':')[0]
+    return netloc[4:] if netloc.startswith('www.') else netloc
+
+
+def content_fingerprint(site_data: Dict[str, Any]) -> str:
+    """Hash of the extracted SEO fields that competitor insights are based on"""
+    fields = {
+        'title': site_data.get('title', ''),
+        'h1_tags': site_data.get('h1_tags', []),
+        'h2_tags': site_data.get('h2_tags', []),
+        'meta_description': site_data.get('meta_description', ''),
+        'schema_types': site_data.get('schema_types', [])
+    }
+    # stdlib json with sort_keys so stored fingerprints stay comparable
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class CompetitorStore:
+    """
+    Persistent per-domain competitor records for reuse across analyses.
+
+    Each record keeps the site scrape, the Claude insights and the derived
+    strengths/weaknesses as separate sections with their own timestamp, so
+    callers refresh only the stale parts. A per-location index lists the
+    domains seen in each market; it's a set updated with atomic adds, since
+    concurrent competitor analyses index the same location.
+    """
+    
+    def __init__(self, cache: CacheManager = None):
+        self.cache = cache or CacheManager()
+        self.ttl = Config.COMPETITOR_STORE_TTL
+        
+    def _record_key(self, domain: str) -> str:
+        return f"competitor_store:{domain}"
+    
+    def _location_key(self, location: str) -> str:
+        return f"competitor_location_set:{location.strip().lower()}"
+    
+    async def get(self, domain: str) -> Optional[Dict[str, Any]]:
+        """Get the stored record for a domain"""
+        return await self.cache.aget_json(self._record_key(domain))
+    
+    async def put(self, record: Dict[str, Any], location: str = None) -> bool:
+        """Save a record and add its domain to the location index"""
+        domain = record['domain']
+        if location:
+            locations = record.setdefault('locations', [])
+            if location not in locations:
+                locations.append(location)
+            await self._index_location(location, domain)
+        return await self.cache.aset_json(self._record_key(domain), record, ttl=self.ttl)
+    
+    def update_section(self, record: Dict[str, Any], section: str, data: Any, **extra) -> Dict[str, Any]:
+        """Replace one section of a record and stamp it with the current time"""
+        record[section] = {'data': data, 'updated_at': time.time(), **extra}
+        return record
+    
+    def is_fresh(self, record: Optional[Dict[str, Any]], section: str, max_age: int) -> bool:
+        """Check whether a record section exists and is younger than max_age seconds"""
+        if not record or not record.get(section):
+            return False
+        return time.time() - record[section].get('updated_at', 0) < max_age
+    
+    async def find_by_location(self, location: str) -> List[Dict[str, Any]]:
+        """All stored records for competitors seen in a location"""
+        domains = await self.cache.aset_members(self._location_key(location))
+        found = await self.cache.aget_many_json([self._record_key(domain) for domain in domains])
+        return [found[self._record_key(domain)] for domain in domains
+                if self._record_key(domain) in found]
+    
+    async def _index_location(self, location: str, domain: str):
+        await self.cache.aadd_to_set(self._location_key(location), [domain], ttl=self.ttl)
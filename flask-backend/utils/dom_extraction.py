@@ -0,0 +1,153 @@
+"""
+In-page extraction scripts for Selenium.
+
+Each script runs once per page through driver.execute_script and returns the
+whole structured result as JSON, instead of one WebDriver round trip per
+element. Selectors mirror the ones the scrapers used element by element.
+"""
+import json
+from typing import Dict, Any, List
+
+# Shared helpers: text of the first match, or null when missing
+_HELPERS = """
+const textOf = (root, sel) => {
+    const el = root.querySelector(sel);
+    return el ? (el.innerText || '') : null;
+};
+const hrefOf = (root, sel) => {
+    const el = root.querySelector(sel);
+    return el ? el.href : null;
+};
+"""
+
+SERP_EXTRACTION_SCRIPT = _HELPERS + """
+const results = {
+    organic_results: [], ads: [], local_pack: [], people_also_ask: [],
+    related_searches: [], people_also_search_for: [],
+    featured_snippet: null, knowledge_panel: null
+};
+
+for (const el of Array.from(document.querySelectorAll('div.g')).slice(0, 10)) {
+    const title = textOf(el, 'h3'), url = hrefOf(el, 'a'), snippet = textOf(el, 'span.VwiC3b');
+    if (title === null || url === null || snippet === null) continue;
+    results.organic_results.push({title, url, snippet, position: results.organic_results.length + 1});
+}
+
+for (const ad of document.querySelectorAll('div[data-text-ad]')) {
+    const title = textOf(ad, 'div[role="heading"]'), url = hrefOf(ad, 'a'), description = textOf(ad, 'div.Va3FIb');
+    if (title === null || url === null || description === null) continue;
+    results.ads.push({title, url, description});
+}
+
+const localPack = document.querySelector('div[jscontroller][data-async-context]');
+if (localPack) {
+    for (const place of Array.from(localPack.querySelectorAll('div[jsaction*="mouseover"]')).slice(0, 3)) {
+        const name = textOf(place, 'div[role="heading"]');
+        if (name === null) continue;
+        results.local_pack.push({name, position: results.local_pack.length + 1});
+    }
+}
+
+for (const paa of document.querySelectorAll('div[jsname="yEVEwb"]')) {
+    const question = textOf(paa, 'span');
+    if (question !== null) results.people_also_ask.push(question);
+}
+
+for (const rel of document.querySelectorAll('div[data-hveid] a')) {
+    const text = (rel.innerText || '').trim();
+    if (text) results.related_searches.push(text);
+}
+
+return results;
+"""
+
+COMPETITOR_EXTRACTION_SCRIPT = _HELPERS + """
+const baseDomain = arguments[0];
+const headings = tag => Array.from(document.getElementsByTagName(tag))
+    .map(el => (el.innerText || '').trim())
+    .filter(text => text);
+const meta = document.querySelector('meta[name="description"]');
+
+const internalLinks = [];
+for (const link of Array.from(document.getElementsByTagName('a')).slice(0, 50)) {
+    const href = link.href;
+    if (href && href.includes(baseDomain)) {
+        internalLinks.push({url: href, anchor_text: (link.innerText || '').trim()});
+    }
+}
+
+return {
+    title: document.title,
+    h1_tags: headings('h1'),
+    h2_tags: headings('h2'),
+    meta_description: meta ? (meta.getAttribute('content') || '') : '',
+    schema_scripts: Array.from(document.querySelectorAll('script[type="application/ld+json"]'))
+        .map(script => script.innerHTML),
+    internal_links: internalLinks
+};
+"""
+
+MAPS_EXTRACTION_SCRIPT = _HELPERS + """
+const businesses = [];
+for (const el of Array.from(document.querySelectorAll('div[role="article"]')).slice(0, 20)) {
+    const name = textOf(el, 'div[class*="fontHeadlineSmall"]');
+    if (name === null) continue;
+    const rating = el.querySelector('span[role="img"]');
+    businesses.push({
+        name,
+        rating_label: rating ? rating.getAttribute('aria-label') : null,
+        reviews_text: textOf(el, 'span[aria-label*="reviews"]')
+    });
+}
+return businesses;
+"""
+
+
+def parse_competitor_payload(payload: Dict[str, Any], url: str) -> Dict[str, Any]:
+    """Turn the competitor script result into the site data dict"""
+    schema_types = []
+    for script in payload.get('schema_scripts', []):
+        try:
+            schema_data = json.loads(script)
+            if '@type' in schema_data:
+                schema_types.append(schema_data['@type'])
+        except Exception:
+            continue
+
+    return {
+        'url': url,
+        'title': payload.get('title', ''),
+        'h1_tags': payload.get('h1_tags', []),
+        'h2_tags': payload.get('h2_tags', []),
+        'meta_description': payload.get('meta_description', ''),
+        'schema_types': schema_types,
+        'internal_links': payload.get('internal_links', []),
+        'images_alt_text': []
+    }
+
+
+def parse_maps_payload(payload: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Turn the Maps script result into business dicts"""
+    businesses = []
+    for item in payload:
+        business_data = {
+            'name': item['name'],
+            'rating': None,
+            'reviews_count': None,
+            'category': None,
+            'address': None,
+            'phone': None,
+            'website': None
+        }
+
+        try:
+            if item.get('rating_label'):
+                business_data['rating'] = float(item['rating_label'].split()[0])
+        except (ValueError, IndexError):
+            pass
+
+        if item.get('reviews_text') is not None:
+            business_data['reviews_count'] = item['reviews_text'].strip('()')
+
+        businesses.append(business_data)
+    return businesses
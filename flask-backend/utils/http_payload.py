@@ -0,0 +1,136 @@
+"""
+Encoding helpers for large analysis responses: field selection, strong
+ETags (one per content coding), content negotiation and a small cache of encoded bodies so repeat
+reads of the same cached analysis skip serialization and compression.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+from config.config import Config
+from utils import json_codec
+
+# Always returned, whatever ?fields= asks for
+BASE_FIELDS = ['analysis_id', 'query', 'location', 'timestamp', 'error', 'timings', 'profile',
+               'incomplete_sections', 'budget']
+
+
+def parse_fields(value: Optional[str]) -> List[str]:
+    """'keywords, opportunities' -> ['keywords', 'opportunities']"""
+    if not value:
+        return []
+    return sorted({field.strip() for field in value.split(',') if field.strip()})
+
+
+def select_fields(results: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """Top-level sections named in fields (plus the identifying fields)"""
+    if not fields:
+        return results
+    wanted = set(fields) | set(BASE_FIELDS)
+    return {key: value for key, value in results.items() if key in wanted}
+
+
+# Each content coding is its own representation, so it gets its own strong ETag
+CODING_SUFFIXES = {'identity': '', 'gzip': '-gz', 'br': '-br'}
+
+
+def make_etag(raw: str, fields: List[str]) -> str:
+    """Strong ETag over the serialized result and the field selection (identity coding)"""
+    digest = hashlib.sha256(raw.encode())
+    digest.update(','.join(fields).encode())
+    return digest.hexdigest()[:32]
+
+
+def coded_etag(etag: str, encoding: str) -> str:
+    """ETag of the body sent with that content coding"""
+    return etag + CODING_SUFFIXES[encoding]
+
+
+def etag_variants(etag: str) -> List[str]:
+    """ETags of every coding of one body, for If-None-Match"""
+    return [coded_etag(etag, encoding) for encoding in CODING_SUFFIXES]
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Best supported encoding from an Accept-Encoding header: br, gzip or identity"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in (['br'] if BROTLI_AVAILABLE else []) + ['gzip']:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+class EncodedBodyCache:
+    """LRU of encoded response bodies keyed by (ETag, requested encoding)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[bytes, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple[str, str], entry: Tuple[bytes, str]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+ENCODED_BODIES = EncodedBodyCache(Config.RESPONSE_CACHE_ENTRIES)
+
+
+def encode_payload(raw: str, fields: List[str], etag: str, encoding: str) -> Tuple[bytes, str]:
+    """
+    Response body for a serialized analysis: {"success": true, "data": ...}
+    with the field selection applied, compressed when it is worth it.
+    Returns the body and the encoding actually used.
+    """
+    cached = ENCODED_BODIES.get((etag, encoding))
+    if cached is not None:
+        return cached
+
+    if not fields:
+        # No selection: splice the cached JSON in without re-serializing it
+        body = ('{"success":true,"data":' + raw + '}').encode()
+    else:
+        body = json_codec.dumps_bytes({'success': True, 'data': select_fields(json_codec.loads(raw), fields)})
+
+    used = encoding if len(body) >= Config.RESPONSE_COMPRESSION_MIN_BYTES else 'identity'
+    entry = (compress(body, used), used)
+    ENCODED_BODIES.put((etag, encoding), entry)
+    return entry
@@ -0,0 +1,71 @@
+"""
+JSON encoding for cache payloads and API responses.
+
+Uses orjson when it is installed and the standard library otherwise. Both
+backends produce plain JSON text, so values written by one are read by
+the other (cache entries survive switching backends).
+"""
+import json
+from typing import Any, Union
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+BACKEND = 'orjson' if ORJSON_AVAILABLE else 'json'
+
+if ORJSON_AVAILABLE:
+    # Non-str dict keys and numpy scalars/arrays are accepted like the
+    # stdlib path (str() fallback) accepts them
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()  # numpy scalars and arrays
+    return str(obj)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to compact JSON text (for the cache, which stores str)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode()
+    return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by this codec (jsonify, request.get_json)"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Explicit stdlib options (indent, sort_keys...) keep stdlib behavior
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)  # Indented output for debugging
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
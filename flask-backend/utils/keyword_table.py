@@ -0,0 +1,121 @@
+from typing import Dict, Any, List, Iterable
+import re
+import numpy as np
+
+# Keyword value scoring (KeywordTable.value_scores, KeywordAgent.calculate_keyword_value)
+INTENT_MULTIPLIERS = {'urgent': 1.5, 'commercial': 1.3}
+COMPETITION_MULTIPLIERS = {'low': 1.5, 'medium': 1.2, 'high': 0.8}
+TYPE_BONUSES = {'emergency': 20, 'autocomplete': 15}
+
+# Placeholder for keywords without a competition level, distinct from None
+MISSING = '__missing__'
+
+
+class CategoricalColumn:
+    """Factorized column: integer codes plus the distinct values they index"""
+
+    def __init__(self, values: Iterable[Any]):
+        # pandas is imported on first use; it roughly doubles process start-up time
+        import pandas as pd
+        self.codes, uniques = pd.factorize(np.array(list(values), dtype=object))
+        self.index = {value: i for i, value in enumerate(uniques)}
+
+    def eq(self, value: Any) -> np.ndarray:
+        """Mask of rows equal to value"""
+        code = self.index.get(value)
+        if code is None:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == code
+
+    def lookup(self, table: Dict[str, float], default: float) -> np.ndarray:
+        """Map every row through a small value table"""
+        # Extra trailing slot catches the -1 code pandas uses for None
+        per_code = np.full(len(self.index) + 1, default, dtype=np.float64)
+        for value, code in self.index.items():
+            per_code[code] = table.get(value, default)
+        return per_code[self.codes]
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, highest first.
+    Ties keep their original order, matching a stable sorted(..., reverse=True).
+    """
+    n = len(scores)
+    if n == 0 or k <= 0:
+        return np.array([], dtype=np.int64)
+    if k < n:
+        threshold = -np.partition(-scores, k - 1)[k - 1]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+    order = np.argsort(-scores[candidates], kind='stable')
+    return candidates[order][:k]
+
+
+class KeywordTable:
+    """
+    Columnar view over a list of keyword dicts for vectorized scoring,
+    filtering and top-k selection. Build it once per keyword set; rows map
+    back to the original dicts, so results are the same objects the
+    per-dict code would return.
+    """
+
+    def __init__(self, keywords: List[Dict[str, Any]]):
+        self.records = keywords
+        self.keyword = [kw['keyword'] for kw in keywords]
+        self.type = CategoricalColumn(kw.get('type') for kw in keywords)
+        self.intent = CategoricalColumn(kw.get('intent') for kw in keywords)
+        self.competition = CategoricalColumn(kw.get('competition', MISSING) for kw in keywords)
+        self.search_volume_score = np.fromiter(
+            (kw.get('search_volume_score', 0) for kw in keywords), dtype=np.float64, count=len(keywords)
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def rows(self, indices: Iterable[int]) -> List[Dict[str, Any]]:
+        """Original keyword dicts for the given row indices"""
+        return [self.records[i] for i in indices]
+
+    def value_scores(self) -> np.ndarray:
+        """Vectorized KeywordAgent.calculate_keyword_value"""
+        score = self.search_volume_score * 10
+        score = score * self.intent.lookup(INTENT_MULTIPLIERS, 1.0)
+        competition = dict(COMPETITION_MULTIPLIERS, **{MISSING: 1.0})
+        score = score * self.competition.lookup(competition, 1.0)
+        score = score + self.type.lookup(TYPE_BONUSES, 0.0)
+        return np.trunc(score).astype(np.int64)
+
+    def contains_any(self, terms: List[str]) -> np.ndarray:
+        """Mask of keywords whose lowercase text contains any of the terms"""
+        mask = np.zeros(len(self), dtype=bool)
+        if not self.keyword or not terms:
+            return mask
+
+        # Search one joined string instead of every keyword separately
+        joined = '\n'.join(self.keyword)
+        lowered = joined.lower()
+        if len(lowered) != len(joined) or joined.count('\n') != len(self.keyword) - 1:
+            # Lowercasing changed lengths or a keyword spans lines: per-row fallback
+            return np.array([any(t in kw.lower() for t in terms) for kw in self.keyword], dtype=bool)
+
+        lengths = np.fromiter(map(len, self.keyword), dtype=np.int64, count=len(self.keyword))
+        starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+        for term in terms:
+            # Literal patterns use the fast substring search, unlike an alternation
+            positions = [m.start() for m in re.finditer(re.escape(term), lowered)]
+            if positions:
+                mask[np.searchsorted(starts, positions, side='right') - 1] = True
+        return mask
+
+    def not_in(self, values: Iterable[Any]) -> np.ndarray:
+        """Mask of keywords that are not members of values (exact match)"""
+        import pandas as pd
+        return ~pd.Series(self.keyword, dtype=object).isin(set(values)).to_numpy()
+
+    def top_k(self, mask: np.ndarray, k: int, scores: np.ndarray = None) -> List[Dict[str, Any]]:
+        """Top-k masked rows by score (search volume score by default)"""
+        scores = self.search_volume_score if scores is None else scores
+        selected = np.flatnonzero(mask)
+        return self.rows(selected[top_k_indices(scores[selected], k)])
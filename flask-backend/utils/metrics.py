@@ -0,0 +1,348 @@
+"""
+Process metrics in the Prometheus text exposition format (served on /metrics).
+
+Counters, gauges and histograms with labels, kept in memory under a lock
+(request threads, event loops and scrape worker threads all record).
+Every metric the backend exports is declared at the bottom of this module.
+
+Under gunicorn with several workers, enable_multiprocess() makes each worker
+write a snapshot of its metrics to a shared directory every few seconds, and
+render() merges them: counters and histograms are summed over all workers
+(including exited ones, so totals never go backwards), gauges get a
+'worker' label. Other workers' values are up to one flush interval old.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry: List['_Metric'] = []
+
+# Seconds; request latency spans cached reads (ms) to full analyses (minutes)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SCRAPE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+CLAUDE_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+GEOCODER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[Any, ...], Any] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[Any, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def items(self) -> List[Tuple[Tuple[Any, ...], Any]]:
+        """(label values, value) pairs, copied"""
+        with self._lock:
+            return list(self._values.items())
+
+    def format(self, labelnames: Tuple[str, ...], items: List[Tuple[Tuple[Any, ...], Any]]) -> List[str]:
+        return [f"{self.name}{_format_labels(labelnames, key)} {_format_value(value)}" for key, value in items]
+
+    def samples(self) -> List[str]:
+        return self.format(self.labelnames, self.items())
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> str:
+        return '\n'.join(self.header() + self.samples())
+
+
+class Counter(_Metric):
+    """Monotonic total"""
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple[Any, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(_Metric):
+    """Current value; function=... computes the labelled values at scrape time instead"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 function: Callable[[], Dict[Tuple[Any, ...], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def items(self) -> List[Tuple[Tuple[Any, ...], Any]]:
+        if self.function is None:
+            return super().items()
+        return list(self.function().items())
+
+
+class Histogram(_Metric):
+    """Bucketed observations with sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def items(self) -> List[Tuple[Tuple[Any, ...], Any]]:
+        with self._lock:
+            return [(key, dict(state, buckets=list(state['buckets']))) for key, state in self._values.items()]
+
+    def format(self, labelnames: Tuple[str, ...], items: List[Tuple[Tuple[Any, ...], Any]]) -> List[str]:
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['buckets']):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(labelnames, key, le)} {cumulative}")
+            labels = _format_labels(labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+# Shared snapshot directory when several worker processes serve /metrics
+_multiprocess_dir: Optional[str] = None
+
+
+def _snapshot() -> Dict[str, List[Any]]:
+    return {metric.name: [[list(key), value] for key, value in metric.items()] for metric in _registry}
+
+
+def _write_snapshot(directory: str, pid: int, snapshot: Dict[str, List[Any]]):
+    path = os.path.join(directory, f"{pid}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def _read_snapshots(directory: str) -> Dict[str, Dict[str, List[Any]]]:
+    """Snapshots of the other workers by pid; unreadable files are skipped"""
+    snapshots = {}
+    for name in os.listdir(directory):
+        pid, ext = os.path.splitext(name)
+        if ext != '.json' or pid == str(os.getpid()):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots[pid] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def flush():
+    """Write this process' snapshot now (multiprocess mode only)"""
+    if _multiprocess_dir is not None:
+        _write_snapshot(_multiprocess_dir, os.getpid(), _snapshot())
+
+
+def _flush_loop(interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except OSError as e:
+            print(f"[Metrics] Error writing snapshot: {str(e)}")
+
+
+def enable_multiprocess(directory: str, interval: float = 5):
+    """Share this worker's metrics through directory (call in each worker after fork)"""
+    global _multiprocess_dir
+    os.makedirs(directory, exist_ok=True)
+    # Totals inherited from the master would be counted once per worker
+    for metric in _registry:
+        if metric.kind != 'gauge':
+            with metric._lock:
+                metric._values.clear()
+    _multiprocess_dir = directory
+    flush()
+    threading.Thread(target=_flush_loop, args=(interval,), name='metrics-flush', daemon=True).start()
+
+
+def reset_multiprocess_dir(directory: str):
+    """Remove the snapshots of a previous server run (call once in the master)"""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith('.json'):
+            os.remove(os.path.join(directory, name))
+
+
+def mark_process_dead(directory: str, pid: int):
+    """Keep an exited worker's counters and histograms, drop its gauges"""
+    path = os.path.join(directory, f"{pid}.json")
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    gauges = {metric.name for metric in _registry if metric.kind == 'gauge'}
+    _write_snapshot(directory, pid, {name: items for name, items in snapshot.items() if name not in gauges})
+
+
+def _render_multiprocess(directory: str) -> str:
+    snapshots = _read_snapshots(directory)
+    own = str(os.getpid())
+    blocks = []
+    for metric in _registry:
+        workers = [(own, metric.items())]
+        workers += [(pid, [(tuple(key), value) for key, value in snapshot.get(metric.name, [])])
+                    for pid, snapshot in snapshots.items()]
+        if metric.kind == 'gauge':
+            items = [(tuple(key) + (pid,), value) for pid, worker_items in workers for key, value in worker_items]
+            blocks.append('\n'.join(metric.header() + metric.format(metric.labelnames + ('worker',), items)))
+            continue
+        merged: Dict[Tuple[Any, ...], Any] = {}
+        for _, worker_items in workers:
+            for key, value in worker_items:
+                if metric.kind == 'histogram':
+                    total = merged.setdefault(key, {'buckets': [0] * len(value['buckets']), 'sum': 0.0, 'count': 0})
+                    total['buckets'] = [a + b for a, b in zip(total['buckets'], value['buckets'])]
+                    total['sum'] += value['sum']
+                    total['count'] += value['count']
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        blocks.append('\n'.join(metric.header() + metric.format(metric.labelnames, list(merged.items()))))
+    return '\n'.join(blocks) + '\n'
+
+
+def render() -> str:
+    """All registered metrics in the text exposition format (merged over workers in multiprocess mode)"""
+    if _multiprocess_dir is not None:
+        return _render_multiprocess(_multiprocess_dir)
+    return '\n'.join(metric.render() for metric in _registry) + '\n'
+
+
+def cache_prefix(key: str) -> str:
+    """Metric label for a cache key: 'serp:hvac:Pelham' -> 'serp'"""
+    return key.split(':', 1)[0]
+
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram('ranksavvy_http_request_duration_seconds',
+                                  'HTTP request latency by route', ('method', 'route', 'status'))
+
+# Analyses
+ANALYSES_IN_FLIGHT = Gauge('ranksavvy_analyses_in_flight', 'Niche analyses currently running')
+ANALYSIS_DURATION = Histogram('ranksavvy_analysis_duration_seconds',
+                              'LeadAgent.analyze_niche duration', ('outcome',))
+
+# Scraping
+SCRAPE_DURATION = Histogram('ranksavvy_scrape_duration_seconds',
+                            'Browser session or HTTP scrape duration by scrape type', ('type',),
+                            buckets=SCRAPE_BUCKETS)
+SCRAPE_FAILURES = Counter('ranksavvy_scrape_failures_total',
+                          'Failed scrapes by scrape type and exception type', ('type', 'reason'))
+SCRAPE_BYTES = Counter('ranksavvy_scrape_transferred_bytes_total',
+                       'Bytes transferred by scrapes (Resource Timing, a lower bound)', ('type',))
+SCRAPE_SLOTS = Gauge('ranksavvy_scrape_slots',
+                     'Governor slots (browser pool, HTTP, Claude) by state: in_use, waiting, limit',
+                     ('pool', 'state'))
+WORK_QUEUE_WAIT = Histogram('ranksavvy_work_queue_wait_seconds',
+                            'Wait for a governor slot (and cluster lease) by pool and work class', ('pool', 'work_class'),
+                            buckets=REQUEST_BUCKETS)
+SCRAPE_LEASE_WAIT = Histogram('ranksavvy_scrape_lease_wait_seconds',
+                              'Wait for a cross-worker scrape lease by pool', ('pool',),
+                              buckets=SCRAPE_BUCKETS)
+
+# Cache
+CACHE_LOOKUPS = Counter('ranksavvy_cache_lookups_total', 'Cache lookups by key prefix and result',
+                        ('prefix', 'result'))
+
+
+def _cache_hit_ratio() -> Dict[Tuple[Any, ...], float]:
+    totals: Dict[str, List[float]] = {}
+    for (prefix, result), count in CACHE_LOOKUPS.values().items():
+        hits_and_all = totals.setdefault(prefix, [0, 0])
+        hits_and_all[0] += count if result == 'hit' else 0
+        hits_and_all[1] += count
+    return {(prefix,): hits / total for prefix, (hits, total) in totals.items() if total}
+
+
+CACHE_HIT_RATIO = Gauge('ranksavvy_cache_hit_ratio', 'Cache hit ratio since start by key prefix',
+                        ('prefix',), function=_cache_hit_ratio)
+
+# Claude
+CLAUDE_REQUEST_DURATION = Histogram('ranksavvy_claude_request_duration_seconds',
+                                    'Claude Messages API latency', ('model', 'outcome'),
+                                    buckets=CLAUDE_BUCKETS)
+CLAUDE_TOKENS = Counter('ranksavvy_claude_tokens_total', 'Claude tokens by direction', ('model', 'direction'))
+CLAUDE_ERRORS = Counter('ranksavvy_claude_errors_total', 'Claude API errors by exception type', ('model', 'type'))
+
+# Geocoder
+GEOCODER_REQUESTS = Counter('ranksavvy_geocoder_requests_total',
+                            'Nominatim calls by operation and outcome (found, empty, error)',
+                            ('operation', 'outcome'))
+GEOCODER_DURATION = Histogram('ranksavvy_geocoder_request_duration_seconds', 'Nominatim call latency',
+                              ('operation',), buckets=GEOCODER_BUCKETS)
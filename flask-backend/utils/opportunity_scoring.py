@@ -0,0 +1,68 @@
+"""
+Underserved-market scoring for surprise mode.
+
+A related service is a surprise opportunity when its SERP shows local
+demand that nobody is competing hard for. Demand comes from the SERP
+volume indicators (ads, local pack, People Also Ask, featured snippet) and
+the number of related searches; competition from ad density, how full the
+local pack is, and how many top organic results are directories or
+aggregators rather than local businesses (a directory-heavy SERP is one a
+dedicated local page can win).
+"""
+from typing import Dict, Any, List
+
+from utils.competitor_store import competitor_domain
+
+# Lead-gen and listing sites that fill SERPs where no local business ranks
+DIRECTORY_DOMAINS = {
+    'yelp.com', 'angi.com', 'angieslist.com', 'homeadvisor.com', 'thumbtack.com', 'yellowpages.com',
+    'bbb.org', 'facebook.com', 'nextdoor.com', 'houzz.com', 'porch.com', 'bark.com', 'mapquest.com',
+    'manta.com', 'superpages.com', 'expertise.com', 'networx.com', 'homeguide.com', 'reddit.com'
+}
+
+# Indicator score at which demand counts as saturated (see ScraperAgent._analyze_serp_features)
+DEMAND_SCORE_CAP = 6
+DEMAND_WEIGHT = 0.4
+
+
+def directory_share(organic_results: List[Dict[str, Any]], top: int = 10) -> float:
+    """Fraction of the top organic results on directory domains"""
+    urls = [r.get('url') for r in organic_results[:top] if r.get('url')]
+    if not urls:
+        return 0.0
+    return sum(competitor_domain(url) in DIRECTORY_DOMAINS for url in urls) / len(urls)
+
+
+def score_service(service: str, serp_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Opportunity score (0-10) with its demand and competition components and reasons"""
+    indicators = serp_data.get('search_volume_indicators', {})
+    ads = len(serp_data.get('ads', []))
+    local_pack = len(serp_data.get('local_pack', []))
+    related = len(serp_data.get('related_searches', []))
+    directories = directory_share(serp_data.get('organic_results', []))
+
+    demand = min(1.0, (indicators.get('score', 0) + (1 if related >= 6 else 0)) / DEMAND_SCORE_CAP)
+    competition = (0.45 * min(ads, 4) / 4
+                   + 0.35 * min(local_pack, 3) / 3
+                   + 0.20 * (1 - directories))
+    score = 10 * (DEMAND_WEIGHT * demand + (1 - DEMAND_WEIGHT) * (1 - competition))
+
+    reasons = []
+    if ads < 2:
+        reasons.append('no ads' if ads == 0 else 'only 1 ad')
+    if local_pack < 3:
+        reasons.append(f"{local_pack} of 3 local pack spots filled")
+    if directories >= 0.3:
+        reasons.append(f"{round(directories * 10)} of the top 10 results are directories")
+    if indicators.get('local_intent'):
+        reasons.append('local search intent')
+
+    return {
+        'keyword': service,
+        'opportunity_score': round(score, 1),
+        'demand': round(demand, 2),
+        'competition': round(competition, 2),
+        'signals': {'ads': ads, 'local_pack': local_pack, 'directory_share': round(directories, 2),
+                    'related_searches': related},
+        'reason': ', '.join(reasons).capitalize() if reasons else 'Competitive market'
+    }
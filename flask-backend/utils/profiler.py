@@ -0,0 +1,146 @@
+"""
+Wall-clock stack sampler for profiling one analysis.
+
+A background thread samples, every PROFILE_INTERVAL_MS:
+  - the thread running the analysis' event loop,
+  - that loop's to_thread workers (Selenium sessions, file cache I/O),
+  - every pending task on the loop, as its chain of awaiting coroutines,
+    so time spent awaiting Redis, HTTP scrapes or the governor is
+    attributed to the code that is waiting rather than to the selector.
+
+Output is folded stacks ("root;caller;callee count"), readable by
+flamegraph.pl, inferno and speedscope. Stacks are rooted at "thread:loop",
+"thread:worker" (all to_thread workers) or "tasks" (the await chains).
+Each count is one sample, i.e. PROFILE_INTERVAL_MS of wall time.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+from config.config import Config
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_ROOT):
+        filename = os.path.relpath(filename, _BACKEND_ROOT)
+    elif 'site-packages' in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    # ';' separates frames in the folded format
+    return f"{code.co_name} ({filename})".replace(';', ':')
+
+
+def _thread_stack(frame) -> List[str]:
+    """Labels from the outermost frame to the innermost"""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _task_stack(task: asyncio.Task) -> List[str]:
+    """Labels along the task's await chain, outermost coroutine first"""
+    stack = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = (getattr(awaitable, 'cr_frame', None) or getattr(awaitable, 'gi_frame', None)
+                 or getattr(awaitable, 'ag_frame', None))
+        if frame is None:
+            break
+        stack.append(_frame_label(frame.f_code))
+        awaitable = (getattr(awaitable, 'cr_await', None) or getattr(awaitable, 'gi_yieldfrom', None)
+                     or getattr(awaitable, 'ag_await', None))
+    return stack
+
+
+class StackSampler:
+    """Samples one event loop's thread, its worker threads and its tasks"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval_ms: float = None):
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        self.interval = (interval_ms or Config.PROFILE_INTERVAL_MS) / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> 'StackSampler':
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _worker_threads(self) -> Dict[int, str]:
+        executor = getattr(self.loop, '_default_executor', None)
+        threads = list(getattr(executor, '_threads', ()) or ())
+        return {t.ident: 'worker' for t in threads if t.ident is not None}
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:
+                # Sampling races with the loop; a skipped tick is harmless
+                print(f"[Profiler] Sample skipped: {str(e)}")
+
+    def _sample(self):
+        threads = {self.loop_thread: 'loop', **self._worker_threads()}
+        frames = sys._current_frames()
+        for ident, name in threads.items():
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            if name == 'worker' and frame.f_code.co_name == '_worker':
+                continue  # Idle executor thread waiting for work
+            self.stacks[';'.join([f"thread:{name}"] + _thread_stack(frame))] += 1
+
+        for task in asyncio.all_tasks(self.loop):
+            stack = _task_stack(task)
+            if stack:
+                self.stacks[';'.join(['tasks'] + stack)] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Folded stacks, one 'stack count' line each"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'samples': self.samples,
+            'interval_ms': round(self.interval * 1000, 1),
+            'seconds': round(self.elapsed, 2),
+            'stacks': len(self.stacks)
+        }
+
+
+@contextmanager
+def sampling(enabled: bool = True, interval_ms: float = None):
+    """Sample the running loop for the duration of the block (yields None when disabled)"""
+    if not enabled:
+        yield None
+        return
+
+    sampler = StackSampler(asyncio.get_running_loop(), interval_ms).start()
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
@@ -0,0 +1,412 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, Optional, Callable
+
+from config.config import Config
+from utils import tracing, metrics, analysis_budget
+from utils.analysis_budget import BudgetExhausted
+from utils.cache_manager import aeval, eval_script
+
+# Work classes, highest priority first
+WORK_CLASSES = ('interactive', 'analysis', 'background')
+
+_work_class = contextvars.ContextVar('work_class', default='analysis')
+
+
+def current_work_class() -> str:
+    return _work_class.get()
+
+
+@contextmanager
+def work_class(name: str):
+    """Queue the block's upstream calls (including tasks and threads started in it) as this class"""
+    if name not in WORK_CLASSES:
+        raise ValueError(f"Unknown work class {name!r}, expected one of {WORK_CLASSES}")
+    token = _work_class.set(name)
+    try:
+        yield
+    finally:
+        _work_class.reset(token)
+
+
+# Leases are sorted sets of holder ids scored by expiry (Redis server time,
+# so worker clocks don't matter): KEYS[1] holds every lease, KEYS[2] the
+# interactive ones. Expired leases are dropped before counting. Other work
+# classes may only take a lease while fewer than limit - reserved
+# non-interactive leases are held. ARGV: limit, reserved, ttl, lease id,
+# 1 if interactive.
+ACQUIRE_LEASE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local held = redis.call('ZCARD', KEYS[1])
+if held >= tonumber(ARGV[1]) then
+    return 0
+end
+local interactive = ARGV[5] == '1'
+if not interactive and held - redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[1]) - tonumber(ARGV[2]) then
+    return 0
+end
+local ttl = tonumber(ARGV[3])
+redis.call('ZADD', KEYS[1], now + ttl, ARGV[4])
+redis.call('EXPIRE', KEYS[1], math.ceil(ttl) * 2)
+if interactive then
+    redis.call('ZADD', KEYS[2], now + ttl, ARGV[4])
+    redis.call('EXPIRE', KEYS[2], math.ceil(ttl) * 2)
+end
+return 1
+"""
+RENEW_LEASE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local ttl = tonumber(ARGV[1])
+local renewed = 0
+for i = 2, #ARGV do
+    renewed = renewed + redis.call('ZADD', KEYS[1], 'XX', 'CH', now + ttl, ARGV[i])
+    redis.call('ZADD', KEYS[2], 'XX', now + ttl, ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], math.ceil(ttl) * 2)
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('EXPIRE', KEYS[2], math.ceil(ttl) * 2)
+end
+return renewed
+"""
+RELEASE_LEASE_SCRIPT = """
+redis.call('ZREM', KEYS[2], ARGV[1])
+return redis.call('ZREM', KEYS[1], ARGV[1])
+"""
+
+# Seconds between attempts while every cluster slot is taken; interactive
+# work backs off less, so it's first to see a freed lease
+LEASE_POLL_MIN = 0.05
+LEASE_POLL_MAX = {'interactive': 0.2, 'analysis': 1.0, 'background': 1.0}
+
+
+class RedisLeases:
+    """
+    Cap on concurrent scrapes across worker processes.
+
+    Each holder keeps a lease in Redis, renewed by a per-process thread
+    while held; a worker that dies without releasing only holds its slot
+    until the lease expires. Renewal and release don't need the acquiring
+    event loop, so a browser session can keep its lease after the request
+    that started it has returned. If Redis is unavailable, acquire() grants
+    without a lease and the per-process cap is all that applies.
+
+    `reserved` leases only go to interactive work, as in the per-process
+    governor. Beyond that, waiters in different workers poll rather than
+    queue, so there is no cluster-wide ordering by class or age; interactive
+    waiters only poll more often.
+    """
+
+    def __init__(self, name: str, limit: int, reserved: int = 0, ttl: float = None):
+        self.name = name
+        self.key = f"scrape_leases:{name}"
+        self.keys = [self.key, f"{self.key}:interactive"]
+        self.limit = limit
+        self.reserved = max(0, min(reserved, limit - 1))
+        self.ttl = ttl or Config.SCRAPE_LEASE_TTL
+        self._held = set()
+        self._lock = threading.Lock()
+        self._renewer = None
+
+    async def acquire(self, work_class: str = 'analysis') -> Optional[str]:
+        """Wait for a cluster-wide slot for a work class; returns the lease id, or None without Redis"""
+        lease_id = os.urandom(8).hex()
+        interactive = 1 if work_class == 'interactive' else 0
+        delay = LEASE_POLL_MIN
+        start = time.perf_counter()
+        while True:
+            granted = await aeval(ACQUIRE_LEASE_SCRIPT, self.keys,
+                                  [self.limit, self.reserved, self.ttl, lease_id, interactive])
+            if granted is None:
+                return None
+            if granted:
+                metrics.SCRAPE_LEASE_WAIT.observe(time.perf_counter() - start, pool=self.name)
+                self._hold(lease_id)
+                return lease_id
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, LEASE_POLL_MAX[work_class])
+
+    def _hold(self, lease_id: str):
+        with self._lock:
+            self._held.add(lease_id)
+            # Checked per lease: a worker forked from the master has no renewer thread
+            if self._renewer is None or not self._renewer.is_alive():
+                self._renewer = threading.Thread(target=self._renew, name=f"{self.name}-lease-renewer",
+                                                 daemon=True)
+                self._renewer.start()
+
+    def _renew(self):
+        """Renew every held lease until none are left"""
+        while True:
+            time.sleep(self.ttl / 3)
+            with self._lock:
+                held = list(self._held)
+                if not held:
+                    self._renewer = None
+                    return
+            renewed = eval_script(RENEW_LEASE_SCRIPT, self.keys, [self.ttl, *held])
+            if renewed is not None and renewed < len(held):
+                print(f"[Scrape Governor] {len(held) - renewed} {self.name} lease(s) expired while held")
+
+    async def release(self, lease_id: Optional[str]):
+        if lease_id is None:
+            return
+        with self._lock:
+            self._held.discard(lease_id)
+        await aeval(RELEASE_LEASE_SCRIPT, self.keys, [lease_id])
+
+    def release_sync(self, lease_id: Optional[str]):
+        """release() for threads without an event loop"""
+        if lease_id is None:
+            return
+        with self._lock:
+            self._held.discard(lease_id)
+        eval_script(RELEASE_LEASE_SCRIPT, self.keys, [lease_id])
+
+
+class _Waiter:
+    """One queued acquire: the waiter's loop and future, its work class and when it queued"""
+    __slots__ = ('loop', 'future', 'work_class', 'enqueued')
+
+    def __init__(self, work_class: str):
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+        self.work_class = work_class
+        self.enqueued = time.monotonic()
+
+
+class ScrapeGovernor:
+    """
+    Process-wide cap on concurrent upstream calls, shared by work classes.
+
+    Flask routes run each request on its own event loop and thread, so an
+    asyncio.Semaphore can't coordinate them. The governor keeps its state
+    under a thread lock and wakes waiters on their own loop. With
+    global_limit set, a slot also needs a Redis lease shared by all workers.
+
+    Waiters are served by work class (interactive, analysis, background),
+    oldest first within a class. `reserved` slots are only ever given to
+    interactive work, so a dashboard lookup never queues behind a batch.
+    A waiter gains one class of priority per PRIORITY_AGING_SECONDS queued,
+    so background work still runs while analyses keep arriving.
+    """
+
+    def __init__(self, name: str, limit: int, global_limit: int = 0, reserved: int = 0):
+        self.name = name
+        self.limit = max(1, limit)
+        # Other classes always keep at least one slot
+        self.reserved = max(0, min(reserved, self.limit - 1))
+        self.aging = max(0.001, Config.PRIORITY_AGING_SECONDS)
+        self.leases = RedisLeases(name, global_limit, reserved) if global_limit > 0 else None
+        self._active = 0
+        self._active_by_class = {name: 0 for name in WORK_CLASSES}
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        metrics.SCRAPE_SLOTS.set(self.limit, pool=name, state='limit')
+        self._publish()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Limit, reservation, and active and waiting counts by work class"""
+        with self._lock:
+            waiting = {name: 0 for name in WORK_CLASSES}
+            for waiter in self._waiters:
+                waiting[waiter.work_class] += 1
+            return {
+                'limit': self.limit,
+                'reserved_interactive': self.reserved,
+                'active': dict(self._active_by_class),
+                'waiting': waiting
+            }
+
+    def _publish(self):
+        """Update the slot gauges (called with the lock held)"""
+        metrics.SCRAPE_SLOTS.set(self._active, pool=self.name, state='in_use')
+        metrics.SCRAPE_SLOTS.set(len(self._waiters), pool=self.name, state='waiting')
+
+    def _eligible(self, work_class: str) -> bool:
+        """Whether a slot can go to this class now (called with the lock held)"""
+        if self._active >= self.limit:
+            return False
+        if work_class == 'interactive':
+            return True
+        return self._active - self._active_by_class['interactive'] < self.limit - self.reserved
+
+    def _take(self, work_class: str):
+        self._active += 1
+        self._active_by_class[work_class] += 1
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        """Eligible waiter with the best aged rank, earliest first on ties"""
+        now = time.monotonic()
+        best, best_rank = None, None
+        for waiter in self._waiters:
+            if not self._eligible(waiter.work_class):
+                continue
+            rank = WORK_CLASSES.index(waiter.work_class) - (now - waiter.enqueued) / self.aging
+            if best is None or rank < best_rank:
+                best, best_rank = waiter, rank
+        return best
+
+    def _dispatch(self):
+        """Hand free slots to waiters (called with the lock held)"""
+        while True:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._waiters.remove(waiter)
+            try:
+                waiter.loop.call_soon_threadsafe(self._grant, waiter)
+            except RuntimeError:
+                continue  # Waiter's loop already closed
+            self._take(waiter.work_class)
+
+    async def acquire(self, work_class: str = None):
+        """Wait for a free slot for the work class (default: the current one)"""
+        work_class = work_class or current_work_class()
+        with self._lock:
+            if self._eligible(work_class):
+                self._take(work_class)
+                self._publish()
+                return
+            waiter = _Waiter(work_class)
+            self._waiters.append(waiter)
+            self._publish()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    self._publish()
+                    raise
+            # The slot was handed over before the cancellation landed
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(work_class)
+            raise
+
+    def release(self, work_class: str = None):
+        """Free a slot, handing it straight to the best eligible waiter if any"""
+        work_class = work_class or current_work_class()
+        with self._lock:
+            self._active -= 1
+            self._active_by_class[work_class] -= 1
+            self._dispatch()
+            self._publish()
+
+    def _grant(self, waiter: _Waiter):
+        if waiter.future.cancelled():
+            # Waiter gave up after being picked, pass the slot on
+            self.release(waiter.work_class)
+        else:
+            waiter.future.set_result(None)
+
+    async def _enter(self):
+        """Queue for a slot, charge the budget and take a lease; returns (work_class, lease)"""
+        work_class = current_work_class()
+        budget = analysis_budget.current_budget()
+        if budget is not None and budget.exhausted():
+            budget.admit(self.name)  # raises BudgetExhausted without queueing
+        lease = None
+        start = time.perf_counter()
+        with tracing.span(f"{self.name}.wait", waiting=self.waiting, work_class=work_class):
+            await self.acquire(work_class)
+            if budget is not None:
+                # Charged once the call can start; the budget may have run out while queued
+                try:
+                    budget.admit(self.name)
+                except BudgetExhausted:
+                    self.release(work_class)
+                    raise
+            if self.leases is not None:
+                try:
+                    lease = await self.leases.acquire(work_class)
+                except BaseException:
+                    self.release(work_class)
+                    raise
+        # Local queue and cluster lease wait together
+        metrics.WORK_QUEUE_WAIT.observe(time.perf_counter() - start, pool=self.name, work_class=work_class)
+        return work_class, lease
+
+    @asynccontextmanager
+    async def slot(self):
+        """async with governor.slot(): ... one upstream call, queued by the current work class ..."""
+        work_class, lease = await self._enter()
+        try:
+            yield
+        finally:
+            try:
+                if self.leases is not None:
+                    await self.leases.release(lease)
+            finally:
+                self.release(work_class)
+
+    async def run_in_thread(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run a blocking call (a browser session) in a worker thread under a slot.
+
+        Selenium can't be interrupted, so the slot and lease stay held until
+        the thread returns, even if the awaiting step is cancelled at a
+        deadline or its event loop closes; the cap counts every session
+        that is still driving a browser. A call cancelled before its thread
+        started is skipped.
+        """
+        work_class, lease = await self._enter()
+        abandoned = threading.Event()
+        context = contextvars.copy_context()
+
+        def call():
+            try:
+                if not abandoned.is_set():
+                    return context.run(fn, *args)
+            finally:
+                try:
+                    if self.leases is not None:
+                        self.leases.release_sync(lease)
+                finally:
+                    self.release(work_class)
+
+        try:
+            future = asyncio.get_running_loop().run_in_executor(None, call)
+        except BaseException:
+            abandoned.set()
+            call()
+            raise
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            abandoned.set()
+            # Nobody awaits the session's outcome any more
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            raise
+
+
+# Browser sessions are the expensive resource; HTTP lookups are cheap but
+# still go through the proxy, so they get their own larger cap
+BROWSER_GOVERNOR = ScrapeGovernor('browser', Config.MAX_CONCURRENT_BROWSERS,
+                                  Config.GLOBAL_MAX_CONCURRENT_BROWSERS,
+                                  reserved=Config.INTERACTIVE_RESERVED_BROWSERS)
+HTTP_GOVERNOR = ScrapeGovernor('http', Config.MAX_CONCURRENT_HTTP_SCRAPES,
+                               Config.GLOBAL_MAX_CONCURRENT_HTTP_SCRAPES,
+                               reserved=Config.INTERACTIVE_RESERVED_HTTP_SCRAPES)
+# Claude calls are queued the same way so interactive work isn't stuck
+# behind a batch of competitor analyses
+CLAUDE_GOVERNOR = ScrapeGovernor('claude', Config.MAX_CONCURRENT_CLAUDE_REQUESTS,
+                                 reserved=Config.INTERACTIVE_RESERVED_CLAUDE_REQUESTS)
@@ -0,0 +1,117 @@
+from typing import Dict, Any, List, Callable, Awaitable, Optional, Set
+
+# Zero-signal SERPs needed before a pattern is pruned; one empty SERP can be
+# noise (e.g. a proxy geolocation quirk), it only lowers the priority
+TERM_PRUNE_SAMPLES = 2
+PLACEMENT_PRUNE_SAMPLES = 3
+
+class AdaptiveScrapeScheduler:
+    """
+    Scrapes keyword variants in priority order under a fixed scrape budget.
+
+    Each candidate belongs to a term pattern (e.g. "emergency") and a
+    placement (prefix/suffix). Variants are scraped in small waves; after each
+    wave the early SERP signals (ad count, local pack) update the yield of
+    every pattern, and patterns that come back empty are pruned so the
+    remaining budget goes to the variants most likely to carry volume.
+    Cached variants are checked for free and do not consume budget.
+    """
+
+    def __init__(self, scrape_batch: Callable[[List[str], str], Awaitable[List[Dict[str, Any]]]],
+                 budget: int = 10, wave_size: int = 5,
+                 cached_lookup: Optional[Callable[[List[str], str], Awaitable[Set[str]]]] = None):
+        self.scrape_batch = scrape_batch
+        self.budget = budget
+        self.wave_size = max(1, wave_size)
+        self.cached_lookup = cached_lookup
+
+    async def run(self, candidates: List[Dict[str, Any]], location: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Scrape candidates and return batch results keyed by keyword.
+
+        Candidates are dicts with 'keyword', 'term', 'placement' and a prior
+        'priority' (higher first). Pruned or unscheduled variants are absent
+        from the returned mapping.
+        """
+        pending = list(candidates)
+        results = {}
+        term_stats = {}
+        placement_stats = {}
+        pruned_terms = set()
+        pruned_placements = set()
+        spent = 0
+
+        while pending:
+            pending = [c for c in pending
+                       if c['term'] not in pruned_terms and c['placement'] not in pruned_placements]
+            if not pending:
+                break
+
+            pending.sort(key=lambda c: self._priority(c, term_stats, placement_stats), reverse=True)
+
+            # Cached variants cost nothing, take all of them in this wave
+            wave = []
+            if self.cached_lookup:
+                cached = await self.cached_lookup([c['keyword'] for c in pending], location)
+                wave = [c for c in pending if c['keyword'] in cached]
+
+            remaining = self.budget - spent
+            if not wave:
+                if remaining <= 0:
+                    break
+                # Only one variant per term pattern per wave, so a dead
+                # pattern is detected before its siblings are paid for
+                seen_terms = set()
+                for c in pending:
+                    if len(wave) >= min(self.wave_size, remaining):
+                        break
+                    if c['term'] in seen_terms:
+                        continue
+                    seen_terms.add(c['term'])
+                    wave.append(c)
+                spent += len(wave)
+
+            wave_ids = {id(c) for c in wave}
+            pending = [c for c in pending if id(c) not in wave_ids]
+
+            wave_results = await self.scrape_batch([c['keyword'] for c in wave], location)
+
+            for candidate, result in zip(wave, wave_results):
+                results[candidate['keyword']] = result
+                if result.get('error'):
+                    continue
+                signal = self._signal(result)
+                for stats, key in ((term_stats, candidate['term']), (placement_stats, candidate['placement'])):
+                    entry = stats.setdefault(key, {'samples': 0, 'hits': 0})
+                    entry['samples'] += 1
+                    entry['hits'] += 1 if signal else 0
+
+            # Prune patterns whose early probes showed no commercial signal
+            for term, entry in term_stats.items():
+                if entry['samples'] >= TERM_PRUNE_SAMPLES and entry['hits'] == 0:
+                    pruned_terms.add(term)
+            for placement, entry in placement_stats.items():
+                if entry['samples'] >= PLACEMENT_PRUNE_SAMPLES and entry['hits'] == 0:
+                    pruned_placements.add(placement)
+
+        if pruned_terms or pruned_placements:
+            print(f"[Scheduler] Pruned terms {sorted(pruned_terms)} placements {sorted(pruned_placements)} "
+                  f"after {spent} scrapes")
+
+        return results
+
+    def _signal(self, result: Dict[str, Any]) -> bool:
+        """True when a SERP shows ads or a local pack"""
+        serp_data = result.get('serp_data', {})
+        return bool(serp_data.get('ads')) or bool(serp_data.get('local_pack'))
+
+    def _priority(self, candidate: Dict[str, Any], term_stats: Dict[str, Dict[str, int]],
+                  placement_stats: Dict[str, Dict[str, int]]) -> float:
+        """Prior priority scaled by the observed hit rate of its patterns"""
+        priority = candidate.get('priority', 1.0)
+        for stats, key in ((term_stats, candidate['term']), (placement_stats, candidate['placement'])):
+            entry = stats.get(key)
+            if entry:
+                # Laplace-smoothed hit rate, neutral (1.0) with no samples
+                priority *= 2 * (entry['hits'] + 1) / (entry['samples'] + 2)
+        return priority
@@ -0,0 +1,207 @@
+"""
+Durable SERP snapshot history for rank tracking.
+
+SQLite, one row per snapshot and one row per ranked result. A snapshot
+covers the days from first_seen to last_seen during which a keyword/location
+SERP didn't change: re-scraping an unchanged SERP only extends last_seen,
+and a SERP that changes again on the same day replaces that day's snapshot.
+Results are indexed by domain, so "position history for domain X" never
+needs a scrape.
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.config import Config
+from utils.competitor_store import competitor_domain
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS serp_snapshots (
+    id INTEGER PRIMARY KEY,
+    keyword TEXT NOT NULL,
+    location TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    captured_at REAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    UNIQUE (keyword, location, first_seen)
+);
+CREATE INDEX IF NOT EXISTS idx_serp_snapshots_location ON serp_snapshots (location, keyword);
+CREATE TABLE IF NOT EXISTS serp_results (
+    snapshot_id INTEGER NOT NULL REFERENCES serp_snapshots (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    domain TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    PRIMARY KEY (snapshot_id, kind, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_serp_results_domain ON serp_results (domain, snapshot_id);
+"""
+
+
+def _normalize(text: Optional[str]) -> str:
+    return ' '.join((text or '').lower().split())
+
+
+def _result_rows(serp_data: Dict[str, Any]) -> List[Tuple[str, int, str, str, str]]:
+    """(kind, position, domain, url, title) for organic results, ads and the local pack"""
+    rows = []
+    for i, item in enumerate(serp_data.get('organic_results', [])):
+        url = item.get('url') or ''
+        rows.append(('organic', item.get('position') or i + 1, competitor_domain(url) if url else '',
+                     url, item.get('title') or ''))
+    for i, item in enumerate(serp_data.get('ads', [])):
+        url = item.get('url') or ''
+        rows.append(('ad', i + 1, competitor_domain(url) if url else '', url, item.get('title') or ''))
+    for i, item in enumerate(serp_data.get('local_pack', [])):
+        rows.append(('local', item.get('position') or i + 1, '', '', item.get('name') or ''))
+    return rows
+
+
+def _content_hash(rows: List[Tuple[str, int, str, str, str]]) -> str:
+    """Rankings only: a SERP whose titles or snippets changed is still 'unchanged'"""
+    ranking = '\n'.join(f"{kind}|{position}|{url or title}" for kind, position, _, url, title in rows)
+    return hashlib.sha256(ranking.encode()).hexdigest()
+
+
+class SerpHistoryStore:
+    """SQLite-backed SERP snapshots with per-thread connections"""
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.SERP_HISTORY_DB
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        # A connection opened before a fork (preloaded app) must not be
+        # shared with the child
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            # WAL lets request threads read while a scrape writes
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def record(self, keyword: str, location: str, serp_data: Dict[str, Any],
+               captured_at: float = None) -> str:
+        """Store a scraped SERP; returns 'inserted', 'replaced' or 'unchanged'"""
+        captured_at = captured_at or time.time()
+        day = datetime.fromtimestamp(captured_at, timezone.utc).date().isoformat()
+        keyword, location = _normalize(keyword), _normalize(location)
+        rows = _result_rows(serp_data)
+        content_hash = _content_hash(rows)
+
+        with self._connection() as conn:
+            # Take the write lock before reading, so a concurrent writer can't
+            # insert the same day's snapshot between our SELECT and INSERT
+            conn.execute('BEGIN IMMEDIATE')
+            latest = conn.execute(
+                "SELECT id, first_seen, last_seen, content_hash FROM serp_snapshots "
+                "WHERE keyword = ? AND location = ? ORDER BY first_seen DESC LIMIT 1",
+                (keyword, location)
+            ).fetchone()
+
+            if latest is not None and latest['content_hash'] == content_hash:
+                conn.execute("UPDATE serp_snapshots SET last_seen = MAX(last_seen, ?), captured_at = ? WHERE id = ?",
+                             (day, captured_at, latest['id']))
+                return 'unchanged'
+
+            if latest is not None and latest['first_seen'] == day:
+                # Changed again today: the day keeps its latest ranking
+                snapshot_id = latest['id']
+                conn.execute("UPDATE serp_snapshots SET content_hash = ?, captured_at = ? WHERE id = ?",
+                             (content_hash, captured_at, snapshot_id))
+                conn.execute("DELETE FROM serp_results WHERE snapshot_id = ?", (snapshot_id,))
+                outcome = 'replaced'
+            else:
+                snapshot_id = conn.execute(
+                    "INSERT INTO serp_snapshots (keyword, location, first_seen, last_seen, captured_at, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (keyword, location, day, day, captured_at, content_hash)
+                ).lastrowid
+                outcome = 'inserted'
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO serp_results (snapshot_id, kind, position, domain, url, title) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(snapshot_id, *row) for row in rows]
+            )
+            return outcome
+
+    async def arecord(self, keyword: str, location: str, serp_data: Dict[str, Any]) -> Optional[str]:
+        """record() off the event loop; a history failure never fails the scrape"""
+        try:
+            return await asyncio.to_thread(self.record, keyword, location, serp_data)
+        except sqlite3.Error as e:
+            print(f"[SERP History] Error recording {keyword}: {str(e)}")
+            return None
+
+    def domain_history(self, domain: str, keyword: str = None, location: str = None,
+                       since: str = None, kind: str = 'organic') -> List[Dict[str, Any]]:
+        """Positions of a domain over time, oldest first"""
+        query = ("SELECT s.keyword, s.location, s.first_seen, s.last_seen, r.position, r.url, r.title "
+                 "FROM serp_results r JOIN serp_snapshots s ON s.id = r.snapshot_id "
+                 "WHERE r.domain = ? AND r.kind = ?")
+        params: List[Any] = [competitor_domain(domain), kind]
+        if keyword:
+            query += " AND s.keyword = ?"
+            params.append(_normalize(keyword))
+        if location:
+            query += " AND s.location = ?"
+            params.append(_normalize(location))
+        if since:
+            query += " AND s.last_seen >= ?"
+            params.append(since)
+        query += " ORDER BY s.keyword, s.location, s.first_seen, r.position"
+        return [dict(row) for row in self._connection().execute(query, params)]
+
+    def keyword_history(self, keyword: str, location: str, since: str = None,
+                        kind: str = 'organic') -> List[Dict[str, Any]]:
+        """Snapshots of one keyword/location, oldest first, each with its ranked results"""
+        query = ("SELECT id, first_seen, last_seen FROM serp_snapshots "
+                 "WHERE keyword = ? AND location = ?")
+        params: List[Any] = [_normalize(keyword), _normalize(location)]
+        if since:
+            query += " AND last_seen >= ?"
+            params.append(since)
+        conn = self._connection()
+        snapshots = []
+        for snapshot in conn.execute(query + " ORDER BY first_seen", params).fetchall():
+            results = conn.execute(
+                "SELECT position, domain, url, title FROM serp_results "
+                "WHERE snapshot_id = ? AND kind = ? ORDER BY position",
+                (snapshot['id'], kind)
+            )
+            snapshots.append({
+                'first_seen': snapshot['first_seen'],
+                'last_seen': snapshot['last_seen'],
+                'results': [dict(row) for row in results]
+            })
+        return snapshots
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_serp_history() -> Optional[SerpHistoryStore]:
+    """Process-wide store, or None when SERP_HISTORY_ENABLED is off"""
+    global _store
+    if not Config.SERP_HISTORY_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = SerpHistoryStore()
+        return _store
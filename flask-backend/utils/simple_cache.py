@@ -1,15 +1,22 @@
 import json
+import threading
 import time
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, List
 import os
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, adds are only serialized per process
+    fcntl = None
+from config.config import Config
 
 class SimpleFileCache:
     """Simple file-based cache for development (no Redis required)"""
     
     def __init__(self):
-        self.cache_dir = os.path.join(os.path.dirname(__file__), '..', '.cache')
+        self.cache_dir = Config.CACHE_DIR
         os.makedirs(self.cache_dir, exist_ok=True)
         self.default_ttl = 86400  # 24 hours
+        self._set_lock = threading.Lock()
         
     def _get_cache_path(self, key: str) -> str:
         """Get file path for cache key"""
@@ -59,6 +66,60 @@ class SimpleFileCache:
             print(f"[Cache] Error setting key {key}: {str(e)}")
             return False
     
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Get several values; one directory listing skips keys with no file"""
+        try:
+            present = set(os.listdir(self.cache_dir))
+        except Exception as e:
+            print(f"[Cache] Error listing cache dir: {str(e)}")
+            return {}
+        
+        values = {}
+        for key in keys:
+            if os.path.basename(self._get_cache_path(key)) not in present:
+                continue
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+    
+    def set_many(self, items: Dict[str, str], ttl: int = None) -> bool:
+        """Set several values with the same TTL"""
+        results = [self.set(key, value, ttl) for key, value in items.items()]
+        return all(results)
+    
+    def add_to_set(self, key: str, members: List[str], ttl: int = None) -> bool:
+        """
+        Add members to a JSON list value and refresh its TTL (like SADD + EXPIRE),
+        under a file lock so concurrent adds aren't lost
+        """
+        try:
+            ttl = ttl or self.default_ttl
+            cache_path = self._get_cache_path(key)
+            # One lock file for all sets: a per-key lock file could never be
+            # removed safely while another process may be waiting on it
+            with self._set_lock, open(os.path.join(self.cache_dir, '.sets.lock'), 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                current = self.get(key)
+                values = json.loads(current) if current else []
+                added = [m for m in dict.fromkeys(members) if m not in values]
+                data = {
+                    'value': json.dumps(values + added),
+                    'expires_at': time.time() + ttl,
+                    'created_at': time.time()
+                }
+                # Readers don't take the lock, so replace the file in one step
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, cache_path)
+            return True
+            
+        except Exception as e:
+            print(f"[Cache] Error adding to set {key}: {str(e)}")
+            return False
+    
     def delete(self, key: str) -> bool:
         """Delete key from cache"""
         try:
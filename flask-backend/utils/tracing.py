@@ -0,0 +1,231 @@
+"""
+Lightweight request tracing.
+
+A trace is started around one unit of work (an analysis); spans opened
+inside it nest through a contextvar, so they follow awaits, gathered tasks
+and asyncio.to_thread workers. Outside a trace, span() is a no-op.
+
+Finished traces are exported as OTLP/JSON to OTEL_EXPORTER_OTLP_TRACES_ENDPOINT
+when set (any OpenTelemetry collector accepts this on /v1/traces), and can be
+summarized into a per-step timing breakdown.
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from config.config import Config
+
+# Spans kept per trace; a runaway loop shouldn't hold unbounded memory
+MAX_SPANS_PER_TRACE = 5000
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation with attributes"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: int = 1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def end(self):
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._start_perf)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    """Returned by span() outside a trace"""
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def add(self, key: str, amount: int = 1):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Spans of one unit of work; appended to from the loop and worker threads"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def record(self, span: Span):
+        with self._lock:
+            if len(self.spans) < MAX_SPANS_PER_TRACE:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def root(self) -> Optional[Span]:
+        return next((s for s in self.spans if s.parent_id is None), None)
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Step durations (children of the root span) and totals per span name"""
+        with self._lock:
+            spans = list(self.spans)
+        root = next((s for s in spans if s.parent_id is None), None)
+        steps = {}
+        by_name = {}
+        for s in spans:
+            if root is not None and s.parent_id == root.span_id:
+                steps[s.name] = round(steps.get(s.name, 0.0) + s.duration_ms, 1)
+            totals = by_name.setdefault(s.name, {'count': 0, 'total_ms': 0.0, 'errors': 0})
+            totals['count'] += 1
+            totals['total_ms'] += s.duration_ms
+            totals['errors'] += 1 if s.error else 0
+        for totals in by_name.values():
+            totals['total_ms'] = round(totals['total_ms'], 1)
+        return {
+            'trace_id': self.trace_id,
+            'total_ms': round(root.duration_ms, 1) if root else 0.0,
+            'steps': steps,
+            'spans': by_name,
+            'dropped_spans': self.dropped
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest"""
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': _otlp_attributes({'service.name': Config.OTEL_SERVICE_NAME})},
+                'scopeSpans': [{
+                    'scope': {'name': 'ranksavvy.tracing'},
+                    'spans': [_otlp_span(s) for s in spans if s.end_ns is not None]
+                }]
+            }]
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def _otlp_span(s: Span) -> Dict[str, Any]:
+    span = {
+        'traceId': s.trace_id,
+        'spanId': s.span_id,
+        'name': s.name,
+        'kind': 1,  # SPAN_KIND_INTERNAL
+        'startTimeUnixNano': str(s.start_ns),
+        'endTimeUnixNano': str(s.end_ns),
+        'attributes': _otlp_attributes(s.attributes),
+        # STATUS_CODE_ERROR / STATUS_CODE_OK
+        'status': {'code': 2, 'message': s.error} if s.error else {'code': 1}
+    }
+    if s.parent_id:
+        span['parentSpanId'] = s.parent_id
+    return span
+
+
+def current_span():
+    """Innermost open span, or the no-op span outside a trace"""
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span (no-op outside a trace)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    s = Span(name, trace.trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        _current_span.reset(token)
+        s.end()
+        trace.record(s)
+
+
+@contextmanager
+def trace(name: str, enabled: bool = True, **attributes):
+    """
+    Start a trace with a root span. Yields the Trace (None when disabled) and
+    exports it once the block exits.
+    """
+    if not enabled:
+        yield None
+        return
+
+    t = Trace(name)
+    trace_token = _current_trace.set(t)
+    try:
+        with span(name, **attributes):
+            yield t
+    finally:
+        _current_trace.reset(trace_token)
+        export(t)
+
+
+def tracing_active() -> bool:
+    return _current_trace.get() is not None
+
+
+def record_retry(retry_state):
+    """tenacity before_sleep hook: count the retry on the current span"""
+    s = current_span()
+    s.add('retries')
+    if retry_state.outcome is not None and retry_state.outcome.failed:
+        s.set('last_error', str(retry_state.outcome.exception()))
+
+
+def export(t: Trace):
+    """Send a finished trace to the OTLP endpoint in the background (if configured)"""
+    endpoint = Config.OTEL_EXPORTER_OTLP_TRACES_ENDPOINT
+    if not endpoint:
+        return
+
+    def post():
+        import requests
+        try:
+            requests.post(endpoint, json=t.to_otlp(), timeout=5)
+        except Exception as e:
+            print(f"[Tracing] Export failed: {str(e)}")
+
+    threading.Thread(target=post, name='trace-export', daemon=True).start()